@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 """
-Benchmarks the EOS Async library by attempting to load :attr:`.BLOCK_COUNT` blocks using
-:meth:`.Api.get_block_range`.
+Runs the privex-eos benchmark suite (see :mod:`benchmarks.suite`) - all scenarios against local mock nodes by
+default. Any arguments are passed through to the suite, e.g.::
+
+    ./benchmark.py --output results.json
+    ./benchmark.py --live --scenarios cold_range,call_latency
+    ./benchmark.py --compare results.json
+
+For compatibility with the original single-shot benchmark, the ``BLOCK_COUNT`` environment variable sets
+``--blocks``, and ``USE_HOOKS=1`` sets ``--hooks``.
 
 
 **Copyright**::
@@ -22,31 +29,19 @@ Benchmarks the EOS Async library by attempting to load :attr:`.BLOCK_COUNT` bloc
     
 
 """
-import asyncio
-import time
-from privex.helpers import env_int
-from privex.loghelper import LogHelper
-
-from privex.eos.lib import Api
-
-BLOCK_COUNT = env_int('BLOCK_COUNT', 500)
-
-LogHelper('privex.eos').add_console_handler()
-
+import sys
+from privex.helpers import env_int, env_bool
 
-async def main():
-    api = Api()
-    start_time = time.time()
-    info = await api.get_info()
-    head_block = info['head_block_num']
-    res = await api.get_block_range(head_block - BLOCK_COUNT, head_block)
-    end_time = time.time()
-    completed_in = round(end_time - start_time, 3)
-    blocks_loaded = len(res.keys())
-    bps = blocks_loaded / completed_in
-    print(f"Loaded {blocks_loaded} blocks in {completed_in} seconds.")
-    print(f"Speed: {bps} blocks per second / {bps*60} blocks per minute / {bps * 60 * 60} blocks per hour.")
+from benchmarks.suite import main
 
+BLOCK_COUNT = env_int('BLOCK_COUNT', None)
+USE_HOOKS = env_bool('USE_HOOKS', False)
 
-asyncio.run(main())
 
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    if BLOCK_COUNT is not None:
+        argv = ['--blocks', str(BLOCK_COUNT)] + argv
+    if USE_HOOKS:
+        argv.append('--hooks')
+    main(argv)
@@ -0,0 +1,27 @@
+"""
+Benchmarks for privex-eos.
+
+    - :mod:`benchmarks.suite` - end-to-end scenarios (range import, call latency, mixed reads, failure storms,
+      large block decoding), run against local mock nodes by default.
+    - :mod:`benchmarks.micro` - microbenchmarks of per-request / per-block hot paths (node weighting, object
+      construction), with regression checks against a tracked history.
+
+Both write their results as JSON, so runs can be compared with ``--compare``.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the pure-Python hot paths which run on every request or block - node selection / weighting
+(against an in-memory :class:`.SqliteAdapter`) and object construction - plus the start up costs paid by every
+short-lived worker: import time and :class:`.Api` creation.
+
+The ``import_*`` and ``cold_start`` benchmarks each run a fresh interpreter, so they include the interpreter's own
+start up time - compare them against ``python_startup``.
+
+Each benchmark is timed with :mod:`timeit` (calls per repeat chosen automatically), and reported as the median
+and minimum time per call over ``--repeat`` repeats.
+
+Track results over time by appending each run to a history file, and fail (exit code ``1``) when a benchmark
+is more than ``--threshold`` percent slower (by its minimum time per call) than a baseline - e.g. in CI before a release::
+
+    python3 -m benchmarks.micro --history benchmarks/history.jsonl
+    python3 -m benchmarks.micro --compare benchmarks/history.jsonl --threshold 15
+
+When ``--compare`` is given a history file, the most recent entry is used as the baseline.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.suite import _git_commit
+from privex.eos.adapters import SqliteAdapter
+from privex.eos.lib import Api
+from privex.eos.mock import synthetic_account, synthetic_block
+from privex.eos.node import NodeManager, convert_nodes_weighted
+from privex.eos.objects import EOSAccount, EOSBlock, attr_dict
+
+BENCHMARKS = OrderedDict()  # type: Dict[str, Callable[[argparse.Namespace], Callable]]
+"""Maps each benchmark name to a setup function, which returns the zero argument callable to be timed"""
+
+
+def benchmark(name: str = None):
+    """Register the decorated setup function as the benchmark ``name`` (defaults to the function name)"""
+    def _decorator(func):
+        BENCHMARKS[func.__name__ if name is None else name] = func
+        return func
+    return _decorator
+
+
+def _node_manager(args: argparse.Namespace) -> NodeManager:
+    nm = NodeManager(adapter=SqliteAdapter(db=':memory:'))
+    nm.bulk_insert(*[dict(url=f'http://node{i}.example.com', network='eos') for i in range(args.nodes)])
+    # Give the nodes a spread of failures, so weighting has some work to do
+    for n in nm.get_nodes():
+        for _ in range(n.id % 4):
+            nm.fail_node(n)
+    nm.adapter.action("UPDATE nodes SET last_fail = NULL;")
+    return nm
+
+
+@benchmark()
+def weighted_node(args):
+    nm = _node_manager(args)
+    return lambda: nm.weighted_node
+
+
+@benchmark()
+def get_weighted_nodes(args):
+    nm = _node_manager(args)
+    return lambda: nm.get_weighted_nodes(filter_fail=True, filter_lag=True)
+
+
+@benchmark()
+def fail_node(args):
+    nm = _node_manager(args)
+    url = nm.get_nodes()[0].url
+    return lambda: nm.fail_node(url)
+
+
+@benchmark('convert_nodes_weighted')
+def bench_convert_nodes_weighted(args):
+    nodes = _node_manager(args).get_nodes()
+    total = sum(n.fail_count for n in nodes)
+    return lambda: convert_nodes_weighted(total, *nodes)
+
+
+@benchmark()
+def attr_dict_block(args):
+    data = synthetic_block(1000, txs_per_block=0)
+    return lambda: attr_dict(EOSBlock, data)
+
+
+@benchmark()
+def block_from_dict_large(args):
+    data = synthetic_block(1000, txs_per_block=args.large_txs)
+    return lambda: EOSBlock.from_dict(data)
+
+
+@benchmark()
+def account_from_dict(args):
+    data = synthetic_account('someguy12333', 1000)
+    return lambda: EOSAccount.from_dict(data)
+
+
+def _python(code: str) -> Callable:
+    """A callable which runs ``code`` in a fresh interpreter, importing privex.eos from this source tree"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    return lambda: subprocess.run([sys.executable, '-c', code], env=env, check=True)
+
+
+@benchmark()
+def python_startup(args):
+    return _python('pass')
+
+
+@benchmark()
+def import_package(args):
+    return _python('import privex.eos')
+
+
+@benchmark()
+def import_api(args):
+    return _python('from privex.eos import Api')
+
+
+@benchmark()
+def cold_start(args):
+    return _python(
+        "import asyncio\n"
+        "from privex.eos import Api\n"
+        "from privex.eos.adapters import SqliteAdapter\n"
+        "from privex.eos.node import NodeManager\n"
+        "async def main():\n"
+        "    nm = NodeManager(adapter=SqliteAdapter(db=':memory:'))\n"
+        "    async with await Api.create(nm) as api:\n"
+        "        pass\n"
+        "asyncio.run(main())\n"
+    )
+
+
+@benchmark()
+def api_init(args):
+    nm = _node_manager(args)
+    return lambda: Api(nm)
+
+
+@benchmark()
+def api_create(args):
+    nm = _node_manager(args)
+    return lambda: asyncio.run(Api.create(nm))
+
+
+def time_callable(func: Callable, repeat: int = 5, min_time: float = 0.2) -> Tuple[int, List[float]]:
+    """
+    Time ``func``, returning ``(number, per_call)`` - ``per_call`` holds the mean seconds per call for each of the
+    ``repeat`` repeats of ``number`` calls. ``number`` is picked so that each repeat takes at least ``min_time``.
+    """
+    t = timeit.Timer(func)
+    number = 1
+    while True:
+        if t.timeit(number) >= min_time:
+            break
+        number *= 2 if number < 10 else 10
+    return number, [r / number for r in t.repeat(repeat, number)]
+
+
+def run(args: argparse.Namespace, names: List[str] = None) -> dict:
+    """Run the benchmarks ``names`` (default: all), returning a results dictionary"""
+    results = OrderedDict()
+    for name in (list(BENCHMARKS.keys()) if names is None else names):
+        func = BENCHMARKS[name](args)
+        number, per_call = time_callable(func, repeat=args.repeat, min_time=args.min_time)
+        med = statistics.median(per_call)
+        results[name] = dict(median_us=med * 1e6, min_us=min(per_call) * 1e6, calls_per_sec=1 / med, number=number)
+        if not args.quiet:
+            print(f"{name:<26} {med * 1e6:>12.2f} us/call   min: {min(per_call) * 1e6:>10.2f} us   "
+                  f"{1 / med:>12.0f} calls/s", flush=True)
+    return results
+
+
+def load_baseline(path: str) -> dict:
+    """Load a results file written by ``--output``, or the most recent entry of a ``--history`` file"""
+    with open(path) as fh:
+        text = fh.read().strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(text.splitlines()[-1])
+
+
+def regressions(old: dict, new: dict, threshold: float) -> List[Tuple[str, float]]:
+    """
+    Benchmarks whose minimum time per call in ``new`` is more than ``threshold`` percent higher than in ``old``,
+    as a list of ``(name, percent_change)``. The minimum is compared as it's the least affected by other load on
+    the machine.
+    """
+    res = []
+    for name, r in new['benchmarks'].items():
+        prev = old.get('benchmarks', {}).get(name)
+        if prev is None or not prev.get('min_us'):
+            continue
+        change = (r['min_us'] - prev['min_us']) / prev['min_us'] * 100
+        if change > threshold:
+            res.append((name, change))
+    return res
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='privex-eos hot path microbenchmarks')
+    p.add_argument('--benchmarks', default=','.join(BENCHMARKS.keys()),
+                   help=f"Comma separated benchmarks to run. Available: {', '.join(BENCHMARKS.keys())}")
+    p.add_argument('--nodes', type=int, default=20, help='Number of nodes in the NodeManager benchmarks')
+    p.add_argument('--large-txs', type=int, default=300, help='Average transactions in the large block benchmark')
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per repeat')
+    p.add_argument('--output', '-o', default=None, help='Write JSON results to this file')
+    p.add_argument('--history', default=None, help='Append the results to this JSON lines file')
+    p.add_argument('--compare', default=None, help='Baseline results (or history) file to compare against')
+    p.add_argument('--threshold', type=float, default=10.0, help='Percent slowdown counted as a regression')
+    p.add_argument('--quiet', '-q', action='store_true')
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names = [n.strip() for n in args.benchmarks.split(',') if n.strip()]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if len(unknown) > 0:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(unknown)}")
+    results = dict(
+        meta=dict(timestamp=datetime.now(timezone.utc).isoformat(), commit=_git_commit(),
+                  python=platform.python_version(), implementation=platform.python_implementation(),
+                  platform=platform.platform(), nodes=args.nodes, large_txs=args.large_txs),
+        benchmarks=run(args, names),
+    )
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        slower = regressions(load_baseline(args.compare), results, args.threshold)
+        for name, change in slower:
+            print(f"REGRESSION: {name} is {change:.1f}% slower than the baseline")
+        if len(slower) > 0:
+            return 1
+        print(f"No regressions over {args.threshold}% compared to {args.compare}")
+    if args.history:
+        with open(args.history, 'a') as fh:
+            fh.write(json.dumps(results) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
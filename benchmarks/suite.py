@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark scenarios for :class:`.Api`, run against a local :class:`.MockCluster` by default (so results
+are reproducible offline), or against the default public nodes with ``--live``. The mock cluster runs in its own
+``python -m privex.eos.mock`` process, so the CPU time and peak RSS reported are the client's alone.
+
+Scenarios:
+
+    - ``cold_range`` - :meth:`.Api.get_block_range` with a brand new :class:`.Api` (no pooled connections)
+    - ``warm_range`` - the same, after a warm-up range has been loaded by the same :class:`.Api`
+    - ``call_latency`` - sequential single ``get_block`` calls, one at a time
+    - ``mixed_reads`` - concurrent ``get_block`` / ``get_account`` / ``get_table_rows`` / ``get_info`` calls
+    - ``failure_storm`` - range import while two of three nodes fail half of their requests
+    - ``large_blocks`` - range import of blocks with hundreds of transactions each (decode / construction cost)
+    - ``headers`` - header-only scanning with :meth:`.Api.stream_block_headers`, compared against
+      :meth:`.Api.stream_blocks` over the same range (time and bytes received per block)
+    - ``bulk_interactive`` - sequential ``get_account`` calls while a range import saturates the nodes. Compare
+      with and without ``--scheduler`` (see :class:`.RequestScheduler`)
+
+Each scenario reports items/sec, p50 / p99 request latency, CPU time and peak RSS. Latency is read from the
+:class:`.ApiMetrics` histogram, so no :class:`.RequestHook` is attached unless ``--hooks`` is passed (which
+attaches a single no-op hook, to measure the overhead of the hook path against the zero-hook fast path).
+
+By default, each scenario runs in its own process so peak RSS is per scenario. Results are written as JSON, and can
+be compared with a previous run::
+
+    python3 -m benchmarks.suite --output results.json
+    python3 -m benchmarks.suite --scenarios cold_range,large_blocks --blocks 5000 --compare results.json
+
+With ``--memory``, each scenario is run under a :class:`.MemoryProfiler`, reporting the memory used by each
+pipeline stage in bytes per block (this slows everything down a lot, so the timings aren't comparable)::
+
+    python3 -m benchmarks.suite --scenarios large_blocks --memory
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import attr
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from privex.eos.adapters import SqliteAdapter
+from privex.eos.hooks import RequestHook
+from privex.eos.lib import Api
+from privex.eos.memory import MemoryProfiler
+from privex.eos.metrics import ApiMetrics, Histogram
+from privex.eos.mock import MockNodeConfig
+from privex.eos.node import NodeManager
+from privex.eos.scheduler import RequestScheduler
+
+SCENARIOS = OrderedDict()  # type: Dict[str, Callable]
+
+MOCK_HEAD = 10 ** 6
+"""The head block of the mock cluster's synthetic chain"""
+
+LATENCY_BUCKETS = tuple(1e-4 * 1.05 ** i for i in range(275))
+"""Request latency histogram buckets - 5% wide, from 0.1 ms to ~65 seconds"""
+
+COMPARE_KEYS = ('items_per_sec', 'p50_ms', 'p99_ms', 'interactive_p99_ms', 'cpu_seconds', 'peak_rss_kib')
+"""Result fields shown by ``--compare``"""
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """The ``p``'th percentile (0 - 100) of ``values``, using the nearest-rank method"""
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def histogram_percentile(hist: Histogram, p: float) -> Optional[float]:
+    """
+    The ``p``'th percentile (0 - 100) of every observation in ``hist`` (across all labels), using the nearest-rank
+    method. Returns the upper bound of the bucket holding that rank, so it's only as precise as the buckets.
+    """
+    counts = [0] * (len(hist.buckets) + 1)
+    for bucket_counts, _, _ in hist.values.values():
+        counts = [a + b for a, b in zip(counts, bucket_counts)]
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank, seen = min(total, max(1, math.ceil(p / 100 * total))), 0
+    for le, c in zip(hist.buckets + (hist.buckets[-1],), counts):
+        seen += c
+        if seen >= rank:
+            return le
+
+
+def peak_rss_kib() -> Optional[int]:
+    """
+    Peak resident set size of this process in KiB (``ru_maxrss`` is in bytes on macOS, KiB elsewhere), or ``None``
+    on platforms without :mod:`resource`
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+class Bench:
+    """
+    Shared state for a single scenario run - starts the mock cluster (in a subprocess) and creates :class:`.Api`
+    instances
+    """
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.metrics = ApiMetrics(buckets=LATENCY_BUCKETS)
+        self.memory = MemoryProfiler(interval=args.memory_interval) if args.memory else None
+        self.cluster = None  # type: Optional[asyncio.subprocess.Process]
+        self.urls = []       # type: List[str]
+        self.apis = []       # type: List[Api]
+
+    def node_config(self, **kwargs) -> MockNodeConfig:
+        return MockNodeConfig(**dict(dict(latency=self.args.latency, jitter=self.args.latency), **kwargs))
+
+    async def start(self, configs: List[MockNodeConfig] = None, txs_per_block: int = 3):
+        """Start a ``python -m privex.eos.mock`` process serving a node for each of ``configs``"""
+        if self.args.live:
+            return
+        configs = [self.node_config() for _ in range(self.args.nodes)] if configs is None else configs
+        self.cluster = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'privex.eos.mock', '--head', str(MOCK_HEAD), '--txs-per-block', str(txs_per_block),
+            '--configs', json.dumps([attr.asdict(c) for c in configs]), stdout=asyncio.subprocess.PIPE
+        )
+        self.urls = []
+        for _ in configs:
+            line = await self.cluster.stdout.readline()
+            if not line:
+                raise RuntimeError(f"The mock cluster exited with code {await self.cluster.wait()} before starting")
+            self.urls.append(line.decode().strip())
+
+    def node_manager(self) -> Optional[NodeManager]:
+        """A :class:`.NodeManager` holding only the mock cluster's nodes, or ``None`` for the default nodes"""
+        if self.cluster is None:
+            return None
+        nm = NodeManager(adapter=SqliteAdapter(db=':memory:'))
+        nm.bulk_insert(*[dict(url=u, network=nm.network) for u in self.urls])
+        return nm
+
+    def api(self, **kwargs) -> Api:
+        hooks = [RequestHook()] if self.args.hooks else []
+        hooks += [] if self.memory is None else [self.memory]
+        kwargs = dict(dict(request_jitter=0, retry_wait=0, hooks=hooks, metrics=self.metrics), **kwargs)
+        if self.args.scheduler > 0:
+            kwargs.setdefault('scheduler', RequestScheduler(max_in_flight=self.args.scheduler))
+        api = Api(node_manager=self.node_manager(), **kwargs)
+        self.apis.append(api)
+        return api
+
+    async def head(self, api: Api) -> int:
+        return (await api.get_info())['head_block_num']
+
+    async def stop(self):
+        for a in self.apis:
+            await a.close()
+        self.apis = []
+        if self.cluster is not None:
+            self.cluster.terminate()
+            await self.cluster.wait()
+            self.cluster = None
+
+
+@scenario
+async def cold_range(b: Bench) -> dict:
+    api = b.api()
+    head = MOCK_HEAD if b.cluster is not None else await b.head(api)
+    started = time.perf_counter()
+    blocks = await api.get_block_range(head - b.args.blocks + 1, head)
+    return dict(items=len(blocks), seconds=time.perf_counter() - started)
+
+
+@scenario
+async def warm_range(b: Bench) -> dict:
+    api = b.api()
+    head = await b.head(api)
+    await api.get_block_range(head - b.args.blocks * 2 + 1, head - b.args.blocks)
+    b.metrics.reset()
+    started = time.perf_counter()
+    blocks = await api.get_block_range(head - b.args.blocks + 1, head)
+    return dict(items=len(blocks), seconds=time.perf_counter() - started)
+
+
+@scenario
+async def call_latency(b: Bench) -> dict:
+    api = b.api()
+    head = await b.head(api)
+    b.metrics.reset()
+    count = max(1, b.args.blocks // 10)
+    started = time.perf_counter()
+    for i in range(count):
+        await api.get_block_raw(head - i)
+    return dict(items=count, seconds=time.perf_counter() - started)
+
+
+@scenario
+async def mixed_reads(b: Bench) -> dict:
+    api = b.api(info_max_age=0)
+    head = await b.head(api)
+    rng = random.Random(b.args.seed)
+    sem = asyncio.Semaphore(b.args.concurrency)
+    accounts = ['eosio.token', 'someguy12333', 'privexinceos', 'eosnewyorkio', 'eoshuobipool']
+
+    async def _one():
+        async with sem:
+            r = rng.random()
+            if r < 0.6:
+                await api.get_block_raw(head - rng.randint(0, b.args.blocks))
+            elif r < 0.8:
+                await api.get_account_raw(rng.choice(accounts))
+            elif r < 0.95:
+                await api._call(api.endpoints['get_table_rows'], code='eosio.token', table='accounts',
+                                scope=rng.choice(accounts), json=True, limit=10)
+            else:
+                await api.get_info()
+
+    b.metrics.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*[_one() for _ in range(b.args.blocks)])
+    return dict(items=b.args.blocks, seconds=time.perf_counter() - started)
+
+
+@scenario
+async def failure_storm(b: Bench) -> dict:
+    if not b.args.live:
+        await b.stop()
+        await b.start([b.node_config(error_rate=0.5), b.node_config(error_rate=0.5), b.node_config()])
+    api = b.api(max_retries=50)
+    head = await b.head(api)
+    started = time.perf_counter()
+    blocks = await api.get_block_range(head - b.args.blocks + 1, head)
+    retries = sum(b.metrics.retries.values.values())
+    return dict(items=len(blocks), seconds=time.perf_counter() - started, retries=retries)
+
+
+@scenario
+async def large_blocks(b: Bench) -> dict:
+    if not b.args.live:
+        await b.stop()
+        await b.start(txs_per_block=b.args.large_txs)
+    api = b.api()
+    head = await b.head(api)
+    count = max(1, b.args.blocks // 10)
+    started = time.perf_counter()
+    blocks = await api.get_block_range(head - count + 1, head)
+    return dict(items=len(blocks), seconds=time.perf_counter() - started,
+                transactions=sum(len(blk.transactions) for blk in blocks.values()))
+
+
+@scenario
+async def headers(b: Bench) -> dict:
+    api = b.api()
+    head = await b.head(api)
+    block_info = await api._detect_block_info()
+    start, conc = head - b.args.blocks + 1, b.args.concurrency
+    received = b.metrics.bytes_received.values
+
+    b.metrics.reset()
+    started = time.perf_counter()
+    full = [blk async for blk in api.stream_blocks(start, head, concurrency=conc)]
+    full_seconds, full_bytes = time.perf_counter() - started, sum(received.values())
+
+    b.metrics.reset()
+    started = time.perf_counter()
+    hdrs = [h async for h in api.stream_block_headers(start, head, concurrency=conc)]
+    seconds = time.perf_counter() - started
+    return dict(items=len(hdrs), seconds=seconds, block_info=block_info,
+                full_blocks_per_sec=len(full) / full_seconds, speedup=full_seconds / seconds,
+                bytes_per_block=sum(received.values()) / len(hdrs), full_bytes_per_block=full_bytes / len(full))
+
+
+@scenario
+async def bulk_interactive(b: Bench) -> dict:
+    api = b.api()
+    head = await b.head(api)
+    started = time.perf_counter()
+    bulk = asyncio.ensure_future(api.get_block_range(head - b.args.blocks + 1, head))
+    latencies = []
+    while not bulk.done():
+        t = time.perf_counter()
+        await api.get_account_raw('someguy12333')
+        latencies.append(time.perf_counter() - t)
+        await asyncio.sleep(0.01)
+    blocks = await bulk
+    return dict(items=len(blocks), seconds=time.perf_counter() - started, interactive_calls=len(latencies),
+                interactive_p50_ms=percentile(latencies, 50) * 1000,
+                interactive_p99_ms=percentile(latencies, 99) * 1000)
+
+
+async def _run_scenario(name: str, args: argparse.Namespace) -> dict:
+    if not args.verbose:
+        # Failure scenarios log a warning for every failed request, which would drown out the results
+        logging.getLogger('privex.eos').setLevel(logging.ERROR)
+    b = Bench(args)
+    await b.start()
+    cpu_started = time.process_time()
+    if b.memory is not None:
+        b.memory.start()
+    try:
+        res = await SCENARIOS[name](b)
+    finally:
+        if b.memory is not None:
+            b.memory.stop()
+        await b.stop()
+    lat, reqs = b.metrics.latency, b.metrics.requests.values
+    p50, p99 = histogram_percentile(lat, 50), histogram_percentile(lat, 99)
+    res.update(
+        items_per_sec=res['items'] / res['seconds'] if res['seconds'] > 0 else None,
+        requests=sum(reqs.values()), failed_requests=sum(v for k, v in reqs.items() if k[-1] != 'ok'),
+        p50_ms=None if p50 is None else p50 * 1000, p99_ms=None if p99 is None else p99 * 1000,
+        cpu_seconds=time.process_time() - cpu_started, peak_rss_kib=peak_rss_kib(),
+    )
+    if b.memory is not None:
+        res['memory'] = b.memory.report()
+        res['memory_report'] = b.memory.format_report()
+    return res
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> dict:
+    """Run the scenario ``name`` in this process, returning its results"""
+    return asyncio.run(_run_scenario(name, args))
+
+
+def run_isolated(name: str, args: argparse.Namespace) -> dict:
+    """Run the scenario ``name`` in a fresh process, so its peak RSS isn't affected by earlier scenarios"""
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_scenario, (name, args))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL)
+        return out.decode().strip()
+    except Exception:
+        return None
+
+
+def compare(old: dict, new: dict) -> str:
+    """A table of each scenario's :attr:`.COMPARE_KEYS` in ``old`` and ``new``, with the percentage change"""
+    lines = [f"{'scenario':<16}{'metric':<16}{'old':>14}{'new':>14}{'change':>10}"]
+    for name, res in new['scenarios'].items():
+        prev = old.get('scenarios', {}).get(name)
+        if prev is None:
+            continue
+        for k in COMPARE_KEYS:
+            a, b = prev.get(k), res.get(k)
+            if a is None or b is None:
+                continue
+            change = f'{(b - a) / a * 100:+.1f}%' if a else '-'
+            lines.append(f'{name:<16}{k:<16}{a:>14.2f}{b:>14.2f}{change:>10}')
+    return '\n'.join(lines)
+
+
+def report(name: str, res: dict):
+    p50 = '-' if res['p50_ms'] is None else f"{res['p50_ms']:.2f}"
+    p99 = '-' if res['p99_ms'] is None else f"{res['p99_ms']:.2f}"
+    rss = '-' if res['peak_rss_kib'] is None else f"{res['peak_rss_kib'] / 1024:.1f}"
+    print(f"{name:<16} {res['items']:>7} items in {res['seconds']:>8.3f}s  {res['items_per_sec']:>10.1f}/s  "
+          f"p50: {p50:>8} ms  p99: {p99:>8} ms  cpu: {res['cpu_seconds']:>7.3f}s  "
+          f"peak rss: {rss:>7} MiB", flush=True)
+    if 'memory_report' in res:
+        print(res['memory_report'] + '\n', flush=True)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='privex-eos benchmark suite')
+    p.add_argument('--scenarios', default=','.join(SCENARIOS.keys()),
+                   help=f"Comma separated scenarios to run (default: all). Available: {', '.join(SCENARIOS.keys())}")
+    p.add_argument('--blocks', type=int, default=1000, help='Number of blocks / calls per scenario')
+    p.add_argument('--concurrency', type=int, default=50, help='Concurrent calls in mixed_reads and headers')
+    p.add_argument('--nodes', type=int, default=3, help='Number of mock nodes')
+    p.add_argument('--latency', type=float, default=0.005, help='Base (and jitter) latency of mock nodes')
+    p.add_argument('--large-txs', type=int, default=300, help='Average transactions per block in large_blocks')
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--hooks', action='store_true', help='Attach a no-op RequestHook, to measure hook overhead')
+    p.add_argument('--scheduler', type=int, default=0, metavar='N',
+                   help='Send requests through a RequestScheduler with N slots (default: no scheduler)')
+    p.add_argument('--memory', action='store_true',
+                   help='Profile memory use per pipeline stage (bytes per block). Much slower - ignore the timings')
+    p.add_argument('--memory-interval', type=float, default=1.0, help='Seconds between --memory samples')
+    p.add_argument('--live', action='store_true', help='Benchmark against the default public nodes instead')
+    p.add_argument('--verbose', '-v', action='store_true', help="Show privex.eos warnings (e.g. failed requests)")
+    p.add_argument('--no-isolate', dest='isolate', action='store_false', help='Run every scenario in this process')
+    p.add_argument('--output', '-o', default=None, help='Write JSON results to this file')
+    p.add_argument('--compare', default=None, help='Compare the results against a previous JSON results file')
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    names = [n.strip() for n in args.scenarios.split(',') if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if len(unknown) > 0:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}")
+    results = dict(
+        meta=dict(
+            timestamp=datetime.now(timezone.utc).isoformat(), commit=_git_commit(), python=platform.python_version(),
+            implementation=platform.python_implementation(), platform=platform.platform(),
+            params={k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        ),
+        scenarios=OrderedDict(),
+    )
+    for name in names:
+        res = run_isolated(name, args) if args.isolate else run_scenario(name, args)
+        results['scenarios'][name] = res
+        report(name, res)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            print('\n' + compare(json.load(fh), results))
+    return results
+
+
+if __name__ == '__main__':
+    main()
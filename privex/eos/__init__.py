@@ -40,12 +40,46 @@ Copyright::
 
 """
 
+import importlib
 import logging
 import warnings
 
-from privex.eos.lib import Api
-from privex.eos.objects import attr_dict, EOSTransaction, EOSBlock, convert_bool_int, convert_int_bool, Node
-from privex.eos.node import NodeManager
+_LAZY_IMPORTS = {
+    'privex.eos.lib': ['Api'],
+    'privex.eos.objects': [
+        'attr_dict', 'EOSTransaction', 'EOSBlock', 'EOSAction', 'convert_bool_int', 'convert_int_bool', 'Node',
+        'EOSAccount', 'BulkResult', 'EOSBlockHeader',
+    ],
+    'privex.eos.exceptions': ['EOSException', 'EOSRPCError', 'PaginationError'],
+    'privex.eos.metrics': ['ApiMetrics', 'MetricsRegistry'],
+    'privex.eos.hooks': ['RequestHook', 'RequestEvent', 'SlowCallLogger'],
+    'privex.eos.cassette': ['CassetteWriter', 'ReplayClient', 'replay_workload'],
+    'privex.eos.scheduler': ['RequestScheduler', 'priority'],
+    'privex.eos.sync': ['SyncApi'],
+    'privex.eos.node': ['NodeManager'],
+    'privex.eos.stream': ['ActionFilter', 'extract_actions'],
+    'privex.eos.tokens': ['TokenAmount', 'BalanceSweeper'],
+}
+"""
+The names exported by this package, mapped from the module they live in. They're only imported when first used
+(PEP 562 - module ``__getattr__``, which is why the package requires Python 3.7+), so ``import privex.eos`` (or
+importing a single submodule) doesn't import httpx, privex-helpers etc.
+"""
+
+_LAZY_NAMES = {n: mod for mod, names in _LAZY_IMPORTS.items() for n in names}
+
+
+def __getattr__(name):
+    mod = _LAZY_NAMES.get(name)
+    if mod is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(mod), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LAZY_NAMES.keys()))
 
 
 def _setup_logging(level=logging.WARNING):
@@ -72,3 +106,6 @@ VERSION = '0.6.0'
 
 
 
+
+# Without this, 'from privex.eos import *' would skip the lazily imported names
+__all__ = list(_LAZY_NAMES.keys()) + ['log', 'name', 'VERSION']
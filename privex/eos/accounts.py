@@ -0,0 +1,104 @@
+"""
+Bulk loading of accounts - names are de-duplicated, loaded concurrently (spread across the node pool by
+:meth:`.Api._call`), and failures are reported per account instead of failing the whole batch.
+
+    >>> res = await get_accounts(eos, ['someguy12333', 'privexinceos', 'someguy12333', 'notarealacct'])
+    >>> list(res.keys())
+    ['someguy12333', 'privexinceos']
+    >>> res.errors
+    {'notarealacct': EOSRPCError('exception (0): unspecified - unknown key ...')}
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import logging
+from typing import AsyncGenerator, Iterable, Tuple, Union
+
+from privex.eos.cache import HeadCache
+from privex.eos.objects import EOSAccount, BulkResult
+
+log = logging.getLogger(__name__)
+
+AccountResult = Union[EOSAccount, dict, Exception]
+
+
+async def stream_accounts(api, names: Iterable[str], concurrency: int = 20, cache: HeadCache = None,
+                          raw: bool = False) -> AsyncGenerator[Tuple[str, AccountResult], None]:
+    """
+    Load each account in ``names`` (ignoring duplicates), yielding ``(name, account)`` tuples as each account
+    finishes loading - so the order is **not** preserved. If an account fails to load, the exception is yielded
+    in place of the account.
+
+    :param api: An :class:`.Api` instance (or any object with a ``get_account_raw`` coroutine)
+    :param names: An iterable of account names
+    :param int concurrency: Maximum number of accounts to load at once
+    :param HeadCache cache: If specified, accounts are served from / stored into this cache
+    :param bool raw: If ``True``, yield the raw account dictionaries instead of :class:`.EOSAccount`'s
+    """
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def _load(name):
+        async with sem:
+            try:
+                a = await api.get_account_raw(name)
+            except Exception as e:
+                log.debug("Failed to load account %s: %s %s", name, type(e), str(e))
+                return name, e
+        if cache is not None:
+            cache.set(name, a, a.get('head_block_num'))
+        return name, a
+
+    def _convert(a):
+        return a if raw or isinstance(a, Exception) else EOSAccount.from_dict(a)
+
+    tasks = []
+    for name in dict.fromkeys(names):
+        a = None if cache is None else cache.get(name)
+        if a is not None:
+            yield name, _convert(a)
+            continue
+        tasks.append(asyncio.ensure_future(_load(name)))
+    try:
+        for fut in asyncio.as_completed(tasks):
+            name, a = await fut
+            yield name, _convert(a)
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def get_accounts(api, names: Iterable[str], **kwargs) -> BulkResult:
+    """
+    Load each account in ``names`` (ignoring duplicates) concurrently. Accepts the same ``kwargs`` as
+    :func:`.stream_accounts`.
+
+    :return BulkResult accounts: Maps each name to its account, in the order of ``names``. Accounts which failed to
+                                 load are left out, with their exceptions in ``.errors`` instead.
+    """
+    names = list(dict.fromkeys(names))
+    loaded = {}
+    async for name, a in stream_accounts(api, names, **kwargs):
+        loaded[name] = a
+    res = BulkResult()
+    for name in names:
+        a = loaded[name]
+        if isinstance(a, Exception):
+            res.errors[name] = a
+        else:
+            res[name] = a
+    return res
@@ -32,10 +32,56 @@ SQLITE_SCHEMA = [
         "    node_id INTEGER NOT NULL, api TEXT NOT NULL, failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
         "    FOREIGN KEY(node_id) REFERENCES nodes(id)"
         ");",
+    ),
+    (
+        'node_health',
+        "CREATE TABLE node_health ("
+        "    node_id INTEGER PRIMARY KEY, head_block_num INTEGER NULL, last_irreversible_block_num INTEGER NULL,"
+        "    latency_ms REAL NULL, error TEXT NULL, checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+        "    FOREIGN KEY(node_id) REFERENCES nodes(id)"
+        ");",
     )
 ]
 
 
+INDEX_SCHEMA = [
+    (
+        'idx_actions',
+        "CREATE TABLE idx_actions ("
+        "   block_num INTEGER NOT NULL, trx_index INTEGER NOT NULL, action_index INTEGER NOT NULL,"
+        "   contract TEXT NOT NULL, name TEXT NOT NULL,"
+        "   PRIMARY KEY(block_num, trx_index, action_index)"
+        ") WITHOUT ROWID;",
+    ),
+    (
+        'idx_actions_contract',
+        "CREATE INDEX IF NOT EXISTS idx_actions_contract ON idx_actions (contract, name, block_num);",
+    ),
+    (
+        'idx_accounts',
+        "CREATE TABLE idx_accounts ("
+        "   account TEXT NOT NULL, block_num INTEGER NOT NULL, trx_index INTEGER NOT NULL,"
+        "   action_index INTEGER NOT NULL,"
+        "   PRIMARY KEY(account, block_num, trx_index, action_index)"
+        ") WITHOUT ROWID;",
+    ),
+    (
+        'idx_transactions',
+        "CREATE TABLE idx_transactions ("
+        "   trx_prefix BLOB NOT NULL, block_num INTEGER NOT NULL,"
+        "   PRIMARY KEY(trx_prefix, block_num)"
+        ") WITHOUT ROWID;",
+    ),
+    (
+        'block_times',
+        "CREATE TABLE block_times ("
+        "   network TEXT NOT NULL, block_num INTEGER NOT NULL, timestamp_ms INTEGER NOT NULL,"
+        "   PRIMARY KEY(network, block_num)"
+        ") WITHOUT ROWID;",
+    ),
+]
+
+
 class BaseAdapter(GenericDBWrapper):
     @abstractmethod
     def begin_transaction(self, cursor):
@@ -72,8 +118,30 @@ class SqliteAdapter(SqliteWrapper, BaseAdapter):
         return cursor
 
     def rollback_transaction(self, cursor):
-        cursor.execute('COMMIT')
+        cursor.execute('ROLLBACK')
         return cursor
 
+    def create_schemas(self, *tables) -> dict:
+        # ``tables_created`` is shared by every instance and keyed by the database path - but each ``:memory:``
+        # connection is a separate, empty database, so its tables must always be checked for.
+        if self.db == ':memory:':
+            for table, _ in self.SCHEMAS:
+                self.tables_created.discard(f"{self.db}:{table}")
+        return super().create_schemas(*tables)
+
     SCHEMAS: List[Tuple[str, str]] = SQLITE_SCHEMA
 
+
+
+class IndexAdapter(SqliteAdapter):
+    """
+    An :class:`.SqliteAdapter` for the local block data indexes (see :mod:`privex.eos.index`), which are kept in
+    their own database file, separate from the RPC node database.
+    """
+    DEFAULT_DB_NAME = 'privex_eos_index.db'
+    DEFAULT_DB = join(SqliteAdapter.DEFAULT_DB_FOLDER, DEFAULT_DB_NAME)
+    
+    DEFAULT_ENABLE_EXECUTION_LOG = False
+    """Index queries can return large result sets, so don't hold on to them in the execution log"""
+    
+    SCHEMAS: List[Tuple[str, str]] = INDEX_SCHEMA
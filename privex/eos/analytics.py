@@ -0,0 +1,251 @@
+"""
+Vectorised producer and resource usage analytics over block ranges.
+
+:class:`.BlockAnalytics` reduces each block down to a handful of typed columns (``producer``, ``timestamp``,
+``cpu_usage_us``, ``net_usage_words`` ...) as blocks are added - either in bulk from a range, or one at a time
+as they stream in from the live chain - so dashboards never need to re-fetch or re-walk the blocks.
+
+Per-producer block counts and usage totals are kept up to date as each block is added. Other aggregates
+(percentiles, histograms, time buckets) are computed with NumPy over zero-copy views of the columns.
+
+Requires ``numpy`` (``pip3 install privex-eos[columnar]``).
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import logging
+from typing import Dict, AsyncIterable, List, Union, Sequence, Tuple
+
+from privex.eos.columnar import NumberColumn, DictColumn, np, _require_numpy
+from privex.eos.objects import block_time_ms, EOSBlock
+from privex.eos.stream import stream_raw_blocks
+
+log = logging.getLogger(__name__)
+
+BLOCK_INTERVAL_MS = 500
+"""The number of milliseconds between each EOS block slot"""
+
+USAGE_FIELDS = ('cpu_usage_us', 'net_usage_words')
+
+
+class BlockAnalytics:
+    """
+    Incrementally collects per-block and per-transaction usage data into typed columns, and computes
+    per-producer / time bucketed aggregates with NumPy.
+
+    Build from a range, then keep it updated from the live chain::
+
+        >>> ba = await BlockAnalytics.from_range(api, 94000000, 94100000)
+        >>> ba.producer_block_counts()
+        {'eoshuobipool': 4788, 'eosnewyorkio': 4800, ...}
+        >>> ba.percentiles('cpu_usage_us', (50, 99))
+        {50: 212.0, 99: 4351.0}
+        >>> async for b in api.stream_blocks(94100001, raw=True):
+        ...     ba.add_block(b)
+
+    """
+    def __init__(self, capacity: int = 4096):
+        _require_numpy()
+        self.block_num = NumberColumn('q', capacity)
+        self.timestamp_ms = NumberColumn('q', capacity)
+        self.producer = DictColumn(capacity)
+        self.tx_count = NumberColumn('i', capacity)
+        self.cpu_total = NumberColumn('q', capacity)
+        self.net_total = NumberColumn('q', capacity)
+        # Per-transaction columns. ``tx_block`` holds the row index of the transaction's block in the above columns.
+        self.tx_block = NumberColumn('i', capacity * 8)
+        self.cpu_usage_us = NumberColumn('q', capacity * 8)
+        self.net_usage_words = NumberColumn('q', capacity * 8)
+        # Running per-producer aggregates, indexed by producer code
+        self._producer_blocks = []  # type: List[int]
+        self._producer_totals = {f: [] for f in USAGE_FIELDS}  # type: Dict[str, List[int]]
+
+    def add_block(self, block: Union[dict, EOSBlock]):
+        """Add a single raw block dictionary (or :class:`.EOSBlock`) to the dataset"""
+        if isinstance(block, EOSBlock):
+            block = dict(block)
+        row = len(self.block_num)
+        cpu_sum = net_sum = 0
+        txs = block.get('transactions', [])
+        for tx in txs:
+            cpu, net = tx.get('cpu_usage_us') or 0, tx.get('net_usage_words') or 0
+            cpu_sum += cpu
+            net_sum += net
+            self.tx_block.append(row)
+            self.cpu_usage_us.append(cpu)
+            self.net_usage_words.append(net)
+        self.block_num.append(block['block_num'])
+        self.timestamp_ms.append(block_time_ms(block['timestamp']))
+        code = self.producer.append(block.get('producer'))
+        if code == len(self._producer_blocks):
+            self._producer_blocks.append(0)
+            for totals in self._producer_totals.values():
+                totals.append(0)
+        self._producer_blocks[code] += 1
+        self._producer_totals['cpu_usage_us'][code] += cpu_sum
+        self._producer_totals['net_usage_words'][code] += net_sum
+        self.tx_count.append(len(txs))
+        self.cpu_total.append(cpu_sum)
+        self.net_total.append(net_sum)
+
+    async def add_stream(self, blocks: AsyncIterable[Union[dict, EOSBlock]]) -> int:
+        """Add every block from the async iterable ``blocks``. Returns the number of blocks added."""
+        count = 0
+        async for b in blocks:
+            self.add_block(b)
+            count += 1
+        return count
+
+    @classmethod
+    async def from_range(cls, api, start: int, end: int, concurrency: int = 20, **kwargs) -> "BlockAnalytics":
+        """Create a :class:`.BlockAnalytics` from the blocks ``start`` to ``end`` (inclusive) loaded from ``api``"""
+        ba = cls(**kwargs)
+        await ba.add_stream(stream_raw_blocks(api, start, end, concurrency=concurrency))
+        return ba
+
+    def __len__(self):
+        return len(self.block_num)
+
+    @property
+    def producers(self) -> list:
+        """The distinct producer names, in the order of their codes in :attr:`.producer`"""
+        return list(self.producer.values)
+
+    def _tx_producer_codes(self):
+        return self.producer.codes.view()[self.tx_block.view()]
+
+    def _by_producer(self, counts: List[int]) -> Dict[str, int]:
+        return {p: counts[i] for i, p in enumerate(self.producers) if counts[i] != 0}
+
+    @staticmethod
+    def _check_field(field: str):
+        if field not in USAGE_FIELDS:
+            raise ValueError(f"field must be one of: {', '.join(USAGE_FIELDS)}")
+
+    def producer_block_counts(self) -> Dict[str, int]:
+        """Number of blocks produced by each producer"""
+        return self._by_producer(self._producer_blocks)
+
+    def producer_totals(self, field: str = 'cpu_usage_us') -> Dict[str, int]:
+        """Sum of ``field`` (``cpu_usage_us`` or ``net_usage_words``) across all transactions, per producer"""
+        self._check_field(field)
+        return self._by_producer(self._producer_totals[field])
+
+    def _usage(self, field: str):
+        self._check_field(field)
+        return getattr(self, field).view()
+
+    def percentiles(self, field: str = 'cpu_usage_us', q: Sequence[float] = (50, 90, 99)) -> Dict[float, float]:
+        """Percentiles of a per-transaction usage ``field`` over every transaction in the dataset"""
+        vals = self._usage(field)
+        if len(vals) == 0:
+            return {p: 0.0 for p in q}
+        return dict(zip(q, (float(v) for v in np.percentile(vals, q))))
+
+    def producer_percentiles(self, field: str = 'cpu_usage_us',
+                             q: Sequence[float] = (50, 90, 99)) -> Dict[str, Dict[float, float]]:
+        """Percentiles of a per-transaction usage ``field``, for the transactions included by each producer"""
+        vals, codes = self._usage(field), self._tx_producer_codes()
+        if len(vals) == 0:
+            return {}
+        order = np.argsort(codes, kind='stable')
+        vals, codes = vals[order], codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(self.producers) + 1))
+        res = {}
+        for i, p in enumerate(self.producers):
+            lo, hi = bounds[i], bounds[i + 1]
+            if hi > lo:
+                res[p] = dict(zip(q, (float(v) for v in np.percentile(vals[lo:hi], q))))
+        return res
+
+    def producer_histograms(self, field: str = 'cpu_usage_us', bins=None) -> Tuple[Dict[str, list], list]:
+        """
+        Histogram of a per-transaction usage ``field`` for each producer, using the same bin edges for
+        every producer so they can be compared / stacked.
+
+        :param str field: ``cpu_usage_us`` or ``net_usage_words``
+        :param bins: The bin edges to use. By default, log2 spaced edges covering the range of the data.
+        :return tuple result: ``(histograms, edges)`` - ``histograms`` maps each producer to its list of bin counts
+        """
+        vals, codes = self._usage(field), self._tx_producer_codes()
+        if bins is None:
+            top = int(vals.max()) if len(vals) > 0 else 1
+            bins = np.concatenate(([0], 2 ** np.arange(0, max(1, top).bit_length() + 1)))
+        edges = np.asarray(bins)
+        n_prod = len(self.producers)
+        hist, _, _ = np.histogram2d(codes, vals, bins=[np.arange(n_prod + 1), edges])
+        hists = {p: hist[i].astype(np.int64).tolist() for i, p in enumerate(self.producers) if hist[i].any()}
+        return hists, edges.tolist()
+
+    def _sorted_blocks(self):
+        nums, times = self.block_num.view(), self.timestamp_ms.view()
+        order = np.argsort(nums, kind='stable')
+        return order, nums[order], times[order]
+
+    def _missed_per_block(self):
+        """Returns ``(order, missed)`` - the number of missed slots directly before each block (sorted by number)"""
+        order, nums, times = self._sorted_blocks()
+        missed = np.zeros(len(nums), dtype=np.int64)
+        if len(nums) > 1:
+            # Only compare consecutive block numbers, so gaps in the dataset aren't counted as missed slots
+            consecutive = np.diff(nums) == 1
+            slots = np.diff(times) // BLOCK_INTERVAL_MS - 1
+            missed[1:] = np.where(consecutive & (slots > 0), slots, 0)
+        return order, missed
+
+    def missed_slots(self) -> int:
+        """Total number of block slots which were skipped between consecutive blocks in the dataset"""
+        return int(self._missed_per_block()[1].sum())
+
+    def time_buckets(self, bucket_ms: int = 60000) -> Dict[str, list]:
+        """
+        Per time bucket totals, e.g. per minute with the default ``bucket_ms`` of ``60000``.
+
+        :return dict buckets: Maps ``bucket_ms`` (bucket start time in unix ms), ``blocks``, ``transactions``,
+                              ``cpu_usage_us``, ``net_usage_words`` and ``missed_slots`` to equal length lists.
+        """
+        if len(self) == 0:
+            return dict(bucket_ms=[], blocks=[], transactions=[], cpu_usage_us=[], net_usage_words=[],
+                        missed_slots=[])
+        order, missed = self._missed_per_block()
+        times = self.timestamp_ms.view()[order]
+        keys = times // bucket_ms
+        first = keys.min()
+        idx = keys - first
+        size = int(idx.max()) + 1
+
+        def _sum(weights):
+            return np.bincount(idx, weights=weights, minlength=size).astype(np.int64).tolist()
+
+        return dict(
+            bucket_ms=((np.arange(size) + first) * bucket_ms).tolist(),
+            blocks=np.bincount(idx, minlength=size).tolist(),
+            transactions=_sum(self.tx_count.view()[order]),
+            cpu_usage_us=_sum(self.cpu_total.view()[order]),
+            net_usage_words=_sum(self.net_total.view()[order]),
+            missed_slots=_sum(missed),
+        )
+
+    def summary(self) -> dict:
+        """A dictionary summary of the dataset, suitable for serialising to JSON for a dashboard"""
+        nums = self.block_num.view()
+        return dict(
+            blocks=len(self), transactions=len(self.cpu_usage_us),
+            first_block=int(nums.min()) if len(nums) else None, last_block=int(nums.max()) if len(nums) else None,
+            missed_slots=self.missed_slots(), producer_blocks=self.producer_block_counts(),
+            cpu_percentiles=self.percentiles('cpu_usage_us'), net_percentiles=self.percentiles('net_usage_words'),
+        )
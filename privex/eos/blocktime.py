@@ -0,0 +1,146 @@
+"""
+Resolve timestamps and time windows into block numbers, using interpolation search over block header lookups.
+
+Block numbers can't simply be calculated from the 0.5 second block interval, as missed slots make the chain
+drift behind the schedule. Instead, the search interpolates between the nearest known ``(block_num, timestamp)``
+points, and uses the fact that blocks are *at least* 500ms apart to bound the answer - without missed slots
+nearby, a lookup usually needs a single header request. Every probed header is stored in a
+:class:`.BlockTimeIndex`, so lookups get cheaper with use.
+
+    >>> from datetime import datetime
+    >>> await eos.get_block_range_for_time(datetime(2019, 12, 8, 14, 0), datetime(2019, 12, 8, 16, 0))
+    (93869812, 93884211)
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import logging
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+from dateutil.tz import tzutc
+
+from privex.eos.index import BlockTimeIndex
+from privex.eos.objects import block_time_ms, fast_convert_datetime
+
+log = logging.getLogger(__name__)
+
+BLOCK_INTERVAL_MS = 500
+"""The minimum number of milliseconds between two consecutive blocks"""
+
+TimeLike = Union[datetime, str, int, float]
+
+
+def to_ms(when: TimeLike) -> int:
+    """
+    Convert ``when`` into unix milliseconds. Accepts a :class:`datetime` (naive date/times are assumed to be UTC),
+    a date/time string (e.g. ``2019-12-08T23:19:55.500``), or an int/float of unix **seconds**.
+    """
+    if isinstance(when, (int, float)):
+        return int(when * 1000)
+    if isinstance(when, str):
+        when = fast_convert_datetime(when)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=tzutc())
+    return int(when.timestamp() * 1000)
+
+
+async def _probe(api, index: BlockTimeIndex, block_num: int) -> int:
+    h = await api.get_block_header_raw(block_num)
+    ts = block_time_ms(h['timestamp'])
+    index.add_point(block_num, ts)
+    return ts
+
+
+async def _initial_bounds(api, index: BlockTimeIndex, target: int):
+    lo, hi = index.bracket(target)
+    if hi is None:
+        info = await api.get_info()
+        head, head_ts = int(info['head_block_num']), block_time_ms(info['head_block_time'])
+        index.add_point(head, head_ts)
+        if head_ts < target:
+            return None, None
+        lo, hi = index.bracket(target)
+    if lo is None and hi[0] > 1:
+        first_ts = await _probe(api, index, 1)
+        lo, hi = index.bracket(target)
+        if first_ts >= target:
+            return None, hi
+    return lo, hi
+
+
+async def find_block_at_time(api, when: TimeLike, index: BlockTimeIndex, max_probes: int = 64) -> Optional[int]:
+    """
+    Find the first block with a timestamp at or after ``when``.
+
+    :param api: An :class:`.Api` instance (or any object with ``get_block_header_raw`` and ``get_info`` coroutines)
+    :param when: A :class:`datetime`, date/time string, or unix timestamp in seconds (see :func:`.to_ms`)
+    :param BlockTimeIndex index: The index of known block times to use, and to store probed block times into
+    :param int max_probes: Give up (raising :class:`TimeoutError`) after this many header lookups
+    :return Optional[int] block_num: The block number, or ``None`` if ``when`` is later than the head block
+    """
+    return await _find_block(api, to_ms(when), index, max_probes)
+
+
+async def _find_block(api, target: int, index: BlockTimeIndex, max_probes: int = 64) -> Optional[int]:
+    lo, hi = await _initial_bounds(api, index, target)
+    if hi is None:
+        return None
+    if lo is None:
+        return hi[0]
+    (lo_num, lo_ts), (hi_num, hi_ts) = lo, hi
+    bisect_next = False
+    for _ in range(max_probes):
+        # Blocks are at least BLOCK_INTERVAL_MS apart, so the answer must lie within [min_b, max_b]
+        min_b = max(lo_num + 1, hi_num - (hi_ts - target) // BLOCK_INTERVAL_MS)
+        max_b = min(hi_num, lo_num + -(-(target - lo_ts) // BLOCK_INTERVAL_MS))
+        if min_b >= max_b:
+            return min_b
+        if bisect_next:
+            guess = (min_b + max_b) // 2
+        else:
+            guess = lo_num + -(-(target - lo_ts) * (hi_num - lo_num) // (hi_ts - lo_ts))
+            guess = max(min_b, min(max_b, guess))
+        guess = min(guess, hi_num - 1)
+        ts = await _probe(api, index, guess)
+        span = hi_num - lo_num
+        if ts >= target:
+            hi_num, hi_ts = guess, ts
+        else:
+            lo_num, lo_ts = guess, ts
+        # Fall back to bisection for the next probe if interpolation didn't at least halve the search range
+        bisect_next = not bisect_next and (hi_num - lo_num) * 2 > span
+    raise TimeoutError(f"Failed to find the block at {target} (unix ms) within {max_probes} probes")
+
+
+async def find_block_range_for_time(api, start: TimeLike, end: TimeLike, index: BlockTimeIndex,
+                                    **kwargs) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Find the first and last blocks produced within the time window ``start`` to ``end`` (inclusive).
+
+    :return tuple blocks: ``(first_block, last_block)`` - ``first_block`` is ``None`` if no blocks have been
+                          produced since ``start``, and ``last_block`` is the head block if ``end`` is in the future.
+                          If no blocks were produced within the window, ``last_block`` will be lower than
+                          ``first_block``.
+    """
+    first = await find_block_at_time(api, start, index, **kwargs)
+    if first is None:
+        return None, None
+    after_end = await _find_block(api, to_ms(end) + 1, index, **kwargs)
+    if after_end is None:
+        return first, index.block_nums[-1]
+    return first, after_end - 1
@@ -0,0 +1,200 @@
+"""
+Short lived caches for chain state - :class:`.HeadCache`, where entries expire after the chain has advanced a given
+number of blocks rather than after a fixed number of seconds, and :class:`.InfoCache`, a shared ``get_info`` snapshot
+which estimates the current head block between refreshes.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+log = logging.getLogger(__name__)
+
+BLOCK_INTERVAL = 0.5
+"""The number of seconds between each EOS block"""
+
+
+class HeadCache:
+    """
+    An LRU cache where each entry is stamped with the ``head_block_num`` it was loaded at, and expires once the
+    (estimated) chain head is more than ``max_age_blocks`` blocks past that stamp.
+
+    The chain head is estimated from the highest ``head_block_num`` seen so far, plus the number of blocks which
+    should have been produced since it was seen - so entries expire on time even if nothing new is loaded.
+
+        >>> cache = HeadCache(max_age_blocks=6)
+        >>> cache.set('someguy12333', account, head_block_num=94000000)
+        >>> cache.get('someguy12333')         # Returns ``account`` until the head reaches block 94000007
+    """
+    def __init__(self, max_age_blocks: int = 6, max_size: int = 100000, block_interval: float = BLOCK_INTERVAL):
+        """
+        :param int max_age_blocks: Entries expire once the head is more than this many blocks past their stamp
+        :param int max_size: The maximum number of entries to hold, evicting the least recently used first
+        :param float block_interval: Seconds between blocks, used to estimate the current head
+        """
+        self.max_age_blocks, self.max_size = int(max_age_blocks), int(max_size)
+        self.block_interval = float(block_interval)
+        self._data = OrderedDict()  # type: OrderedDict
+        self._head = None           # type: Optional[int]
+        self._head_at = 0.0
+        self.hits = self.misses = 0
+
+    def observe_head(self, head_block_num: int):
+        """Update the known chain head, if ``head_block_num`` is newer than the last seen head"""
+        if head_block_num is not None and (self._head is None or head_block_num > self._head):
+            self._head, self._head_at = int(head_block_num), time.monotonic()
+
+    @property
+    def head_estimate(self) -> Optional[int]:
+        """The estimated current head block number, or ``None`` if no head has been seen yet"""
+        if self._head is None:
+            return None
+        return self._head + int((time.monotonic() - self._head_at) / self.block_interval)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for ``key``, or ``default`` if it isn't cached or has expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        stamp, value = entry
+        if self.head_estimate - stamp > self.max_age_blocks:
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, head_block_num: int):
+        """Cache ``value`` under ``key``, stamped with the ``head_block_num`` it was loaded at"""
+        self.observe_head(head_block_num)
+        self._data[key] = (int(head_block_num), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class InfoCache:
+    """
+    A shared ``get_info`` snapshot, refreshed on demand once it's older than ``max_age`` seconds (concurrent
+    callers share a single refresh), and optionally in the background with :meth:`.start`.
+
+    Between refreshes, :attr:`.head_block_num` estimates the current head from the block interval, so callers
+    can read the head without any network round trip. Once the snapshot is older than ``max_estimate_age``, the
+    estimate is no longer trusted (the chain may have stalled, or the clock jumped) and it returns ``None``.
+
+        >>> cache = InfoCache(api._fetch_info, max_age=0.5)
+        >>> cache.start(interval=0.5)
+        >>> info = await cache.get()            # Served from the snapshot while it's less than 0.5s old
+        >>> cache.head_block_num                # No network call - estimated from the last snapshot
+        94000012
+
+    """
+    def __init__(self, fetch: Callable[[], Awaitable[dict]], max_age: float = 0.5,
+                 block_interval: float = BLOCK_INTERVAL, max_estimate_age: float = 60.0):
+        """
+        :param fetch: A coroutine function which loads ``get_info`` from the network
+        :param float max_age: :meth:`.get` refreshes the snapshot if it's older than this many seconds
+        :param float block_interval: Seconds between blocks, used to estimate the current head
+        :param float max_estimate_age: :attr:`.head_block_num` returns ``None`` once the snapshot is older than
+                                       this many seconds, instead of extrapolating from it forever
+        """
+        self.fetch, self.max_age, self.block_interval = fetch, float(max_age), float(block_interval)
+        self.max_estimate_age = float(max_estimate_age)
+        self.info = None          # type: Optional[dict]
+        self.fetched_at = 0.0
+        self._pending = None      # type: Optional[asyncio.Future]
+        self._task = None         # type: Optional[asyncio.Task]
+        self.hits = self.misses = 0
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the snapshot was loaded, or ``None`` if it hasn't been loaded yet"""
+        return None if self.info is None else time.monotonic() - self.fetched_at
+
+    async def _refresh(self) -> dict:
+        info = await self.fetch()
+        self.info, self.fetched_at = info, time.monotonic()
+        return info
+
+    async def refresh(self) -> dict:
+        """Load a new snapshot now. If a refresh is already in progress, wait for that one instead."""
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._pending)
+
+    async def get(self, max_age: float = None) -> dict:
+        """
+        Returns the snapshot if it's less than ``max_age`` seconds old (defaults to :attr:`.max_age`), otherwise
+        refreshes it first. The same dictionary is shared between callers, so it must not be modified.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        if self.info is not None and max_age > 0 and self.age <= max_age:
+            self.hits += 1
+            return self.info
+        self.misses += 1
+        return await self.refresh()
+
+    @property
+    def head_block_num(self) -> Optional[int]:
+        """
+        The estimated current head block, or ``None`` if no snapshot has been loaded, or it's older than
+        :attr:`.max_estimate_age`
+        """
+        if self.info is None or self.age > self.max_estimate_age:
+            return None
+        return int(self.info['head_block_num']) + int(self.age / self.block_interval)
+
+    @property
+    def last_irreversible_block_num(self) -> Optional[int]:
+        """The last irreversible block from the snapshot (not estimated, as LIB doesn't advance steadily)"""
+        return None if self.info is None else int(self.info['last_irreversible_block_num'])
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.warning("Background get_info refresh failed: %s %s", type(e), str(e))
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = None) -> asyncio.Task:
+        """Start refreshing the snapshot in the background every ``interval`` seconds (default: :attr:`.max_age`)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._refresh_loop(self.max_age if interval is None else interval))
+        return self._task
+
+    async def stop(self):
+        """Stop the background refresh task started by :meth:`.start`"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
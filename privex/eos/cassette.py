@@ -0,0 +1,253 @@
+"""
+Record / replay of RPC traffic ("cassettes"), for reproducing performance problems and regression testing against
+real node responses without a network connection.
+
+Record every request made by an :class:`.Api` - along with its response, and when / how long it took::
+
+    >>> async with Api(record='/tmp/slow-import.cassette.gz') as eos:
+    ...     await eos.get_block_range(94000000, 94001000)
+
+Then serve the recorded responses back offline - either with the original response times, or as fast as
+possible (``replay_speed=None``)::
+
+    >>> async with Api(replay='/tmp/slow-import.cassette.gz', replay_speed=1.0) as eos:
+    ...     await eos.get_block_range(94000000, 94001000)
+
+Or re-issue the whole recorded workload, with each call started at its original offset (see :func:`.replay_workload`).
+
+Cassettes are gzip compressed JSON lines. The first line is a header, and each following line is one request::
+
+    {"t": 0.0132, "d": 0.0841, "n": "https://eos.greymass.com", "e": "/v1/chain/get_block",
+     "b": {"block_num_or_id": 94000000}, "s": 200, "r": "{\\"timestamp\\": ..."}
+
+``t`` is the request start time (seconds since recording started), ``d`` its duration, ``n`` the node,
+``e`` the endpoint, ``b`` the JSON request body, ``s`` the HTTP status and ``r`` the raw response body. Requests which
+failed without a response (e.g. timeouts) have ``x`` (the exception's class name) and ``m`` (its message) instead of
+``s`` and ``r``.
+
+Responses are matched to requests by endpoint and body (not node, as nodes are picked randomly). If the same request
+was recorded more than once, the responses are served in their recorded order.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import builtins
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import httpx
+
+from privex.eos.health import close_client
+
+log = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _body_key(endpoint: str, body: Union[dict, list, None]) -> Tuple[str, str]:
+    return endpoint, json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+
+def _split_url(url: str) -> Tuple[str, str]:
+    """Split a request URL into ``(node, endpoint)``, e.g. ``('https://eos.greymass.com', '/v1/chain/get_info')``"""
+    idx = url.find('/v1/')
+    return (url, '') if idx < 0 else (url[:idx], url[idx:])
+
+
+def read_cassette(path: str) -> Tuple[dict, List[dict]]:
+    """Load a cassette file, returning ``(header, interactions)``"""
+    header, items = {}, []
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for i, line in enumerate(fh):
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if i == 0 and 'cassette' in rec:
+                header = rec
+                continue
+            items.append(rec)
+    return header, items
+
+
+class CassetteWriter:
+    """Appends interactions to a cassette file as they happen, so long recordings aren't held in memory"""
+    def __init__(self, path: str, compresslevel: int = 6, **meta):
+        self.path = path
+        self.started = time.monotonic()
+        self.count = 0
+        self._fh = gzip.open(path, 'wt', encoding='utf-8', compresslevel=compresslevel)
+        self._write(dict(cassette=CASSETTE_VERSION, created=datetime.now(timezone.utc).isoformat(), **meta))
+
+    def _write(self, rec: dict):
+        self._fh.write(_dumps(rec) + '\n')
+
+    def record(self, node: str, endpoint: str, body, status: int, response: str, started: float, duration: float):
+        """Write one interaction. ``started`` is the :func:`time.monotonic` value when the request was sent."""
+        self._write(dict(t=round(started - self.started, 6), d=round(duration, 6), n=node, e=endpoint, b=body,
+                         s=status, r=response))
+        self.count += 1
+
+    def record_error(self, node: str, endpoint: str, body, error: Exception, started: float, duration: float):
+        """Write one request which raised ``error`` instead of returning a response"""
+        self._write(dict(t=round(started - self.started, 6), d=round(duration, 6), n=node, e=endpoint, b=body,
+                         x=type(error).__name__, m=str(error)))
+        self.count += 1
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+        self._fh = None
+
+
+class RecordingClient:
+    """
+    Wraps an async HTTP client (e.g. :attr:`.Api.client`), recording each ``post`` request and its response
+    into a :class:`.CassetteWriter`. Closing this client closes the cassette.
+    """
+    def __init__(self, client, writer: CassetteWriter):
+        self.client, self.writer = client, writer
+
+    async def post(self, url, json=None, **kwargs):
+        started = time.monotonic()
+        node, endpoint = _split_url(str(url))
+        try:
+            r = await self.client.post(url, json=json, **kwargs)
+        except Exception as e:
+            self.writer.record_error(node, endpoint, json, e, started, time.monotonic() - started)
+            raise
+        self.writer.record(node, endpoint, json, r.status_code, r.text, started, time.monotonic() - started)
+        return r
+
+    async def aclose(self):
+        self.writer.close()
+        await close_client(self.client)
+
+    def __getattr__(self, item):
+        return getattr(self.client, item)
+
+
+class ReplayClient:
+    """
+    An async HTTP client which serves responses from a cassette instead of the network.
+
+    :param float speed: ``1.0`` waits for each request's recorded duration before responding, ``2.0`` half of it,
+                        and so on. ``None`` (or ``0``) responds immediately.
+    :param bool loop: When every recorded response for a request has been served, keep serving the last one
+                      (``True``), or treat further identical requests as missing (``False``).
+
+    Requests which weren't recorded get an HTTP 404 with a nodeos style ``cassette_miss_exception`` error body,
+    so :meth:`.Api._call` raises an :class:`.EOSRPCError` instead of retrying. Requests which were recorded as
+    failing (e.g. timing out) raise the same type of exception, after the recorded delay.
+    """
+    def __init__(self, path_or_items: Union[str, List[dict]], speed: Optional[float] = 1.0, loop: bool = True):
+        items = read_cassette(path_or_items)[1] if isinstance(path_or_items, str) else path_or_items
+        self.items, self.speed, self.loop = items, speed, loop
+        self.responses = defaultdict(deque)  # type: Dict[Tuple[str, str], Deque[dict]]
+        for rec in items:
+            self.responses[_body_key(rec['e'], rec.get('b'))].append(rec)
+        self.hits = self.misses = 0
+
+    def lookup(self, endpoint: str, body) -> Optional[dict]:
+        queue = self.responses.get(_body_key(endpoint, body))
+        if not queue:
+            return None
+        if len(queue) > 1 or not self.loop:
+            return queue.popleft()
+        return queue[0]
+
+    async def post(self, url, json=None, **kwargs):
+        url = str(url)
+        node, endpoint = _split_url(url)
+        rec = self.lookup(endpoint, json)
+        if rec is None:
+            self.misses += 1
+            log.warning("Cassette has no recorded response for %s %s", endpoint, json)
+            status, content = 404, _dumps(dict(code=404, message='Not Found', error=dict(
+                code=0, name='cassette_miss_exception', what='Request not found in cassette', details=[]
+            )))
+        else:
+            self.hits += 1
+            status, content = rec.get('s'), rec.get('r')
+        # Always yield to the event loop like a real request would - otherwise concurrent calls (e.g. a block range)
+        # run one after another, and each response makes the head tracking think the node is behind the next block.
+        await asyncio.sleep(rec.get('d', 0) / self.speed if rec is not None and self.speed else 0)
+        request = httpx.Request('POST', url)
+        if rec is not None and 'x' in rec:
+            raise self.make_error(rec['x'], rec.get('m', ''), request)
+        return httpx.Response(status, content=content.encode('utf-8'), request=request,
+                              headers={'Content-Type': 'application/json'})
+
+    @staticmethod
+    def make_error(name: str, message: str, request: httpx.Request) -> Exception:
+        """
+        Re-create a recorded exception from its class name - an :mod:`httpx` exception (e.g. ``ReadTimeout``) or a
+        builtin one. Anything else is raised as a :class:`ConnectionError`.
+        """
+        cls = getattr(httpx, name, None) or getattr(builtins, name, None)
+        if not isinstance(cls, type) or not issubclass(cls, Exception):
+            return ConnectionError(f'{name}: {message}')
+        try:
+            return cls(message, request=request)
+        except TypeError:
+            pass
+        try:
+            return cls(message)
+        except TypeError:
+            return ConnectionError(f'{name}: {message}')
+
+    async def aclose(self):
+        pass
+
+
+def iter_calls(items: List[dict]) -> Iterator[Tuple[float, str, Union[dict, list]]]:
+    """Yield ``(offset, endpoint, body)`` for each recorded request, in the order they were started"""
+    for rec in sorted(items, key=lambda r: r.get('t', 0)):
+        yield rec.get('t', 0), rec['e'], rec.get('b')
+
+
+async def replay_workload(api, path_or_items: Union[str, List[dict]], speed: Optional[float] = 1.0,
+                          return_exceptions: bool = True) -> list:
+    """
+    Re-issue every call recorded in a cassette through ``api`` (an :class:`.Api`, using any transport), starting
+    each call at its recorded offset divided by ``speed`` - or all at once if ``speed`` is ``None``. Returns the
+    results in the recorded order (with exceptions in place of failed calls if ``return_exceptions`` is True).
+
+    Combine with a :class:`.ReplayClient` to re-run a production workload entirely offline.
+    """
+    items = read_cassette(path_or_items)[1] if isinstance(path_or_items, str) else path_or_items
+    started = time.monotonic()
+
+    async def _one(offset, endpoint, body):
+        if speed:
+            wait = offset / speed - (time.monotonic() - started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        if isinstance(body, list):
+            return await api._call(endpoint, *body)
+        return await api._call(endpoint, **(body or {}))
+
+    return await asyncio.gather(*[_one(*c) for c in iter_calls(items)], return_exceptions=return_exceptions)
@@ -0,0 +1,413 @@
+"""
+Columnar builders which flatten block headers, transaction receipts and actions into compact, typed column
+buffers - instead of one Python object per block / transaction / action - and export them as NumPy structured
+arrays, or Arrow tables / Parquet files.
+
+NumPy and PyArrow are optional dependencies. Install them with ``pip3 install privex-eos[arrow]``
+(or ``privex-eos[columnar]`` for NumPy only).
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import json
+import logging
+from array import array
+from os.path import join
+from typing import Dict, List, Optional, AsyncIterable, Union
+
+from privex.eos.objects import block_time_ms, EOSBlock
+from privex.eos.stream import ActionFilter, stream_raw_blocks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa, pq = None, None
+
+log = logging.getLogger(__name__)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("This feature requires 'numpy'. Please install it: pip3 install privex-eos[columnar]")
+
+
+def _require_arrow():
+    _require_numpy()
+    if pa is None:
+        raise ImportError("This feature requires 'pyarrow'. Please install it: pip3 install privex-eos[arrow]")
+
+
+class NumberColumn:
+    """
+    A growable column of fixed width numbers, stored contiguously in an :class:`array.array` which is
+    preallocated to ``capacity`` items and doubled in size whenever it fills up.
+    """
+    def __init__(self, typecode: str = 'q', capacity: int = 1024):
+        self.typecode = typecode
+        self._data = array(typecode, [0]) * max(1, capacity)
+        self._len = 0
+
+    def append(self, value: int):
+        if self._len == len(self._data):
+            self._data.extend(array(self.typecode, [0]) * len(self._data))
+        self._data[self._len] = value
+        self._len += 1
+
+    @property
+    def nbytes(self) -> int:
+        return self._len * self._data.itemsize
+
+    def to_numpy(self):
+        return self.view().copy()
+
+    def view(self):
+        """
+        A read-only NumPy view of the column, sharing its buffer instead of copying it. The column can't grow while
+        a view of it exists (appending raises :class:`BufferError`), so only use views for short-lived calculations.
+        """
+        _require_numpy()
+        v = np.frombuffer(self._data, dtype=self._data.typecode, count=self._len)
+        v.flags.writeable = False
+        return v
+
+    def to_list(self) -> list:
+        return self._data[:self._len].tolist()
+
+    def __len__(self):
+        return self._len
+
+
+class DictColumn:
+    """
+    A dictionary encoded string column - each distinct string is stored once, and each row only stores the
+    integer code of its string. Ideal for low cardinality values such as producer / contract / action names.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.codes = NumberColumn('i', capacity)
+        self.values = []   # type: List[Optional[str]]
+        self._lookup = {}  # type: Dict[Optional[str], int]
+
+    def append(self, value: Optional[str]) -> int:
+        """Append ``value``, returning its integer code"""
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+        return code
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(v) for v in self.values if v is not None)
+
+    def to_numpy(self):
+        _require_numpy()
+        width = max([len(v) for v in self.values if v is not None] + [1])
+        values = np.array(['' if v is None else v for v in self.values], dtype=f'U{width}')
+        return values[self.codes.to_numpy()]
+
+    def to_arrow(self):
+        _require_arrow()
+        return pa.DictionaryArray.from_arrays(pa.array(self.codes.to_numpy()), pa.array(self.values, pa.string()))
+
+    def to_list(self) -> list:
+        return [self.values[c] for c in self.codes.to_list()]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class HashColumn:
+    """
+    A column of 256-bit hashes such as block and transaction IDs, stored as 32 raw bytes per row instead of a
+    64 character hex string. Missing / invalid hashes are stored as 32 null bytes.
+    """
+    width = 32
+
+    def __init__(self, capacity: int = 1024):
+        self._data = bytearray(self.width * max(1, capacity))
+        self._len = 0
+
+    def append(self, value: Optional[str]):
+        try:
+            raw = bytes.fromhex(value) if value else b''
+        except (TypeError, ValueError):
+            raw = b''
+        raw = raw[:self.width].ljust(self.width, b'\0')
+        offset = self._len * self.width
+        if offset == len(self._data):
+            self._data.extend(bytes(len(self._data)))
+        self._data[offset:offset + self.width] = raw
+        self._len += 1
+
+    @property
+    def nbytes(self) -> int:
+        return self._len * self.width
+
+    def to_numpy(self):
+        _require_numpy()
+        return np.frombuffer(self._data, dtype=f'V{self.width}', count=self._len).copy()
+
+    def to_arrow(self):
+        _require_arrow()
+        buf = pa.py_buffer(bytes(self._data[:self.nbytes]))
+        return pa.FixedSizeBinaryArray.from_buffers(pa.binary(self.width), self._len, [None, buf])
+
+    def to_list(self) -> list:
+        w = self.width
+        return [self._data[i * w:(i + 1) * w].hex() for i in range(self._len)]
+
+    def __len__(self):
+        return self._len
+
+
+class ObjectColumn:
+    """A plain list backed column, used for free-form values such as JSON encoded action data"""
+    def __init__(self, capacity: int = 1024):
+        self._data = []
+
+    def append(self, value):
+        self._data.append(value)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(v) for v in self._data if v is not None)
+
+    def to_numpy(self):
+        _require_numpy()
+        a = np.empty(len(self._data), dtype=object)
+        a[:] = self._data
+        return a
+
+    def to_arrow(self):
+        _require_arrow()
+        return pa.array(self._data, pa.string())
+
+    def to_list(self) -> list:
+        return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+Column = Union[NumberColumn, DictColumn, HashColumn, ObjectColumn]
+
+
+class ColumnTable:
+    """
+    A set of equal length named columns. Subclasses define :attr:`.COLUMNS` - a list of ``(name, kind)`` tuples,
+    where ``kind`` is either an :mod:`array` typecode for number columns, or one of ``dict``, ``hash``, ``object``.
+    """
+    COLUMNS = []  # type: List[tuple]
+
+    def __init__(self, capacity: int = 1024):
+        self.columns = {}  # type: Dict[str, Column]
+        for name, kind in self.COLUMNS:
+            if kind == 'dict':
+                col = DictColumn(capacity)
+            elif kind == 'hash':
+                col = HashColumn(capacity)
+            elif kind == 'object':
+                col = ObjectColumn(capacity)
+            else:
+                col = NumberColumn(kind, capacity)
+            self.columns[name] = col
+
+    def append(self, *values):
+        for col, v in zip(self.columns.values(), values):
+            col.append(v)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate number of bytes used by the data held in this table's columns"""
+        return sum(c.nbytes for c in self.columns.values())
+
+    def to_numpy(self):
+        """Export this table as a NumPy structured array (one field per column)"""
+        _require_numpy()
+        arrays = {name: col.to_numpy() for name, col in self.columns.items()}
+        out = np.empty(len(self), dtype=[(name, a.dtype) for name, a in arrays.items()])
+        for name, a in arrays.items():
+            out[name] = a
+        return out
+
+    def to_arrow(self):
+        """Export this table as a :class:`pyarrow.Table`"""
+        _require_arrow()
+        cols = {}
+        for name, col in self.columns.items():
+            if isinstance(col, NumberColumn):
+                a = col.to_numpy()
+                cols[name] = pa.array(a.view('datetime64[ms]') if name.endswith('_ms') else a)
+            else:
+                cols[name] = col.to_arrow()
+        return pa.table(cols)
+
+    def to_dict(self) -> Dict[str, list]:
+        """Export this table as a plain dictionary mapping column names to lists, e.g. for a DataFrame"""
+        return {name: col.to_list() for name, col in self.columns.items()}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+
+class BlockTable(ColumnTable):
+    COLUMNS = [
+        ('block_num', 'q'), ('timestamp_ms', 'q'), ('producer', 'dict'), ('id', 'hash'), ('previous', 'hash'),
+        ('confirmed', 'i'), ('schedule_version', 'i'), ('tx_count', 'i'),
+    ]
+
+
+class TransactionTable(ColumnTable):
+    COLUMNS = [
+        ('block_num', 'q'), ('trx_index', 'i'), ('id', 'hash'), ('status', 'dict'), ('cpu_usage_us', 'q'),
+        ('net_usage_words', 'q'), ('action_count', 'i'),
+    ]
+
+
+class ActionTable(ColumnTable):
+    COLUMNS = [
+        ('block_num', 'q'), ('trx_index', 'i'), ('action_index', 'i'), ('account', 'dict'), ('name', 'dict'),
+        ('actor', 'dict'), ('permission', 'dict'), ('data', 'object'),
+    ]
+
+
+class ColumnarBuilder:
+    """
+    Builds block header, transaction receipt and action columns directly from raw block dictionaries
+    (see :meth:`.Api.get_block_raw` / :meth:`.Api.stream_blocks`), without constructing :class:`.EOSBlock` objects.
+
+    Build from a block range::
+
+        >>> cb = await ColumnarBuilder.from_range(Api(), 94000000, 94001000)
+        >>> blocks = cb.blocks.to_numpy()
+        >>> blocks['producer'][:2]
+        array(['eoshuobipool', 'eoshuobipool'], dtype='<U12')
+        >>> df = pandas.DataFrame(cb.actions.to_numpy())
+        >>> cb.write_parquet('/tmp/eos_export')
+
+    Or feed it blocks manually::
+
+        >>> cb = ColumnarBuilder(action_filter=ActionFilter(contracts='eosio.token'))
+        >>> async for b in api.stream_blocks(94000000, 94001000, raw=True):
+        ...     cb.add_block(b)
+
+    :ivar BlockTable blocks: One row per block
+    :ivar TransactionTable transactions: One row per transaction receipt
+    :ivar ActionTable actions: One row per action (only those matching :attr:`.action_filter`, if set)
+    """
+    def __init__(self, capacity: int = 1024, action_filter: ActionFilter = None, action_data: bool = False):
+        """
+        :param int capacity: Number of rows to preallocate in each block column (columns grow automatically)
+        :param ActionFilter action_filter: Only store actions matching this filter in :attr:`.actions`
+        :param bool action_data: If ``True``, store each action's ``data`` as a JSON string in the ``data`` column.
+                                 Otherwise, the ``data`` column is ``None`` for every row.
+        """
+        self.blocks = BlockTable(capacity)
+        self.transactions = TransactionTable(capacity * 4)
+        self.actions = ActionTable(capacity * 4)
+        self.action_filter = None if action_filter is None or action_filter.is_empty else action_filter
+        self.action_data = action_data
+
+    def add_block(self, block: Union[dict, EOSBlock]):
+        """Append a raw block dictionary (or an :class:`.EOSBlock`) to the columns"""
+        if isinstance(block, EOSBlock):
+            block = dict(block)
+        block_num = block['block_num']
+        txs = block.get('transactions', [])
+        self.blocks.append(
+            block_num, block_time_ms(block['timestamp']), block.get('producer'), block.get('id'),
+            block.get('previous'), block.get('confirmed') or 0, block.get('schedule_version') or 0, len(txs)
+        )
+        flt, act_table, with_data = self.action_filter, self.actions, self.action_data
+
+        for trx_index, tx in enumerate(txs):
+            trx = tx.get('trx')
+            actions = []
+            if isinstance(trx, dict):
+                trx_id = trx.get('id')
+                transaction = trx.get('transaction')
+                if isinstance(transaction, dict):
+                    actions = transaction.get('actions', [])
+            else:
+                trx_id = trx
+            self.transactions.append(
+                block_num, trx_index, trx_id, tx.get('status'), tx.get('cpu_usage_us') or 0,
+                tx.get('net_usage_words') or 0, len(actions)
+            )
+            for action_index, act in enumerate(actions):
+                if flt is not None and not flt.matches(act):
+                    continue
+                auth = act.get('authorization') or [{}]
+                act_table.append(
+                    block_num, trx_index, action_index, act.get('account'), act.get('name'),
+                    auth[0].get('actor'), auth[0].get('permission'),
+                    json.dumps(act.get('data')) if with_data else None
+                )
+
+    async def add_stream(self, blocks: AsyncIterable[Union[dict, EOSBlock]]) -> int:
+        """Append every block from the async iterable ``blocks``. Returns the number of blocks added."""
+        count = 0
+        async for b in blocks:
+            self.add_block(b)
+            count += 1
+        return count
+
+    @classmethod
+    async def from_range(cls, api, start: int, end: int, concurrency: int = 20, **kwargs) -> "ColumnarBuilder":
+        """
+        Stream the raw blocks ``start`` to ``end`` (inclusive) from ``api`` straight into a new
+        :class:`.ColumnarBuilder` (``kwargs`` are passed to the constructor).
+        """
+        cb = cls(**kwargs)
+        await cb.add_stream(stream_raw_blocks(api, start, end, concurrency=concurrency))
+        return cb
+
+    @property
+    def tables(self) -> Dict[str, ColumnTable]:
+        return dict(blocks=self.blocks, transactions=self.transactions, actions=self.actions)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.nbytes for t in self.tables.values())
+
+    def to_numpy(self) -> dict:
+        """Returns a dict mapping ``blocks``, ``transactions`` and ``actions`` to NumPy structured arrays"""
+        return {k: t.to_numpy() for k, t in self.tables.items()}
+
+    def to_arrow(self) -> dict:
+        """Returns a dict mapping ``blocks``, ``transactions`` and ``actions`` to :class:`pyarrow.Table`'s"""
+        return {k: t.to_arrow() for k, t in self.tables.items()}
+
+    def write_parquet(self, folder: str, **kwargs) -> List[str]:
+        """
+        Write each table to ``{folder}/{table}.parquet`` (``kwargs`` are passed to :func:`pyarrow.parquet.write_table`).
+        Returns the list of files written.
+        """
+        _require_arrow()
+        files = []
+        for k, t in self.to_arrow().items():
+            path = join(folder, f'{k}.parquet')
+            pq.write_table(t, path, **kwargs)
+            files.append(path)
+        return files
@@ -0,0 +1,64 @@
+"""
+Exceptions raised by Privex's EOS library.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+from typing import Optional
+
+
+class EOSException(Exception):
+    """Base class for all exceptions raised by :mod:`privex.eos`"""
+    pass
+
+
+class EOSRPCError(EOSException):
+    """
+    Raised when an RPC node responds with a nodeos error body, e.g. when requesting an account which doesn't exist.
+
+    These errors are caused by the request rather than the node, so they're raised straight away instead of
+    marking the node as failed and retrying the call on another node.
+    """
+    def __init__(self, message: str, status: int = None, code: int = None, name: str = None, what: str = None,
+                 details: list = None, response: Optional[dict] = None):
+        super().__init__(message)
+        self.message, self.status, self.code = message, status, code
+        self.name, self.what, self.details, self.response = name, what, [] if details is None else details, response
+
+    @classmethod
+    def from_response(cls, status: int, res: dict) -> Optional["EOSRPCError"]:
+        """
+        Create an :class:`.EOSRPCError` from a decoded nodeos error response, or return ``None`` if ``res``
+        doesn't look like a nodeos error (e.g. a plain proxy error page).
+        """
+        if not isinstance(res, dict) or not isinstance(res.get('error'), dict):
+            return None
+        err = res['error']
+        details = err.get('details') or []
+        detail_msg = '; '.join(d.get('message', '') for d in details if isinstance(d, dict))
+        what = err.get('what')
+        msg = f"{err.get('name')} ({err.get('code')}): {what}" + (f" - {detail_msg}" if detail_msg else '')
+        return cls(msg, status=status, code=err.get('code'), name=err.get('name'), what=what, details=details,
+                   response=res)
+
+
+class PaginationError(EOSException):
+    """
+    Raised by :func:`.paginate` when a node says there are more table rows, but the position of the next page
+    can't be worked out - or requesting it wouldn't return any new rows.
+    """
+    pass
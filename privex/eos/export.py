@@ -0,0 +1,361 @@
+"""
+Streaming export of blocks (or any JSON records) to rotating, gzip compressed, newline-delimited JSON files,
+plus a reader which can seek straight to a block number using each segment's index file.
+
+Each segment ``{prefix}-{seq}.ndjson.gz`` is written as a series of independent gzip members (one per chunk of
+records), so the file can still be read as a whole by ``zcat`` / :func:`gzip.open`, while the segment's
+``{prefix}-{seq}.idx`` file records the byte offset and key range of every member, allowing a reader to jump
+directly to the chunk holding a given block.
+
+Index files are plain tab separated text, one line per chunk::
+
+    first_key    last_key    byte_offset    byte_length    record_count    keys
+
+``keys`` holds the key of each record in the chunk, comma separated (``-`` for records without a key), or ``=``
+if they're simply ``first_key``, ``first_key + 1`` ... ``last_key`` in order (e.g. a run of blocks).
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+from os.path import join
+from typing import Optional, Union, List, AsyncIterable, Iterator, Tuple
+
+from privex.eos.objects import EOSBlock
+
+log = logging.getLogger(__name__)
+
+
+def _dumps(record) -> bytes:
+    return json.dumps(record, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _compress_chunk(lines: List[bytes], compresslevel: int) -> bytes:
+    return gzip.compress(b'\n'.join(lines) + b'\n', compresslevel=compresslevel, mtime=0)
+
+
+class IndexEntry(tuple):
+    """A single line from a segment index: ``(first_key, last_key, offset, length, count, keys)``"""
+    @property
+    def first_key(self) -> Optional[int]: return self[0]
+
+    @property
+    def last_key(self) -> Optional[int]: return self[1]
+
+    @property
+    def offset(self) -> int: return self[2]
+
+    @property
+    def length(self) -> int: return self[3]
+
+    @property
+    def count(self) -> int: return self[4]
+
+    @property
+    def keys(self) -> List[Optional[int]]:
+        """The key of each record in the chunk"""
+        return self[5]
+
+
+def _key_str(k: Optional[int]) -> str:
+    return '-' if k is None else str(k)
+
+
+def _key_int(k: str) -> Optional[int]:
+    return None if k == '-' else int(k)
+
+
+def _keys_str(keys: List[Optional[int]], first: Optional[int]) -> str:
+    if first is not None and keys == list(range(first, first + len(keys))):
+        return '='
+    return ','.join(_key_str(k) for k in keys)
+
+
+def _keys_list(k: str, first: Optional[int], count: int) -> List[Optional[int]]:
+    if k == '=':
+        return list(range(first, first + count))
+    return [_key_int(x) for x in k.split(',')]
+
+
+def read_index(path: str) -> List[IndexEntry]:
+    """
+    Load the entries from the segment index file ``path``
+
+    :raises ValueError: When a line of the index doesn't have all six columns
+    """
+    entries = []
+    with open(path, 'r') as fh:
+        for n, line in enumerate(fh, 1):
+            parts = line.split()
+            if len(parts) == 0:
+                continue
+            if len(parts) != 6:
+                raise ValueError(f"Line {n} of the index file {path} has {len(parts)} columns - expected 6")
+            first, count = _key_int(parts[0]), int(parts[4])
+            keys = _keys_list(parts[5], first, count)
+            entries.append(IndexEntry((first, _key_int(parts[1]), int(parts[2]), int(parts[3]), count, keys)))
+    return entries
+
+
+class NDJSONSink:
+    """
+    Writes JSON records to gzip compressed NDJSON segment files inside ``folder``, rotating to a new segment
+    once a segment holds ``rotate_records`` records, or its compressed size reaches ``rotate_bytes`` (rotation
+    happens on chunk boundaries, so segments may overshoot by up to one chunk).
+
+    Only one chunk of ``chunk_records`` encoded records is held in memory at a time, regardless of how many
+    records are written.
+
+    Archive a block range without holding it in memory::
+
+        >>> with NDJSONSink('/data/eos', prefix='blocks', rotate_records=100000) as sink:
+        ...     await sink.write_stream(api.stream_blocks(94000000, 95000000, raw=True))
+
+    Or write records manually::
+
+        >>> sink = NDJSONSink('/data/eos')
+        >>> sink.write_block(await api.get_block_raw(94000000))
+        >>> sink.close()
+
+    """
+    def __init__(self, folder: str, prefix: str = 'blocks', rotate_records: int = 100000,
+                 rotate_bytes: int = 256 * 1024 * 1024, chunk_records: int = 100, compresslevel: int = 3,
+                 normalise: bool = False, start_segment: int = None):
+        """
+        :param str folder: The folder to write segment and index files into (created if it doesn't exist)
+        :param str prefix: File name prefix for segments, e.g. ``blocks`` -> ``blocks-000001.ndjson.gz``
+        :param int rotate_records: Start a new segment after this many records
+        :param int rotate_bytes: Start a new segment once the current one reaches this many compressed bytes
+        :param int chunk_records: Number of records per gzip member / index entry. Smaller chunks allow faster
+                                  seeking, larger chunks compress better.
+        :param int compresslevel: gzip compression level from ``1`` (fastest) to ``9`` (smallest)
+        :param bool normalise: If ``True``, blocks passed to :meth:`.write_block` are converted into an
+                               :class:`.EOSBlock` and back, so that every record has the same set of keys.
+        :param int start_segment: The sequence number of the first segment to write. By default, writing continues
+                                  after the highest numbered segment already in ``folder``.
+        """
+        self.folder, self.prefix = folder, prefix
+        self.rotate_records, self.rotate_bytes = int(rotate_records), int(rotate_bytes)
+        self.chunk_records, self.compresslevel = max(1, int(chunk_records)), int(compresslevel)
+        self.normalise = normalise
+        os.makedirs(folder, exist_ok=True)
+        if start_segment is None:
+            segs = list_segments(folder, prefix)
+            start_segment = (segment_number(segs[-1]) + 1) if len(segs) > 0 else 1
+        self.segment = int(start_segment) - 1
+        self.records_written = 0
+        self._fh = self._idx = None
+        self._seg_records = self._seg_bytes = 0
+        self._lines = []             # type: List[bytes]
+        self._keys = []              # type: List[Optional[int]]
+
+    def segment_path(self, seq: int = None) -> str:
+        return segment_path(self.folder, self.prefix, self.segment if seq is None else seq)
+
+    def _open_segment(self):
+        self.segment += 1
+        path = self.segment_path()
+        log.debug("Opening new NDJSON segment: %s", path)
+        self._fh = open(path, 'wb')
+        self._idx = open(index_path(path), 'w')
+        self._seg_records = self._seg_bytes = 0
+
+    def _take_chunk(self) -> Tuple[List[bytes], List[Optional[int]]]:
+        lines, keys = self._lines, self._keys
+        self._lines, self._keys = [], []
+        return lines, keys
+
+    def _write_compressed(self, data: bytes, keys: List[Optional[int]]):
+        if self._fh is None:
+            self._open_segment()
+        offset = self._seg_bytes
+        real_keys = [k for k in keys if k is not None]
+        first, last = (min(real_keys), max(real_keys)) if len(real_keys) > 0 else (None, None)
+        self._fh.write(data)
+        self._idx.write(f'{_key_str(first)}\t{_key_str(last)}\t{offset}\t{len(data)}\t{len(keys)}\t'
+                        f'{_keys_str(keys, first)}\n')
+        self._seg_bytes += len(data)
+        self._seg_records += len(keys)
+        self.records_written += len(keys)
+        if self._seg_records >= self.rotate_records or self._seg_bytes >= self.rotate_bytes:
+            self._close_segment()
+
+    def _close_segment(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._idx.close()
+        self._fh = self._idx = None
+
+    def _add(self, record, key: Optional[int]) -> bool:
+        """Buffer ``record``, returning ``True`` if the current chunk is now full and should be written"""
+        self._lines.append(_dumps(record))
+        self._keys.append(key)
+        return len(self._lines) >= self.chunk_records
+
+    def write(self, record: Union[dict, list], key: int = None):
+        """Write a single JSON serializable record. ``key`` (e.g. the block number) is recorded in the index."""
+        if self._add(record, key):
+            self.flush()
+
+    def _block_record(self, block: Union[dict, EOSBlock]) -> dict:
+        if isinstance(block, EOSBlock):
+            return dict(block)
+        if self.normalise:
+            return dict(EOSBlock.from_dict(block))
+        return block
+
+    def write_block(self, block: Union[dict, EOSBlock]):
+        """Write a raw block dictionary or :class:`.EOSBlock`, indexed by its block number"""
+        self.write(self._block_record(block), key=block['block_num'])
+
+    def flush(self):
+        """Compress and write out any buffered records as a chunk"""
+        if len(self._lines) == 0:
+            return
+        lines, keys = self._take_chunk()
+        self._write_compressed(_compress_chunk(lines, self.compresslevel), keys)
+        if self._fh is not None:
+            self._fh.flush()
+
+    def rotate(self):
+        """Flush any buffered records, and close the current segment so the next write starts a new one"""
+        self.flush()
+        self._close_segment()
+
+    def close(self):
+        self.rotate()
+
+    async def write_stream(self, records: AsyncIterable[Union[dict, EOSBlock]], blocks: bool = True) -> int:
+        """
+        Write every record from the async iterable ``records`` (e.g. :meth:`.Api.stream_blocks`). Chunks are
+        compressed in a thread pool executor while the next chunk is being collected, so compression doesn't
+        stall the event loop (and the requests feeding ``records``).
+
+        :param records: An async iterable of raw block dicts / :class:`.EOSBlock`'s (or other records)
+        :param bool blocks: If ``True`` (default), treat each record as a block (see :meth:`.write_block`).
+                            If ``False``, records are written as-is without an index key.
+        :return int count: The number of records written
+        """
+        loop = asyncio.get_event_loop()
+        pending = None
+        count = 0
+        async for r in records:
+            if blocks:
+                full = self._add(self._block_record(r), r['block_num'])
+            else:
+                full = self._add(r, None)
+            count += 1
+            if not full:
+                continue
+            lines, keys = self._take_chunk()
+            if pending is not None:
+                self._write_compressed(*(await pending))
+            pending = loop.run_in_executor(None, self._compress_with_keys, lines, keys)
+        if pending is not None:
+            self._write_compressed(*(await pending))
+        self.flush()
+        return count
+
+    def _compress_with_keys(self, lines, keys):
+        return _compress_chunk(lines, self.compresslevel), keys
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def segment_path(folder: str, prefix: str, seq: int) -> str:
+    return join(folder, f'{prefix}-{int(seq):06d}.ndjson.gz')
+
+
+def index_path(seg_path: str) -> str:
+    return seg_path[:-len('.ndjson.gz')] + '.idx'
+
+
+def segment_number(seg_path: str) -> int:
+    return int(os.path.basename(seg_path)[:-len('.ndjson.gz')].rsplit('-', 1)[-1])
+
+
+def list_segments(folder: str, prefix: str = 'blocks') -> List[str]:
+    """List the segment files for ``prefix`` in ``folder``, ordered by their sequence number"""
+    return sorted(glob.glob(join(folder, f'{glob.escape(prefix)}-*.ndjson.gz')), key=segment_number)
+
+
+class NDJSONReader:
+    """
+    Reads records back from the segments written by :class:`.NDJSONSink`, using the index files to skip straight
+    to the chunk containing ``start`` - only one chunk is decompressed into memory at a time.
+
+        >>> reader = NDJSONReader('/data/eos', prefix='blocks')
+        >>> for block in reader.read(94500000, 94500100):
+        ...     print(block['block_num'], block['producer'])
+        >>> reader.get(94500000)['producer']
+        'eoshuobipool'
+
+    """
+    def __init__(self, folder: str, prefix: str = 'blocks'):
+        self.folder, self.prefix = folder, prefix
+
+    @property
+    def segments(self) -> List[str]:
+        return list_segments(self.folder, self.prefix)
+
+    def _chunks(self, start: int = None, end: int = None) -> Iterator[Tuple[str, IndexEntry]]:
+        for seg in self.segments:
+            for e in read_index(index_path(seg)):
+                if start is not None and e.last_key is not None and e.last_key < start:
+                    continue
+                if end is not None and e.first_key is not None and e.first_key > end:
+                    continue
+                yield seg, e
+
+    def read(self, start: int = None, end: int = None) -> Iterator[dict]:
+        """
+        Yield the records with keys between ``start`` and ``end`` (inclusive), using the key each record was
+        written with. If both are ``None``, every record is yielded, including records without a key.
+        """
+        ranged = start is not None or end is not None
+        fh, fh_path = None, None
+        try:
+            for seg, e in self._chunks(start, end):
+                if fh_path != seg:
+                    if fh is not None:
+                        fh.close()
+                    fh, fh_path = open(seg, 'rb'), seg
+                fh.seek(e.offset)
+                lines = [line for line in gzip.decompress(fh.read(e.length)).splitlines() if len(line) > 0]
+                for key, line in zip(e.keys, lines):
+                    if ranged and (key is None or (start is not None and key < start)
+                                   or (end is not None and key > end)):
+                        continue
+                    yield json.loads(line)
+        finally:
+            if fh is not None:
+                fh.close()
+
+    def get(self, key: int) -> Optional[dict]:
+        """Returns the block / record stored under ``key``, or ``None`` if it isn't found"""
+        for rec in self.read(key, key):
+            return rec
+        return None
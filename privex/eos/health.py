@@ -0,0 +1,215 @@
+"""
+Background health probing of RPC nodes. :class:`.NodeProber` periodically calls ``get_info`` on every node in
+the node database, recording each node's latency, head block and LIB in the ``node_health`` table - which
+:class:`.NodeManager` uses to stop routing requests to nodes which are lagging behind the chain head.
+
+As the results are stored in the node database, every process sharing the database benefits from a single prober.
+
+    >>> prober = NodeProber(NodeManager(network='eos'), interval=10)
+    >>> prober.start()
+    >>> await prober.probe_all()
+    [NodeHealth(node_id=1, head_block_num=94000012, last_irreversible_block_num=93999682, latency_ms=84.2, ...), ...]
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import functools
+import logging
+import ssl
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from privex.eos.cache import BLOCK_INTERVAL
+from privex.eos.node import NodeManager
+from privex.eos.objects import Node, NodeHealth
+
+log = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def default_ssl_context() -> Optional[ssl.SSLContext]:
+    """
+    The SSL context shared by every client from :func:`.async_client`. Loading the CA bundle takes ~45ms, which
+    is most of the time it takes to create an :class:`.Api`, so it's only done once per process. Returns ``None``
+    on httpx releases which can't create one (each client then loads its own).
+    """
+    create = getattr(httpx, 'create_ssl_context', None)
+    return None if create is None else create()
+
+
+def async_client(**kwargs):
+    """
+    Create an async HTTP client. Older httpx releases only have ``Client`` (which is async), while newer
+    releases have a separate ``AsyncClient``.
+
+    Unless ``verify`` (or ``http2``, which needs its own ALPN settings) is passed, the client uses the shared
+    :func:`.default_ssl_context`.
+    """
+    if 'verify' not in kwargs and not kwargs.get('http2'):
+        ctx = default_ssl_context()
+        if ctx is not None:
+            kwargs['verify'] = ctx
+    return getattr(httpx, 'AsyncClient', httpx.Client)(**kwargs)
+
+
+async def close_client(client):
+    """Close an HTTP client created by :func:`.async_client` (``aclose`` on newer httpx, ``close`` on older)"""
+    close = getattr(client, 'aclose', None) or client.close
+    res = close()
+    if asyncio.iscoroutine(res):
+        await res
+
+
+class NodeProber:
+    """
+    Probes every node on the node manager's network with ``get_info``, storing the results via
+    :meth:`.NodeManager.record_health`.
+    """
+    def __init__(self, node_manager: NodeManager, client=None, interval: float = 10.0, timeout: float = 5.0,
+                 concurrency: int = 10, endpoint: str = '/v1/chain/get_info'):
+        """
+        :param NodeManager node_manager: The node manager whose nodes should be probed
+        :param client: An async HTTP client (e.g. :attr:`.Api.client`). A new one is created if not specified.
+        :param float interval: Seconds between each round of probes when running in the background
+        :param float timeout: Seconds to wait for each node to respond before recording it as failed
+        :param int concurrency: Maximum number of nodes to probe at once
+        :param str endpoint: The ``get_info`` endpoint to call
+        """
+        self.node_manager, self.interval, self.timeout = node_manager, float(interval), float(timeout)
+        self.client = async_client(timeout=timeout) if client is None else client
+        self.concurrency, self.endpoint = max(1, int(concurrency)), endpoint
+        self._task = None  # type: Optional[asyncio.Task]
+
+    async def _get_info(self, node: Node) -> dict:
+        url = node.url.strip().strip('/') + self.endpoint
+        r = await self.client.post(url, json={}, headers={'Content-Type': 'application/json'})
+        r.raise_for_status()
+        return r.json()
+
+    async def probe_node(self, node: Node) -> NodeHealth:
+        """Call ``get_info`` on ``node``, record the result in the node database, and return it"""
+        started = time.monotonic()
+        try:
+            info = await asyncio.wait_for(self._get_info(node), self.timeout)
+            health = NodeHealth(
+                node_id=node.id, head_block_num=int(info['head_block_num']),
+                last_irreversible_block_num=int(info['last_irreversible_block_num']),
+                latency_ms=round((time.monotonic() - started) * 1000, 3),
+            )
+        except Exception as e:
+            log.info("Health probe of node %s failed: %s %s", node.url, type(e).__name__, str(e))
+            health = NodeHealth(
+                node_id=node.id, latency_ms=round((time.monotonic() - started) * 1000, 3),
+                error=f'{type(e).__name__}: {e}'
+            )
+        self.node_manager.record_health(
+            node.id, head_block_num=health.head_block_num, error=health.error, latency_ms=health.latency_ms,
+            last_irreversible_block_num=health.last_irreversible_block_num,
+        )
+        return health
+
+    async def probe_all(self) -> List[NodeHealth]:
+        """Probe every enabled node on the node manager's network (up to ``concurrency`` at once)"""
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def _probe(n):
+            async with sem:
+                return await self.probe_node(n)
+
+        nodes = [n for n in self.node_manager.get_nodes() if n.enabled]
+        return list(await asyncio.gather(*[_probe(n) for n in nodes]))
+
+    async def run(self):
+        """Probe all nodes every :attr:`.interval` seconds, forever"""
+        while True:
+            try:
+                await self.probe_all()
+            except Exception:
+                log.exception("Unexpected error while probing nodes")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """Start probing nodes in the background (see :meth:`.run`)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """Stop the background task started by :meth:`.start`"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+class NodeHeads:
+    """
+    Tracks the last known head block of each node - from this process's own responses (e.g. a node which served
+    block ``n`` has a head of at least ``n``), combined with the shared :class:`.NodeProber` results - and
+    estimates each node's current head by assuming it has kept up with the 0.5 second block interval since.
+
+    Used by :meth:`.Api._call` to route requests for recent blocks only to nodes which should already have them.
+    """
+    def __init__(self, block_interval: float = BLOCK_INTERVAL):
+        self.block_interval = float(block_interval)
+        self._heads = {}  # type: Dict[str, Tuple[int, float]]
+
+    def observe(self, url: str, head: int):
+        """Record that the node ``url`` has (at least) the head block ``head``"""
+        current = self._estimate_mem(url)
+        if current is None or head >= current:
+            self._heads[url] = (int(head), time.monotonic())
+
+    def observe_block(self, url: str, block_num: int):
+        """
+        Record that the node ``url`` served the block ``block_num``. That's only a lower bound for its head, so it
+        raises an estimate which is already known, but doesn't create one - otherwise the node would look like it's
+        behind for every later block of a range.
+        """
+        current = self._estimate_mem(url)
+        if current is not None and block_num > current:
+            self._heads[url] = (int(block_num), time.monotonic())
+
+    def mark_missing(self, url: str, block_num: int):
+        """Record that the node ``url`` doesn't have the block ``block_num`` yet"""
+        self._heads[url] = (int(block_num) - 1, time.monotonic())
+
+    def _estimate_mem(self, url: str) -> Optional[int]:
+        h = self._heads.get(url)
+        if h is None:
+            return None
+        return h[0] + int((time.monotonic() - h[1]) / self.block_interval)
+
+    def estimate(self, node: Node, health: Dict[int, NodeHealth] = None) -> Optional[int]:
+        """
+        The estimated current head of ``node``, from whichever was observed most recently - this process's own
+        responses, or the node's probe result in ``health``. ``None`` if nothing is known about the node.
+        """
+        h = None if health is None else health.get(node.id)
+        mem = self._heads.get(node.url)
+        if h is not None and h.ok and h.checked_at is not None:
+            probe_age = (datetime.utcnow() - h.checked_at.replace(tzinfo=None)).total_seconds()
+            if mem is None or probe_age < time.monotonic() - mem[1]:
+                return h.head_block_num + int(max(0.0, probe_age) / self.block_interval)
+        return self._estimate_mem(node.url)
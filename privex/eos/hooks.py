@@ -0,0 +1,143 @@
+"""
+Request lifecycle hooks, for attaching tracing / profiling to :class:`.Api` without patching :meth:`.Api._call`.
+
+Subclass :class:`.RequestHook`, override the events you're interested in, and attach it to an :class:`.Api`::
+
+    >>> class SpanHook(RequestHook):
+    ...     def on_decode(self, event: RequestEvent):
+    ...         tracer.record(event.endpoint, node=event.node, queue=event.queue_time,
+    ...                       network=event.network_time, decode=event.decode_time)
+    >>> eos = Api(hooks=[SpanHook(), SlowCallLogger(threshold=2.0)])
+    >>> eos.add_hook(MyOtherHook())
+
+Each HTTP request made by :meth:`.Api._call` creates one :class:`.RequestEvent`, which is passed to each event
+in turn as it's filled in:
+
+    - ``on_request_start`` - a node has been picked, and the request is about to be sent
+    - ``on_response`` - the HTTP response was received (``status``, ``response_size`` and ``network_time`` are set)
+    - ``on_decode`` - the response JSON was decoded successfully (``decode_time`` is set)
+    - ``on_failover`` - the request failed (``error`` is set), and the node has been marked as failed
+    - ``on_retry`` - the call is about to be retried (with a new event, on the next node picked)
+
+When no hooks are attached, no events are created - the only cost is an ``if`` check per stage.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import logging
+from typing import List, Optional
+
+import attr
+
+log = logging.getLogger(__name__)
+
+
+@attr.s(slots=True)
+class RequestEvent:
+    """
+    The state of a single HTTP request made by :meth:`.Api._call`. Times are in seconds.
+
+    ``queue_time`` is the time between the call starting and the request being sent (picking a node, waiting for
+    a node to become available, request jitter, and waiting in the :class:`.RequestScheduler` queue),
+    ``network_time`` is the time spent waiting for the HTTP response, and ``decode_time`` is the time spent
+    decoding the response JSON.
+    """
+    endpoint = attr.ib(type=str)
+    node = attr.ib(type=str, default=None)
+    attempt = attr.ib(type=int, default=0)
+    """The retry number - ``0`` for the first attempt"""
+    request_size = attr.ib(type=int, default=0)
+    """Size of the JSON request body in bytes"""
+    response_size = attr.ib(type=int, default=None)
+    """Size of the response body in bytes, once received"""
+    status = attr.ib(type=int, default=None)
+    error = attr.ib(type=BaseException, default=None)
+    queued_at = attr.ib(type=float, default=0.0)
+    """:func:`time.perf_counter` value when the call started"""
+    queue_time = attr.ib(type=float, default=0.0)
+    network_time = attr.ib(type=float, default=0.0)
+    decode_time = attr.ib(type=float, default=0.0)
+    priority = attr.ib(type=str, default=None)
+    """The :class:`.RequestScheduler` priority class of the call, if the Api has a scheduler"""
+
+    @property
+    def total_time(self) -> float:
+        return self.queue_time + self.network_time + self.decode_time
+
+
+class RequestHook:
+    """Base class for request hooks. Every event is a no-op by default - override the ones you need."""
+    def on_request_start(self, event: RequestEvent):
+        pass
+
+    def on_response(self, event: RequestEvent):
+        pass
+
+    def on_decode(self, event: RequestEvent):
+        pass
+
+    def on_retry(self, event: RequestEvent):
+        pass
+
+    def on_failover(self, event: RequestEvent):
+        pass
+
+
+class SlowCallLogger(RequestHook):
+    """Log a warning for each request which took longer than ``threshold`` seconds (from the call starting)"""
+    def __init__(self, threshold: float = 1.0, logger: logging.Logger = None):
+        self.threshold = float(threshold)
+        self.log = log if logger is None else logger
+
+    def on_decode(self, event: RequestEvent):
+        if event.total_time >= self.threshold:
+            self.log.warning(
+                "Slow call to %s%s: %.3fs (queue: %.3fs / network: %.3fs / decode: %.3fs, %s bytes)",
+                event.node, event.endpoint, event.total_time, event.queue_time, event.network_time,
+                event.decode_time, event.response_size
+            )
+
+
+class EventRecorder(RequestHook):
+    """
+    Keeps the events passed to each hook in :attr:`.events` as ``(hook_name, event)`` tuples (the most recent
+    ``max_events``). Mainly useful for tests and debugging.
+    """
+    def __init__(self, max_events: int = 10000):
+        self.max_events = int(max_events)
+        self.events = []  # type: List[tuple]
+
+    def _add(self, name: str, event: RequestEvent):
+        self.events.append((name, event))
+        if len(self.events) > self.max_events:
+            del self.events[0]
+
+    def names(self) -> List[str]:
+        return [n for n, _ in self.events]
+
+    def last(self, name: str) -> Optional[RequestEvent]:
+        return next((e for n, e in reversed(self.events) if n == name), None)
+
+    def on_request_start(self, event): self._add('on_request_start', event)
+
+    def on_response(self, event): self._add('on_response', event)
+
+    def on_decode(self, event): self._add('on_decode', event)
+
+    def on_retry(self, event): self._add('on_retry', event)
+
+    def on_failover(self, event): self._add('on_failover', event)
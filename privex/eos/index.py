@@ -0,0 +1,363 @@
+"""
+Local indexes of block data, stored in SQLite via :class:`.IndexAdapter`, which are filled in while blocks are
+imported - allowing lookups such as "every action touching account X" without a history node, and without
+re-scanning block ranges.
+
+Attach an index to an :class:`.Api` instance, and every block it loads will be ingested::
+
+    >>> from privex.eos import Api
+    >>> from privex.eos.index import ActionIndex
+    >>> eos = Api()
+    >>> idx = eos.add_index(ActionIndex())
+    >>> blocks = await eos.get_block_range(94000000, 94010000)
+    >>> idx.find_blocks(account='someguy12333')
+    [94000412, 94003178]
+    >>> actions = await eos.get_indexed_actions(idx, account='someguy12333', contract='eosio.token')
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import logging
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from privex.eos.adapters import IndexAdapter, BaseAdapter
+from privex.eos.objects import EOSBlock, block_time_ms
+from privex.eos.stream import ActionFilter
+
+log = logging.getLogger(__name__)
+
+
+class ActionRef(NamedTuple):
+    """The position of an indexed action within the chain"""
+    block_num: int
+    trx_index: int
+    action_index: int
+    contract: str
+    name: str
+
+
+class BlockIndex(ABC):
+    """
+    Base class for local block indexes. Blocks are passed to :meth:`.ingest_block` as they're loaded, and are
+    buffered until ``batch_size`` rows are pending, at which point :meth:`.flush` writes them out in a single
+    transaction.
+    """
+    def __init__(self, adapter: Union[BaseAdapter, IndexAdapter] = None, batch_size: int = 5000):
+        self.adapter = IndexAdapter() if adapter is None else adapter
+        self.batch_size = int(batch_size)
+
+    @abstractmethod
+    def ingest_block(self, block: Union[dict, EOSBlock]):
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def pending(self) -> int:
+        """Number of rows buffered, waiting to be written by :meth:`.flush`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _write(self, cursor):
+        """Write all buffered rows using ``cursor``, then clear the buffers"""
+        raise NotImplementedError
+
+    def flush(self) -> int:
+        """Write all buffered rows to the database in a single transaction. Returns the number of rows flushed."""
+        count = self.pending
+        if count == 0:
+            return 0
+        c = self.adapter.conn.cursor()
+        self.adapter.begin_transaction(c)
+        try:
+            self._write(c)
+            self.adapter.commit_transaction(c)
+        except Exception:
+            log.exception("Error while flushing %s - rolling back", self.__class__.__name__)
+            self.adapter.rollback_transaction(c)
+            raise
+        finally:
+            c.close()
+        return count
+
+    def _maybe_flush(self):
+        if self.pending >= self.batch_size:
+            self.flush()
+
+
+class ActionIndex(BlockIndex):
+    """
+    Maps accounts, contracts and action names to the ``(block_num, trx_index, action_index)`` positions
+    of the actions which involve them.
+
+    An action is indexed under each account which authorized it, and under any account names found in the
+    action's data fields listed in :attr:`.ACCOUNT_DATA_KEYS` (e.g. the ``from`` and ``to`` of a transfer).
+    """
+    ACCOUNT_DATA_KEYS = (
+        'from', 'to', 'account', 'owner', 'receiver', 'payer', 'creator', 'name', 'voter', 'proxy', 'producer',
+        'issuer', 'bidder', 'newname', 'user',
+    )
+    """Keys within an action's ``data`` which hold account names that the action 'touches'"""
+
+    def __init__(self, adapter: Union[BaseAdapter, IndexAdapter] = None, batch_size: int = 5000,
+                 action_filter: ActionFilter = None):
+        """
+        :param IndexAdapter adapter: The database adapter to use. Defaults to a new :class:`.IndexAdapter`
+        :param int batch_size: Flush buffered rows to the database once this many actions are pending
+        :param ActionFilter action_filter: Only index actions which match this filter
+        """
+        super().__init__(adapter=adapter, batch_size=batch_size)
+        self.action_filter = None if action_filter is None or action_filter.is_empty else action_filter
+        self._actions = []   # type: List[tuple]
+        self._accounts = []  # type: List[tuple]
+
+    @property
+    def pending(self) -> int:
+        return len(self._actions)
+
+    def _touched(self, act: dict) -> set:
+        accounts = {a.get('actor') for a in act.get('authorization', [])}
+        data = act.get('data')
+        if isinstance(data, dict):
+            for k in self.ACCOUNT_DATA_KEYS:
+                v = data.get(k)
+                if isinstance(v, str) and 0 < len(v) <= 13:
+                    accounts.add(v)
+        accounts.discard(None)
+        return accounts
+
+    def ingest_block(self, block: Union[dict, EOSBlock]):
+        """Buffer the actions from a raw block dictionary (or :class:`.EOSBlock`) for indexing"""
+        if isinstance(block, EOSBlock):
+            block = dict(block)
+        block_num, flt = block['block_num'], self.action_filter
+        for trx_index, tx in enumerate(block.get('transactions', [])):
+            trx = tx.get('trx')
+            if not isinstance(trx, dict) or not isinstance(trx.get('transaction'), dict):
+                continue
+            for action_index, act in enumerate(trx['transaction'].get('actions', [])):
+                if flt is not None and not flt.matches(act):
+                    continue
+                self._actions.append((block_num, trx_index, action_index, act.get('account'), act.get('name')))
+                for acc in self._touched(act):
+                    self._accounts.append((acc, block_num, trx_index, action_index))
+        self._maybe_flush()
+
+    def _write(self, cursor):
+        cursor.executemany(
+            "INSERT OR IGNORE INTO idx_actions (block_num, trx_index, action_index, contract, name) "
+            "VALUES (?, ?, ?, ?, ?);", self._actions
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO idx_accounts (account, block_num, trx_index, action_index) VALUES (?, ?, ?, ?);",
+            self._accounts
+        )
+        self._actions, self._accounts = [], []
+
+    def _query(self, select: str, account: str = None, contract: str = None, name: str = None,
+               start_block: int = None, end_block: int = None, order: str = None, limit: int = None) -> list:
+        self.flush()
+        params = []
+        if account is not None:
+            sql = f"SELECT {select} FROM idx_accounts a JOIN idx_actions x " \
+                  f"ON x.block_num = a.block_num AND x.trx_index = a.trx_index AND x.action_index = a.action_index " \
+                  f"WHERE a.account = ?"
+            params.append(account)
+        else:
+            sql = f"SELECT {select} FROM idx_actions x WHERE 1 = 1"
+        for col, val, op in [('contract', contract, '='), ('name', name, '='),
+                             ('block_num', start_block, '>='), ('block_num', end_block, '<=')]:
+            if val is not None:
+                sql += f" AND x.{col} {op} ?"
+                params.append(val)
+        if order is not None:
+            sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self.adapter.fetchall(sql + ';', params, query_mode='flat')
+
+    def find_actions(self, account: str = None, contract: str = None, name: str = None,
+                     start_block: int = None, end_block: int = None, limit: int = None) -> List[ActionRef]:
+        """
+        Find the positions of indexed actions matching all of the given arguments, ordered by their position
+        in the chain.
+
+        :param str account: Only actions touching this account (as an authorizer, or within the action data)
+        :param str contract: Only actions from this contract, e.g. ``eosio.token``
+        :param str name: Only actions with this name, e.g. ``transfer``
+        :param int start_block: Only actions in this block or later
+        :param int end_block: Only actions in this block or earlier
+        :param int limit: Return at most this many results
+        :return List[ActionRef] refs: A list of :class:`.ActionRef`'s
+        """
+        rows = self._query(
+            'x.block_num, x.trx_index, x.action_index, x.contract, x.name', account, contract, name,
+            start_block, end_block, order='x.block_num, x.trx_index, x.action_index', limit=limit
+        )
+        return [ActionRef(*r) for r in rows]
+
+    def find_blocks(self, account: str = None, contract: str = None, name: str = None,
+                    start_block: int = None, end_block: int = None, limit: int = None) -> List[int]:
+        """Same as :meth:`.find_actions`, but returns only the distinct block numbers containing matching actions"""
+        rows = self._query('DISTINCT x.block_num', account, contract, name, start_block, end_block,
+                           order='x.block_num', limit=limit)
+        return [r[0] for r in rows]
+
+    @property
+    def block_bounds(self) -> Optional[tuple]:
+        """The ``(lowest, highest)`` block numbers with indexed actions, or ``None`` if the index is empty"""
+        self.flush()
+        row = self.adapter.fetchone("SELECT MIN(block_num), MAX(block_num) FROM idx_actions;", query_mode='flat')
+        return None if row is None or row[0] is None else tuple(row)
+
+
+class TransactionIndex(BlockIndex):
+    """
+    Maps transaction IDs to the block number they were included in.
+
+    To keep the index compact, only the first :attr:`.PREFIX_BYTES` bytes of each (binary) transaction ID are
+    stored alongside the block number. A prefix collision simply results in more than one candidate block,
+    so callers should confirm the full ID within the block (as :meth:`.Api.get_transaction_block` does).
+
+        >>> tidx = eos.add_index(TransactionIndex())
+        >>> await eos.get_block_range(94000000, 94010000)
+        >>> tidx.lookup('8d1d1e7ea5a6d0c06ea4ab1b5c4ae1b8b1a4a3e1a6ee8ee1c4f3e1b3c2a1d0e9')
+        [94004422]
+        >>> block = await eos.get_transaction_block('8d1d1e7ea5a6d0c06ea4ab1b5c4ae1b8b1a4a3e1a6ee8ee1c4f3e1b3c2a1d0e9')
+
+    """
+    PREFIX_BYTES = 8
+    """Number of bytes of each transaction ID to store in the index"""
+
+    def __init__(self, adapter: Union[BaseAdapter, IndexAdapter] = None, batch_size: int = 20000):
+        super().__init__(adapter=adapter, batch_size=batch_size)
+        self._rows = []  # type: List[tuple]
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    @classmethod
+    def id_prefix(cls, trx_id: str) -> Optional[bytes]:
+        """Convert a hex transaction ID into the binary prefix stored in the index"""
+        try:
+            return bytes.fromhex(trx_id[:cls.PREFIX_BYTES * 2])
+        except (TypeError, ValueError):
+            return None
+
+    def ingest_block(self, block: Union[dict, EOSBlock]):
+        """Buffer the transaction IDs from a raw block dictionary (or :class:`.EOSBlock`) for indexing"""
+        if isinstance(block, EOSBlock):
+            block = dict(block)
+        block_num = block['block_num']
+        for tx in block.get('transactions', []):
+            trx = tx.get('trx')
+            # Same as EOSTransaction.id - deferred transactions only carry their ID as ``trx``
+            trx_id = trx.get('id') if isinstance(trx, dict) else trx
+            prefix = self.id_prefix(trx_id)
+            if prefix is not None:
+                self._rows.append((prefix, block_num))
+        self._maybe_flush()
+
+    def _write(self, cursor):
+        cursor.executemany("INSERT OR IGNORE INTO idx_transactions (trx_prefix, block_num) VALUES (?, ?);",
+                           self._rows)
+        self._rows = []
+
+    def lookup(self, trx_id: str) -> List[int]:
+        """Returns the candidate block numbers for the transaction ID ``trx_id`` (empty if it isn't indexed)"""
+        prefix = self.id_prefix(trx_id)
+        if prefix is None:
+            return []
+        self.flush()
+        rows = self.adapter.fetchall(
+            "SELECT block_num FROM idx_transactions WHERE trx_prefix = ? ORDER BY block_num;", [prefix],
+            query_mode='flat'
+        )
+        return [r[0] for r in rows]
+
+
+class BlockTimeIndex(BlockIndex):
+    """
+    A persistent set of known ``(block_num, timestamp_ms)`` points for a network, used by
+    :func:`.find_block_at_time` to resolve timestamps into block numbers with as few RPC calls as possible.
+
+    Points are added whenever a block's timestamp is probed, and (when attached to an :class:`.Api` with
+    :meth:`.Api.add_index`) from every ``sample_every``'th block loaded - so lookups get cheaper with use.
+
+    All points are held in memory in two sorted lists, as only a small sample of blocks is ever stored.
+    """
+    def __init__(self, adapter: Union[BaseAdapter, IndexAdapter] = None, network: str = 'eos',
+                 batch_size: int = 100, sample_every: int = 1000):
+        """
+        :param IndexAdapter adapter: The database adapter to use. Defaults to a new :class:`.IndexAdapter`
+        :param str network: The network the block times belong to, e.g. ``eos`` or ``jungle``
+        :param int batch_size: Flush new points to the database once this many are pending
+        :param int sample_every: When ingesting blocks, only store the times of blocks divisible by this number
+        """
+        super().__init__(adapter=adapter, batch_size=batch_size)
+        self.network, self.sample_every = network, max(1, int(sample_every))
+        self._rows = []  # type: List[tuple]
+        rows = self.adapter.fetchall(
+            "SELECT block_num, timestamp_ms FROM block_times WHERE network = ? ORDER BY block_num;", [network],
+            query_mode='flat'
+        )
+        self.block_nums = [r[0] for r in rows]   # type: List[int]
+        self.times = [r[1] for r in rows]        # type: List[int]
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def add_point(self, block_num: int, timestamp_ms: int):
+        """Record that block ``block_num`` has the timestamp ``timestamp_ms`` (unix milliseconds)"""
+        i = bisect_left(self.block_nums, block_num)
+        if i < len(self.block_nums) and self.block_nums[i] == block_num:
+            return
+        self.block_nums.insert(i, block_num)
+        self.times.insert(i, timestamp_ms)
+        self._rows.append((self.network, block_num, timestamp_ms))
+        self._maybe_flush()
+
+    def ingest_block(self, block: Union[dict, EOSBlock]):
+        """Record the timestamp of a raw block dict / :class:`.EOSBlock` if its number is divisible by ``sample_every``"""
+        if block['block_num'] % self.sample_every == 0:
+            self.add_point(block['block_num'], block_time_ms(block['timestamp']))
+
+    def _write(self, cursor):
+        cursor.executemany(
+            "INSERT OR IGNORE INTO block_times (network, block_num, timestamp_ms) VALUES (?, ?, ?);", self._rows
+        )
+        self._rows = []
+
+    def bracket(self, timestamp_ms: int) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        Find the known points closest to ``timestamp_ms``.
+
+        :return tuple points: ``(before, after)`` - ``before`` is the latest ``(block_num, timestamp_ms)`` point
+                              with a timestamp before ``timestamp_ms``, and ``after`` is the earliest point with a
+                              timestamp at or after ``timestamp_ms``. Either may be ``None`` if there's no such point.
+        """
+        i = bisect_left(self.times, timestamp_ms)
+        before = (self.block_nums[i - 1], self.times[i - 1]) if i > 0 else None
+        after = (self.block_nums[i], self.times[i]) if i < len(self.times) else None
+        return before, after
+
+    def __len__(self):
+        return len(self.block_nums)
@@ -19,19 +19,34 @@ Async EOS API client allowing for high speed block importing
 
 """
 import asyncio
+import json
 import time
 import random
 from asyncio import Future
 from collections import OrderedDict
-from typing import Union, Optional, Dict, List, AsyncGenerator, Iterator, Awaitable
+from typing import Union, Optional, Dict, List, AsyncGenerator, Iterator, Awaitable, Tuple, TYPE_CHECKING
 import httpx
 from privex.helpers import DictObject
 from privex.helpers.asyncx import run_sync
 
+from privex.eos.adapters import SqliteAdapter
+from privex.eos.cache import HeadCache, InfoCache
+from privex.eos.exceptions import EOSRPCError
+from privex.eos.health import NodeProber, NodeHeads, async_client, close_client, default_ssl_context
 from privex.eos.node import NodeManager
-from privex.eos.objects import EOSBlock, Node, EOSAccount
+from privex.eos.objects import EOSBlock, Node, EOSAccount, EOSAction, EOSTransaction, BulkResult, EOSBlockHeader, \
+    block_header
 import logging
 
+# Feature modules (indexes, hooks, metrics, the scheduler, cassettes, table snapshots etc.) are imported by the
+# methods which use them, so importing / creating an Api only loads what every call needs.
+if TYPE_CHECKING:
+    from privex.eos.blocktime import TimeLike
+    from privex.eos.hooks import RequestHook, RequestEvent
+    from privex.eos.index import BlockIndex, ActionIndex, TransactionIndex, BlockTimeIndex
+    from privex.eos.metrics import ApiMetrics
+    from privex.eos.stream import ActionFilter
+
 log = logging.getLogger(__name__)
 
 
@@ -101,6 +116,7 @@ class Api:
     endpoints = {
         'get_account':          f'{api_root_chain}/get_account',
         'get_block':            f'{api_root_chain}/get_block',
+        'get_block_info':       f'{api_root_chain}/get_block_info',
         'get_info':             f'{api_root_chain}/get_info',
         'get_currency_balance': f'{api_root_chain}/get_currency_balance',
         'get_currency_stats':   f'{api_root_chain}/get_currency_stats',
@@ -110,31 +126,136 @@ class Api:
         'get_supported_apis':   f'{api_root_node}/get_supported_apis',
     }
     
+    retry_rpc_errors = ['unknown_block_exception', 'timeout_exception', 'deadline_exception']
+    """
+    Names of nodeos errors which are treated as a fault with the node (which is failed, then the call retried), rather
+    than a fault with the request (which raises :class:`.EOSRPCError` immediately).
+    """
+    
+    not_yet_errors = ['unknown_block_exception']
+    """
+    Names of nodeos errors which mean a requested block doesn't exist on the node *yet*. Near the chain head, these
+    are handled by waiting for / switching to a node which has the block, instead of failing the node.
+    """
+    
+    tip_margin = 60
+    """Blocks within this many blocks of the estimated head block are considered to be 'near the chain head'"""
+    
     client: httpx.Client
     
     # def __init__(self, url="https://eos.greymass.com", **kwargs):
     def __init__(self, node_manager=None, **kwargs):
-        if node_manager is None:
-            node_manager = NodeManager(network='eos')
-        self.node_manager = node_manager
-        if node_manager.node_count == 0:
-            log.info("Node manager database is empty. Adding DEFAULT_NODES.")
-            node_manager.bulk_insert(*self.DEFAULT_NODES)
+        # Set by create(), which has already prepared the node manager (without blocking the event loop)
+        nodes_ready = kwargs.pop('_nodes_ready', False)
+        self.node_manager = node_manager = node_manager if nodes_ready else self._prepare_nodes(node_manager)
         
         # self.current_node = node_manager.weighted_node
-        while node_manager.weighted_node is None:
+        while not nodes_ready and node_manager.weighted_node is None:
             log.info("[__init__] current_node is None. Waiting a few seconds for last_fail's to get older.")
             time.sleep(3)
             # self.current_node = node_manager.weighted_node
-        self.client = httpx.Client(timeout=30)
-        httpx.TimeoutConfig(30)
+        record, replay = kwargs.pop('record', None), kwargs.pop('replay', None)
+        replay_speed = kwargs.pop('replay_speed', 1.0)
+        if replay is not None:
+            from privex.eos.cassette import ReplayClient
+            self.client = ReplayClient(replay, speed=replay_speed)
+        else:
+            self.client = async_client(timeout=30)
+            if record is not None:
+                from privex.eos.cassette import CassetteWriter, RecordingClient
+                self.client = RecordingClient(self.client, CassetteWriter(record))
         
         # self.url = self.current_node.url.strip().strip('/')
         # self.client = client = httpx.client.Client()
         # client.headers['Content-Type'] = 'application/json'
         self.max_retries = int(kwargs.pop('max_retries', 10))
         self.retry_wait = float(kwargs.pop('retry_wait', 2.0))
+        self.request_jitter = float(kwargs.pop('request_jitter', 3.0))
+        self.indexes = list(kwargs.pop('indexes', []))  # type: List[BlockIndex]
+        self.hooks = list(kwargs.pop('hooks', []))  # type: List[RequestHook]
+        self.account_cache = HeadCache(max_age_blocks=kwargs.pop('account_cache_blocks', 6))
+        self.block_info_supported = kwargs.pop('block_info_supported', None)  # type: Optional[bool]
+        self._block_time_index = kwargs.pop('block_time_index', None)  # type: Optional[BlockTimeIndex]
+        self.info_cache = InfoCache(
+            self._fetch_info, max_age=kwargs.pop('info_max_age', 0.5),
+            max_estimate_age=kwargs.pop('info_max_estimate_age', 60.0)
+        )
+        self.prober = None  # type: Optional[NodeProber]
+        self.node_heads = NodeHeads()
+        self.tip_timeout = float(kwargs.pop('tip_timeout', 30.0))
+        scheduler = kwargs.pop('scheduler', None)
+        if scheduler is True:
+            from privex.eos.scheduler import RequestScheduler
+            scheduler = RequestScheduler()
+        self.scheduler = scheduler or None
+        """Optional :class:`.RequestScheduler`, which queues requests by priority class"""
+        metrics = kwargs.pop('metrics', None)
+        self.metrics = None  # type: Optional[ApiMetrics]
+        if metrics:
+            self.enable_metrics(None if metrics is True else metrics)
+    
+    @classmethod
+    def _prepare_nodes(cls, node_manager: NodeManager = None) -> NodeManager:
+        """Create the default :class:`.NodeManager` if needed, and add :attr:`.DEFAULT_NODES` if it has no nodes"""
+        if node_manager is None:
+            node_manager = NodeManager(network='eos')
+        if node_manager.node_count == 0:
+            log.info("Node manager database is empty. Adding DEFAULT_NODES.")
+            node_manager.bulk_insert(*cls.DEFAULT_NODES)
+        return node_manager
+    
+    @classmethod
+    async def create(cls, node_manager: NodeManager = None, **kwargs) -> "Api":
+        """
+        Create an :class:`.Api` without blocking the event loop - use this instead of ``Api()`` from async code,
+        e.g. in short-lived workers::
+        
+            >>> eos = await Api.create(max_retries=3)
+        
+        Creating an Api opens (and if needed, creates the schema of) the node database, adds :attr:`.DEFAULT_NODES`
+        to it if it's empty, and loads the SSL CA bundle. Here, that's done in the loop's default executor, and
+        while every node is marked as failed, this waits with ``asyncio.sleep`` rather than ``time.sleep``.
+        
+        If you pass your own ``node_manager``, its database is used from the calling thread as usual (SQLite
+        connections can't move between threads by default), which is only a few milliseconds of work.
+        
+        :param NodeManager node_manager: The node manager to use (default: a new one, using ``~/.privex_eos``)
+        :param kwargs: Any keyword arguments accepted by :class:`.Api`
+        """
+        loop = asyncio.get_event_loop()
+        if node_manager is None:
+            # Its connection is opened in the executor's thread, then used from the loop's thread
+            node_manager = await loop.run_in_executor(None, lambda: cls._prepare_nodes(
+                NodeManager(network='eos', adapter=SqliteAdapter(connection_kwargs=dict(check_same_thread=False)))
+            ))
+        else:
+            cls._prepare_nodes(node_manager)
+        await loop.run_in_executor(None, default_ssl_context)
+        while node_manager.weighted_node is None:
+            log.info("[create] current_node is None. Waiting a few seconds for last_fail's to get older.")
+            await asyncio.sleep(3)
+        return cls(node_manager, _nodes_ready=True, **kwargs)
     
+    def enable_metrics(self, metrics: "ApiMetrics" = None) -> "ApiMetrics":
+        """
+        Start tracking request, node and cache metrics in ``metrics`` (a new :class:`.ApiMetrics` by default),
+        which is shared with :attr:`.node_manager` if it doesn't already have its own registry.
+
+            >>> m = eos.enable_metrics()
+            >>> print(m.to_prometheus())
+
+        """
+        from privex.eos.metrics import ApiMetrics
+        self.metrics = ApiMetrics() if metrics is None else metrics
+        if self.node_manager.metrics is None:
+            self.node_manager.metrics = self.metrics
+        self.metrics.watch_nodes(self.node_manager)
+        self.metrics.watch_cache('account', self.account_cache)
+        self.metrics.watch_cache('get_info', self.info_cache)
+        if self.scheduler is not None:
+            self.metrics.watch_scheduler(self.scheduler)
+        return self.metrics
+
     @property
     def url(self) -> Optional[str]:
         n = self.node_manager.weighted_node
@@ -199,10 +320,246 @@ class Api:
            transferred, how much of a token was staked, who the TX is *actually* from/to etc.
 
         """
-        b = await self._call(self.endpoints['get_block'], block_num_or_id=number)
+        b = await self.get_block_raw(number)
         
         return EOSBlock.from_dict(b)
 
+    async def get_block_raw(self, number: int) -> dict:
+        """
+        Get the contents of the EOS block number ``number`` as the raw decoded JSON dictionary, without
+        constructing an :class:`.EOSBlock` (see :meth:`.get_block` for the structure of the dictionary).
+        """
+        b = await self._call(self.endpoints['get_block'], block_num_or_id=number, **self._min_block_kw(number))
+        for idx in self.indexes:
+            idx.ingest_block(b)
+        return b
+
+    async def _detect_block_info(self) -> bool:
+        """Check (once) whether the node pool supports ``get_block_info`` via ``get_supported_apis``"""
+        if self.block_info_supported is None:
+            try:
+                self.block_info_supported = self.endpoints['get_block_info'] in await self.get_supported_apis()
+            except Exception as e:
+                log.debug("get_supported_apis failed (%s %s) - assuming get_block_info isn't supported", type(e), e)
+                self.block_info_supported = False
+            log.debug("Nodes support get_block_info: %s", self.block_info_supported)
+        return self.block_info_supported
+
+    async def get_block_header_raw(self, number: int) -> dict:
+        """
+        Get the header of block number ``number`` as a raw dictionary, without any transactions.
+        
+        Uses the lightweight ``get_block_info`` endpoint if the nodes support it (detected using
+        ``get_supported_apis``). Otherwise - or if the node serving this call doesn't have the endpoint - the full
+        block is loaded with :meth:`.get_block_raw`, and stripped down to the header fields.
+        """
+        if await self._detect_block_info():
+            try:
+                return await self._call(self.endpoints['get_block_info'], block_num=number,
+                                        **self._min_block_kw(number))
+            except EOSRPCError as e:
+                if e.status != 404:
+                    raise
+                log.debug("Node doesn't support get_block_info - falling back to get_block for block %d", number)
+        return block_header(await self.get_block_raw(number))
+
+    async def get_block_header(self, number: int) -> EOSBlockHeader:
+        """
+        Get the header of block number ``number`` as an :class:`.EOSBlockHeader` - much cheaper than
+        :meth:`.get_block` if you only need the ``timestamp``, ``producer``, ``id``, ``previous`` etc.
+        
+            >>> h = await eos.get_block_header(94000000)
+            >>> h.producer, h.timestamp
+            ('eoshuobipool', '2019-12-08T23:19:55.000')
+        
+        """
+        return EOSBlockHeader.from_dict(await self.get_block_header_raw(number))
+
+    def stream_block_headers(self, start: int, end: int = None, raw: bool = False, **kwargs) \
+            -> AsyncGenerator[Union[EOSBlockHeader, dict], None]:
+        """
+        **NOT A COROUTINE** - Same as :meth:`.stream_blocks`, but outputs only block headers (see
+        :meth:`.get_block_header`), for fast scans of large block ranges.
+        
+            >>> async for h in eos.stream_block_headers(94000000, 94100000, concurrency=50):
+            ...     print(h.block_num, h.producer)
+        
+        :return AsyncGenerator headers: An async generator of :class:`.EOSBlockHeader` objects (or dicts if ``raw``)
+        """
+        from privex.eos.stream import stream_raw_blocks
+        headers = stream_raw_blocks(self, start, end, headers=True, **kwargs)
+        if raw:
+            return headers
+
+        async def _gen():
+            async for h in headers:
+                yield EOSBlockHeader.from_dict(h)
+        return _gen()
+
+    @property
+    def block_time_index(self) -> "BlockTimeIndex":
+        """
+        The :class:`.BlockTimeIndex` used by :meth:`.get_block_at_time` - either the ``block_time_index`` constructor
+        kwarg, a :class:`.BlockTimeIndex` attached with :meth:`.add_index`, or a new persistent one for this
+        node manager's network.
+        """
+        if self._block_time_index is None:
+            from privex.eos.index import BlockTimeIndex
+            attached = [i for i in self.indexes if isinstance(i, BlockTimeIndex)]
+            self._block_time_index = attached[0] if len(attached) > 0 else \
+                BlockTimeIndex(network=self.node_manager.network)
+        return self._block_time_index
+
+    async def get_block_at_time(self, when: "TimeLike", **kwargs) -> Optional[int]:
+        """
+        Find the number of the first block produced at or after ``when``, using an interpolation search over block
+        headers. Probed block times are stored in :attr:`.block_time_index`, so repeated lookups get cheaper.
+        
+            >>> await eos.get_block_at_time('2019-12-08T14:00:00')
+            93869812
+        
+        :param when: A :class:`datetime` (naive = UTC), a date/time string, or a unix timestamp in seconds
+        :key int max_probes: (Default: ``64``) Maximum number of header lookups before raising :class:`TimeoutError`
+        :return Optional[int] block_num: The block number, or ``None`` if no block has been produced since ``when``
+        """
+        from privex.eos.blocktime import find_block_at_time
+        return await find_block_at_time(self, when, self.block_time_index, **kwargs)
+
+    async def get_block_range_for_time(self, start: "TimeLike", end: "TimeLike", **kwargs) -> tuple:
+        """
+        Find the first and last blocks produced within the time window ``start`` to ``end`` (inclusive), ready to be
+        passed to :meth:`.stream_blocks` / :meth:`.get_block_range`.
+        
+            >>> first, last = await eos.get_block_range_for_time(datetime(2019, 12, 8, 14), datetime(2019, 12, 8, 16))
+            >>> async for block in eos.stream_blocks(first, last):
+            ...     pass
+        
+        See :func:`.find_block_range_for_time` for details of the returned tuple.
+        """
+        from privex.eos.blocktime import find_block_range_for_time
+        return await find_block_range_for_time(self, start, end, self.block_time_index, **kwargs)
+
+    def add_index(self, index: "BlockIndex") -> "BlockIndex":
+        """
+        Attach a local block index (e.g. :class:`.ActionIndex`), which will be fed every block loaded by this
+        instance - whether via :meth:`.get_block`, :meth:`.get_block_range` or the streaming methods.
+        
+            >>> idx = eos.add_index(ActionIndex())
+        
+        :param BlockIndex index: The index to attach
+        :return BlockIndex index: The same index that was passed in
+        """
+        self.indexes.append(index)
+        return index
+
+    def add_hook(self, hook: "RequestHook") -> "RequestHook":
+        """
+        Attach a :class:`.RequestHook`, which will be notified as each RPC request starts, receives a response,
+        is decoded, fails over or is retried. See :mod:`privex.eos.hooks`.
+        
+            >>> hook = eos.add_hook(SlowCallLogger(threshold=2.0))
+        
+        """
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: "RequestHook"):
+        """Detach a hook previously added with :meth:`.add_hook`"""
+        self.hooks.remove(hook)
+
+    @staticmethod
+    def priority(name: str):
+        """
+        Context manager which puts every call made within it into the :attr:`.scheduler` priority class ``name``
+        (see :mod:`privex.eos.scheduler`). Has no effect if this Api has no scheduler.
+        
+            >>> with eos.priority('bulk'):
+            ...     accounts = await eos.get_accounts(all_holders)
+        
+        """
+        from privex.eos.scheduler import priority
+        return priority(name)
+
+    def _emit(self, name: str, event: "RequestEvent"):
+        for h in self.hooks:
+            try:
+                getattr(h, name)(event)
+            except Exception:
+                log.exception("Request hook %s raised an exception during %s", h, name)
+
+    def flush_indexes(self):
+        """Write out any blocks buffered by the attached :attr:`.indexes`"""
+        for idx in self.indexes:
+            idx.flush()
+
+    async def get_transaction_block(self, trx_id: str, index: "TransactionIndex" = None) -> Optional[EOSBlock]:
+        """
+        Find the block containing the transaction ``trx_id`` using a local :class:`.TransactionIndex`, then load it
+        with a single ``get_block`` call (unless the ID prefix matches more than one indexed block).
+        
+            >>> tidx = eos.add_index(TransactionIndex())
+            >>> await eos.get_block_range(94000000, 94010000)
+            >>> block = await eos.get_transaction_block(some_trx_id)
+        
+        :param str trx_id: The transaction ID to look up
+        :param TransactionIndex index: The index to use. Defaults to the first :class:`.TransactionIndex` attached
+                                       to this instance via :meth:`.add_index`
+        :raises ValueError: When ``index`` isn't passed, and no :class:`.TransactionIndex` is attached
+        :return EOSBlock block: The block containing the transaction, or ``None`` if it isn't in the index
+        """
+        if index is None:
+            from privex.eos.index import TransactionIndex
+            index = next((i for i in self.indexes if isinstance(i, TransactionIndex)), None)
+            if index is None:
+                raise ValueError("No TransactionIndex was passed, and none are attached via add_index()")
+        trx_id = trx_id.lower()
+        for block_num in index.lookup(trx_id):
+            b = await self.get_block(block_num)
+            for tx in b.transactions:
+                if tx.id == trx_id:
+                    return b
+        return None
+
+    async def find_transaction(self, trx_id: str, index: "TransactionIndex" = None) -> Optional[EOSTransaction]:
+        """
+        Same as :meth:`.get_transaction_block`, but returns the :class:`.EOSTransaction` itself, rather than
+        the block containing it.
+        """
+        b = await self.get_transaction_block(trx_id, index=index)
+        if b is None:
+            return None
+        return next(tx for tx in b.transactions if tx.id == trx_id.lower())
+
+    async def get_indexed_actions(self, index: "ActionIndex", concurrency: int = 20, **query) -> List[EOSAction]:
+        """
+        Look up actions in the local :class:`.ActionIndex` ``index``, then load only the blocks containing them,
+        returning the matching actions as :class:`.EOSAction`'s in chain order.
+        
+            >>> acts = await eos.get_indexed_actions(idx, account='someguy12333', name='transfer')
+        
+        :param ActionIndex index: The action index to query
+        :param int concurrency: Maximum number of blocks to load at once
+        :param query: Keyword arguments passed to :meth:`.ActionIndex.find_actions`, e.g. ``account``, ``contract``,
+                      ``name``, ``start_block``, ``end_block``
+        :return List[EOSAction] actions: The matching actions
+        """
+        from privex.eos.stream import extract_actions
+        refs = index.find_actions(**query)
+        positions = {(r.block_num, r.trx_index, r.action_index) for r in refs}
+        block_nums = sorted({r.block_num for r in refs})
+        sem = asyncio.Semaphore(max(1, int(concurrency)))
+        
+        async def _load(num):
+            async with sem:
+                return await self._call(self.endpoints['get_block'], block_num_or_id=num)
+        
+        results = []
+        for b in await asyncio.gather(*[_load(n) for n in block_nums]):
+            for act in extract_actions(b):
+                if (act.block_num, act.trx_index, act.action_index) in positions:
+                    results.append(act)
+        return results
+
     async def get_block_range(self, start: int, end: int) -> Dict[int, EOSBlock]:
         """
         Loads all blocks between and including ``start`` and ``end``, and returns them as an ordered dictionary mapping block numbers
@@ -225,6 +582,7 @@ class Api:
             coros[i] = self.get_block(i)
         
         results = await asyncio.gather(*coros.values())
+        self.flush_indexes()
         return OrderedDict(zip(coros.keys(), results))
 
     def generate_block_range(self, start: int, end: int) -> Iterator[Awaitable[EOSBlock]]:
@@ -251,16 +609,192 @@ class Api:
         
         return asyncio.as_completed(coros)
 
-    async def get_info(self) -> dict:
-        return await self._call(self.endpoints['get_info'])
+    def stream_blocks(self, start: int, end: int = None, raw: bool = False, **kwargs) \
+            -> AsyncGenerator[Union[EOSBlock, dict], None]:
+        """
+        **NOT A COROUTINE** - Returns an async generator which outputs blocks **in order** from ``start`` to ``end``,
+        keeping up to ``concurrency`` block requests in flight.
+        
+        If ``end`` is ``None``, the generator follows the live chain head forever.
+        
+            >>> async for block in Api().stream_blocks(94000000, 94001000):
+            ...     print(block.block_num, block.producer)
+        
+        :param int start: Load blocks starting from this block
+        :param int end: Load blocks until this block (inclusive). Set to ``None`` to stream live blocks.
+        :param bool raw: If ``True``, yield the raw block dictionaries instead of :class:`.EOSBlock` objects
+        :key int concurrency: (Default: ``20``) Maximum number of blocks to request ahead of the current block
+        :key bool irreversible: (Default: ``False``) When streaming live, only stream irreversible blocks
+        :key float poll_interval: (Default: ``0.5``) Seconds between ``get_info`` calls when caught up with the chain
+        :return AsyncGenerator blocks: An async generator of :class:`.EOSBlock` objects (or dicts if ``raw``)
+        """
+        from privex.eos.stream import stream_raw_blocks
+        blocks = stream_raw_blocks(self, start, end, **kwargs)
+        if raw:
+            return blocks
+
+        async def _gen():
+            async for b in blocks:
+                yield EOSBlock.from_dict(b)
+        return _gen()
+
+    def stream_actions(self, start: int, end: int = None, contracts=None, names=None, authorizers=None,
+                       action_filter: "ActionFilter" = None, **kwargs) -> AsyncGenerator[EOSAction, None]:
+        """
+        **NOT A COROUTINE** - Returns an async generator which outputs flattened :class:`.EOSAction` records from the
+        blocks between ``start`` and ``end`` (or the live chain head if ``end`` is ``None``), in block order.
+        
+        The filters are applied to the raw block JSON, so non-matching actions never have objects created for them.
+        
+            >>> eos = Api()
+            >>> async for act in eos.stream_actions(94000000, contracts='eosio.token', names='transfer'):
+            ...     print(act.block_num, act.trx_id, act.data['from'], act.data['to'], act.data['quantity'])
+        
+        :param int start: Stream actions starting from this block
+        :param int end: Stream actions until this block (inclusive). Set to ``None`` to stream live blocks.
+        :param str|list contracts: Only output actions from these contracts / accounts, e.g. ``eosio.token``
+        :param str|list names: Only output actions with these names, e.g. ``transfer``
+        :param str|list authorizers: Only output actions authorized by at least one of these accounts
+        :param ActionFilter action_filter: Pass a pre-built :class:`.ActionFilter` instead of the above three args
+        :param kwargs: Extra keyword args are passed to :func:`.stream_raw_blocks` (see :meth:`.stream_blocks`)
+        :return AsyncGenerator actions: An async generator of :class:`.EOSAction` objects
+        """
+        from privex.eos.stream import ActionFilter, stream_actions
+        if action_filter is None:
+            action_filter = ActionFilter(contracts=contracts, names=names, authorizers=authorizers)
+        return stream_actions(self, start, end, action_filter=action_filter, **kwargs)
+
+    async def get_info(self, max_age: float = None) -> dict:
+        """
+        Get the chain info (``head_block_num``, ``last_irreversible_block_num`` etc.) from the shared
+        :attr:`.info_cache` snapshot, refreshing it if it's older than ``max_age`` seconds.
+        
+        :param float max_age: Maximum snapshot age in seconds. Defaults to the ``info_max_age`` constructor kwarg
+                              (``0.5`` - one block). Pass ``0`` to always load fresh info from the network.
+        :return dict info: The ``get_info`` result. It's shared between callers, so don't modify it.
+        """
+        return await self.info_cache.get(max_age)
+
+    async def _fetch_info(self) -> dict:
+        info = await self._call(self.endpoints['get_info'])
+        self.account_cache.observe_head(info.get('head_block_num'))
+        return info
+
+    def start_info_refresh(self, interval: float = 0.5) -> asyncio.Task:
+        """
+        Refresh :attr:`.info_cache` in the background every ``interval`` seconds, so :meth:`.get_info` and
+        :attr:`.head_block_estimate` never wait on the network.
+        
+            >>> eos.start_info_refresh(0.5)
+            >>> eos.head_block_estimate
+            94000012
+            >>> await eos.stop_info_refresh()
+        
+        """
+        return self.info_cache.start(interval)
+
+    async def stop_info_refresh(self):
+        """Stop the background refresh started by :meth:`.start_info_refresh`"""
+        await self.info_cache.stop()
+
+    def start_health_prober(self, interval: float = 10.0, **kwargs) -> NodeProber:
+        """
+        Start probing every node with ``get_info`` in the background every ``interval`` seconds. Nodes which fail
+        their probe, or lag more than ``node_manager.max_head_lag`` blocks behind the chain head, stop being used
+        (unless every node is lagging). See :class:`.NodeProber` for the accepted ``kwargs``.
+        
+            >>> eos.start_health_prober(interval=10)
+            >>> eos.node_manager.node_health()
+            {1: NodeHealth(node_id=1, head_block_num=94000012, ...), 2: NodeHealth(...)}
+        
+        """
+        if self.prober is None:
+            self.prober = NodeProber(self.node_manager, client=self.client, interval=interval, **kwargs)
+        self.prober.start()
+        return self.prober
+
+    async def stop_health_prober(self):
+        if self.prober is not None:
+            await self.prober.stop()
+
+    @property
+    def head_block_estimate(self) -> Optional[int]:
+        """
+        The current head block, estimated from the last ``get_info`` snapshot and the 500ms block interval, without
+        any network call. ``None`` if :meth:`.get_info` hasn't been called yet, or not within the last
+        ``info_max_estimate_age`` seconds (constructor kwarg, default ``60``).
+        """
+        return self.info_cache.head_block_num
 
     async def get_account(self, account_name) -> EOSAccount:
-        a = await self._call(self.endpoints['get_account'], account_name=account_name)
-        return EOSAccount.from_dict(a)
+        return EOSAccount.from_dict(await self.get_account_raw(account_name))
+
+    async def get_account_raw(self, account_name) -> dict:
+        return await self._call(self.endpoints['get_account'], account_name=account_name)
+
+    async def get_accounts(self, names, concurrency: int = 20, cache: bool = False, raw: bool = False) -> BulkResult:
+        """
+        Load many accounts concurrently, ignoring duplicate names. Accounts which fail to load (e.g. because they
+        don't exist) are reported in ``.errors`` of the result, instead of failing the entire call.
+        
+            >>> accs = await eos.get_accounts(['someguy12333', 'privexinceos', 'notarealacct'])
+            >>> accs['someguy12333'].created
+            datetime.datetime(2018, 6, 9, 12, 10, 43, tzinfo=tzutc())
+            >>> accs.errors
+            {'notarealacct': EOSRPCError('exception (0): unspecified - unknown key ...')}
+        
+        :param names: An iterable of account names
+        :param int concurrency: Maximum number of accounts to load at once
+        :param bool cache: If ``True``, serve / store accounts using :attr:`.account_cache`, which expires accounts
+                           after ``account_cache_blocks`` blocks (constructor kwarg, default ``6`` - i.e. 3 seconds)
+        :param bool raw: If ``True``, return the raw account dictionaries instead of :class:`.EOSAccount`'s
+        :return BulkResult accounts: Maps each name to its account, in the order of ``names``
+        """
+        from privex.eos.accounts import get_accounts
+        return await get_accounts(self, names, concurrency=concurrency, raw=raw,
+                                  cache=self.account_cache if cache else None)
+
+    def stream_accounts(self, names, concurrency: int = 20, cache: bool = False, raw: bool = False) \
+            -> AsyncGenerator[tuple, None]:
+        """
+        **NOT A COROUTINE** - Returns an async generator which loads the accounts ``names`` concurrently, yielding
+        ``(name, account)`` tuples as each account finishes loading. If an account fails to load, its exception is
+        yielded in place of the account. See :meth:`.get_accounts` for the arguments.
+        
+            >>> async for name, acc in eos.stream_accounts(names):
+            ...     if isinstance(acc, Exception):
+            ...         continue
+            ...     print(name, acc.cpu_limit)
+        
+        """
+        from privex.eos.accounts import stream_accounts
+        return stream_accounts(self, names, concurrency=concurrency, raw=raw,
+                               cache=self.account_cache if cache else None)
 
     async def get_currency_balance(self, code: str, account: str, symbol: str) -> List[str]:
         return await self._call(self.endpoints['get_currency_balance'], code=code, account=account, symbol=symbol)
 
+    async def get_balances(self, holders, contracts=('eosio.token',), symbols=None, concurrency: int = 20) \
+            -> BulkResult:
+        """
+        Load the token balances of many accounts at once, by reading each holder's rows from the ``accounts`` table
+        of each token contract in ``contracts`` (up to ``concurrency`` reads at once).
+        
+            >>> bals = await eos.get_balances(['someguy12333', 'privexinceos'], symbols=['EOS'])
+            >>> bals['someguy12333'][('eosio.token', 'EOS')]
+            TokenAmount(amount=123456, precision=4, symbol='EOS')
+        
+        To repeatedly check many accounts for balance changes, see :class:`.BalanceSweeper`.
+        
+        :param holders: An iterable of account names
+        :param contracts: Token contracts to load balances from. Default: ``('eosio.token',)``
+        :param symbols: Only return balances of these symbols, e.g. ``['EOS']``
+        :param int concurrency: Maximum number of table reads to run at once
+        :return BulkResult balances: Maps each holder to a dict of ``{(contract, symbol): TokenAmount}``
+        """
+        from privex.eos.tokens import get_balances
+        return await get_balances(self, holders, contracts=contracts, symbols=symbols, concurrency=concurrency)
+
     async def _call(self, _endpoint: str, *args, **kwargs) -> Union[dict, list]:
         """
         Internal function used for making an async EOS RPC call.
@@ -286,41 +820,209 @@ class Api:
         """
         retry_count = kwargs.pop('_retry_count', 0)
         raise_status = kwargs.pop('_raise_status', True)
+        min_block = kwargs.pop('_min_block', None)
+        tip_deadline = kwargs.pop('_tip_deadline', None)
+        tip_deadline = time.monotonic() + self.tip_timeout if tip_deadline is None else tip_deadline
+        prio = kwargs.pop('_priority', None)
         _endpoint = '/' + _endpoint.strip('/')
         body = list(args) if len(args) > 0 else dict(kwargs)
+        sched = self.scheduler
+        if sched is not None:
+            prio = sched.classify(_endpoint, prio)
+        ev = None
+        if self.hooks:
+            from privex.eos.hooks import RequestEvent
+            ev = RequestEvent(endpoint=_endpoint, attempt=retry_count, queued_at=time.perf_counter(), priority=prio)
         # async with httpx.AsyncClient() as client:
-        node_url = self.url
-        while node_url is None:
-            log.warning("All nodes broken. Waiting for functional node...")
-            await asyncio.sleep(random.random() * 4)
-            node_url = self.url
-        url = node_url.strip().strip('/') + _endpoint
-        
         # client.headers['Content-Type'] = 'application/json'
+        node_url, url = None, _endpoint
+        rpc_error, not_yet = None, False
+        m, started, responded = self.metrics, 0.0, False
         try:
-            await asyncio.sleep(random.random() * 3)
-            r = await self.client.post(url, json=body, headers={'Content-Type': 'application/json'})
-            if raise_status:
-                r.raise_for_status()
-            res = r.json()
+            if self.request_jitter > 0:
+                await asyncio.sleep(random.random() * self.request_jitter)
+            node_url = await self._acquire_node(min_block, tip_deadline, prio)
+            try:
+                url = node_url.strip().strip('/') + _endpoint
+                if m is not None:
+                    m.in_flight.inc()
+                started = time.perf_counter()
+                if ev is not None:
+                    ev.node, ev.request_size = node_url, len(json.dumps(body, separators=(',', ':')))
+                    ev.queue_time = started - ev.queued_at
+                    self._emit('on_request_start', ev)
+                r = await self.client.post(url, json=body, headers={'Content-Type': 'application/json'})
+            finally:
+                if sched is not None:
+                    sched.release(prio)
+                if m is not None and started > 0:
+                    m.in_flight.dec()
+            responded = True
+            if m is not None:
+                m.observe_response(node_url, _endpoint, r.status_code, len(r.content), time.perf_counter() - started)
+            if ev is not None:
+                ev.network_time, ev.status, ev.response_size = time.perf_counter() - started, r.status_code, \
+                                                               len(r.content)
+                self._emit('on_response', ev)
+            if raise_status and r.status_code >= 400:
+                rpc_error = self._rpc_error(r)
+            if rpc_error is None:
+                if raise_status:
+                    r.raise_for_status()
+                if ev is None:
+                    res = r.json()
+                else:
+                    decode_started = time.perf_counter()
+                    res = r.json()
+                    ev.decode_time = time.perf_counter() - decode_started
+                    self._emit('on_decode', ev)
+            elif rpc_error.name in self.not_yet_errors and min_block is not None \
+                    and time.monotonic() < tip_deadline and await self._near_tip(min_block):
+                not_yet, rpc_error = True, None
+            elif rpc_error.name in self.retry_rpc_errors:
+                raise rpc_error
+        except asyncio.CancelledError:
+            raise
         except (BaseException, Exception) as e:
             log.warning("Exception '%s' while calling %s with body %s\n\tMessage: %s",
                         type(e), url, body, str(e))
-            await self._fail_node(node_url)
+            rpc_error = None
+            if m is not None and not responded and started > 0:
+                m.observe_error(node_url, _endpoint, type(e).__name__, time.perf_counter() - started)
+            if node_url is not None:
+                await self._fail_node(node_url)
+            if ev is not None:
+                ev.node, ev.error = node_url, e
+                if not responded and started > 0:
+                    ev.network_time = time.perf_counter() - started
+                self._emit('on_failover', ev)
             if retry_count >= self.max_retries:
                 log.exception("[RETRIES EXCEEDED] Exception '%s' while calling %s with body %s\n\tMessage: %s",
                               type(e), url, body, str(e))
                 raise e
             retry_count += 1
+            if m is not None:
+                m.retries.inc(node_url, _endpoint)
+            if ev is not None:
+                self._emit('on_retry', ev)
             log.warning("[Retry %d / %d] Retrying call.", retry_count, self.max_retries)
             await asyncio.sleep(self.retry_wait)
-            res = await self._call(_endpoint, *args, **kwargs, _retry_count=retry_count)
+            res = await self._call(_endpoint, *args, **kwargs, _retry_count=retry_count, _min_block=min_block,
+                                   _tip_deadline=tip_deadline, _priority=prio)
+        
+        if not_yet:
+            # The node hasn't got this block yet - that's not a fault, so re-route the call without failing the node.
+            log.debug("Node %s doesn't have block %d yet. Re-routing call to %s", node_url, min_block, _endpoint)
+            self.node_heads.mark_missing(node_url, min_block)
+            if m is not None:
+                m.reroutes.inc(node_url, _endpoint)
+            return await self._call(_endpoint, *args, **kwargs, _retry_count=retry_count, _min_block=min_block,
+                                    _tip_deadline=tip_deadline, _priority=prio)
+        
+        if rpc_error is not None:
+            raise rpc_error
+        
+        if min_block is not None:
+            self.node_heads.observe_block(node_url, min_block)
+        elif _endpoint == self.endpoints['get_info'] and isinstance(res, dict) and 'head_block_num' in res:
+            self.node_heads.observe(node_url, int(res['head_block_num']))
         
         if isinstance(res, dict):
             return DictObject(res)
         
         return res
 
+    def _rpc_error(self, r) -> Optional[EOSRPCError]:
+        """Returns an :class:`.EOSRPCError` if the error response ``r`` has a nodeos error body, otherwise ``None``"""
+        try:
+            return EOSRPCError.from_response(r.status_code, r.json())
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _min_block_kw(number) -> dict:
+        """Routing kwargs for :meth:`._call` when requesting block ``number`` (which may be a block ID)"""
+        return dict(_min_block=number) if isinstance(number, int) else {}
+
+    async def _near_tip(self, block_num: int) -> bool:
+        """
+        Whether ``block_num`` is near (or beyond) the estimated chain head. If the head isn't known, the ``get_info``
+        snapshot is refreshed first - only if that fails is the block assumed to be near the head.
+        """
+        head = self.head_block_estimate
+        if head is None:
+            try:
+                await self.info_cache.get()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Failed to load get_info while checking block %d: %s %s", block_num, type(e), str(e))
+            head = self.head_block_estimate
+        return head is None or block_num > head - self.tip_margin
+
+    def _node_for_block(self, min_block: int = None) -> Tuple[Optional[str], float]:
+        """
+        Pick a weighted random node. If ``min_block`` is set, only nodes whose estimated head is at least ``min_block``
+        (or unknown) are considered.
+        
+        :return tuple node: ``(url, wait)`` - ``url`` is ``None`` if no node can be used right now. If that's because
+                            every node is behind ``min_block``, ``wait`` is how long until one should catch up.
+        """
+        nm = self.node_manager
+        # Loaded once, and used for both the lag filter and the head estimates
+        health = nm.node_health()
+        nodes = nm.weight_nodes(nm.get_weighted_nodes(filter_fail=True, filter_lag=True, health=health))
+        if len(nodes) == 0:
+            return None, 0.0
+        if min_block is None:
+            return random.choice(nodes).url, 0.0
+        heads = {n.url: self.node_heads.estimate(n, health) for n in nodes}
+        able = [n for n in nodes if heads[n.url] is None or heads[n.url] >= min_block]
+        if len(able) > 0:
+            return random.choice(able).url, 0.0
+        best = max(heads.values())
+        return None, min(3.0, max(0.1, (min_block - best) * self.node_heads.block_interval))
+
+    async def _acquire_node(self, min_block: int = None, tip_deadline: float = None, prio: str = None) -> str:
+        """
+        Returns the URL of the node to send the next call to, holding a :attr:`.scheduler` slot for ``prio`` (if
+        there's a scheduler) which the caller must release.
+
+        Waiting for a usable node (e.g. one which has reached ``min_block``) happens without a slot, so calls waiting
+        on the chain head can't starve other calls. Once a slot is acquired, the node is picked again using the node
+        state at send time - if there's no usable node any more, the slot is released and the wait starts over.
+        """
+        sched = self.scheduler
+        while True:
+            url = await self._select_node(min_block, tip_deadline)
+            if sched is None:
+                return url
+            await sched.acquire(prio)
+            expired = tip_deadline is not None and time.monotonic() >= tip_deadline
+            url, _ = self._node_for_block(None if expired else min_block)
+            if url is not None:
+                return url
+            sched.release(prio)
+
+    async def _select_node(self, min_block: int = None, tip_deadline: float = None) -> str:
+        """
+        Returns the URL of the node to send the next call to, waiting while every node is broken, or (until
+        ``tip_deadline``) while no node has reached ``min_block`` yet.
+        """
+        while True:
+            url, wait = self._node_for_block(min_block)
+            if url is not None:
+                return url
+            if wait == 0:
+                log.warning("All nodes broken. Waiting for functional node...")
+                await asyncio.sleep(random.random() * 4)
+            elif tip_deadline is not None and time.monotonic() >= tip_deadline:
+                log.warning("No node has reached block %d after waiting. Routing to any node.", min_block)
+                min_block = None
+            else:
+                log.debug("No node has reached block %d yet - waiting %.2f seconds", min_block, wait)
+                await asyncio.sleep(wait)
+
     async def _fail_node(self, node):
         """Increment the fail_count for the current node and get a new weighted RPC node"""
         # node = self.current_node if node is None else node
@@ -341,6 +1043,9 @@ class Api:
         It uses privex-helpers' :func:`.run_sync` to run :meth:`._call` synchronously, allowing for debugging
         this class via the standard Python REPL which doesn't allow for ``await`` or ``async with`` etc.
 
+        Each call runs in a new event loop, so no connections are reused between calls - to use the Api from
+        synchronous code, use :class:`.SyncApi` instead.
+
         :param str _endpoint: The URL endpoint to call, e.g. ``/v1/chain/get_block``
         :param args: Positional arguments will be converted into a list and sent as the JSON POST body.
         :param kwargs: Keyword arguments will be converted into a dict and sent as the JSON POST body.
@@ -348,6 +1053,47 @@ class Api:
         """
         return run_sync(self._call, _endpoint, *args, **kwargs)
 
+    def iter_table_rows(self, code: str, table: str, scope: str = None, **kwargs) -> AsyncGenerator[dict, None]:
+        """
+        **NOT A COROUTINE** - Returns an async generator which outputs every row of a contract table, transparently
+        following ``more`` / ``next_key`` pagination. The next page is requested while the current page's rows are
+        being consumed, and the page size adapts to the node's response time.
+        
+            >>> async for row in eos.iter_table_rows('eosio', 'producers', limit=500):
+            ...     print(row['owner'], row['total_votes'])
+        
+        :param str code: The contract account, e.g. ``eosio.token``
+        :param str table: The table name, e.g. ``accounts``
+        :param str scope: The table scope. Defaults to ``code``
+        :key lower_bound: Start from this key
+        :key upper_bound: Stop at this key
+        :key index_position: Use this secondary index, e.g. ``2``
+        :key str key_type: The key type of the index, e.g. ``i64`` or ``name``
+        :key int limit: (Default: ``100``) The initial page size
+        :key int max_limit: (Default: ``5000``) The largest page size to grow to
+        :key float target_time: (Default: ``1.0``) Aim for each page request to take this many seconds
+        :key bool prefetch: (Default: ``True``) Request the next page while the current page is being consumed
+        :key str key_field: The table's primary key field - only needed for old nodes which don't return ``next_key``
+        :return AsyncGenerator rows: An async generator of row dictionaries
+        """
+        from privex.eos.tables import iter_table_rows
+        return iter_table_rows(self, code, table, scope, endpoint=self.endpoints['get_table_rows'], **kwargs)
+
+    async def snapshot_table(self, code: str, table: str, folder: str, **kwargs) -> dict:
+        """
+        Snapshot every row from every scope of the table ``table`` in contract ``code`` into compressed NDJSON
+        segments within ``folder``, fetching scopes concurrently. If a previous snapshot into ``folder`` was
+        interrupted, it's resumed from its last checkpoint.
+        
+            >>> stats = await eos.snapshot_table('eosio.token', 'accounts', '/data/snapshots/token', concurrency=20)
+        
+        See :class:`.TableSnapshot` for the accepted ``kwargs``, e.g. ``concurrency`` and ``batch_size``.
+        
+        :return dict checkpoint: The final checkpoint, including the total ``scopes`` and ``rows`` written
+        """
+        from privex.eos.snapshot import TableSnapshot
+        return await TableSnapshot(self, code, table, folder, **kwargs).run()
+
     async def get_supported_apis(self) -> List[str]:
         apis = await self._call(self.endpoints['get_supported_apis'])
         return apis['apis']
@@ -376,14 +1122,29 @@ class Api:
     
     def __enter__(self):
         if not self.client:
-            self.client = httpx.Client(timeout=30)
+            self.client = async_client(timeout=30)
         return self
     
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.close()
+    async def __aenter__(self):
+        return self.__enter__()
+    
+    async def close(self):
+        """Stop any background tasks, and close the HTTP client"""
+        await self.info_cache.stop()
+        await self.stop_health_prober()
+        if self.client is not None:
+            await close_client(self.client)
         self.client = None
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
 
     def __del__(self):
-        if hasattr(self, 'client') and self.client is not None:
-            asyncio.run_coroutine_threadsafe(self.client.close(), loop=asyncio.get_event_loop())
-
+        client = getattr(self, 'client', None)
+        if client is None:
+            return
+        try:
+            asyncio.get_running_loop().create_task(close_client(client))
+        except RuntimeError:
+            # No event loop is running, so the client's connections can't be closed gracefully.
+            pass
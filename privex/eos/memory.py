@@ -0,0 +1,339 @@
+"""
+Opt-in memory profiling for large imports (e.g. :meth:`.Api.get_block_range`), to find out where the memory goes.
+
+While active, :class:`.MemoryProfiler` takes a :mod:`tracemalloc` snapshot (and reads the process RSS) every
+``interval`` seconds, and attributes the memory allocated since it started to a pipeline stage, based on where
+each allocation was made:
+
+ - ``network`` - HTTP client buffers (``httpx`` / ``httpcore`` / ``h11``, SSL and asyncio streams)
+ - ``decode`` - JSON decoding, and wrapping the decoded responses in :class:`.DictObject` (in :meth:`.Api._call`)
+ - ``objects`` - constructing :class:`.EOSBlock` / :class:`.EOSTransaction` etc. objects
+ - ``results`` - collecting the results (e.g. the gathered list and ``OrderedDict`` in :meth:`.Api.get_block_range`)
+ - ``other`` - everything else
+
+It's also a :class:`.RequestHook`, counting the blocks loaded so each stage can be reported in bytes per block::
+
+    >>> api = Api()
+    >>> async with MemoryProfiler(api, interval=0.5) as prof:
+    ...     blocks = await api.get_block_range(94000000, 94002000)
+    >>> print(prof.format_report())
+    2001 blocks, 12 samples, peak RSS 412.3 MiB (+301.0 MiB), 6237 response bytes/block
+    stage         peak MiB   final MiB   bytes/block  top allocation
+    network          46.21        3.31         24215  httpcore/_async/http11.py:205
+    decode           44.15       44.15         23137  python3.11/json/decoder.py:353
+    ...
+
+Tracing every allocation slows Python down considerably (and every sample briefly blocks the event loop), so only
+use this to investigate memory use - not to measure speed.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import heapq
+import inspect
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import attr
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from privex.eos.hooks import RequestHook, RequestEvent
+from privex.eos.lib import Api
+
+log = logging.getLogger(__name__)
+
+STAGES = ('network', 'decode', 'objects', 'results', 'other')
+"""The pipeline stages memory is attributed to, in pipeline order"""
+
+_SEP = os.sep
+
+
+def current_rss() -> Optional[int]:
+    """The resident set size of this process in bytes, or ``None`` if it can't be read on this platform"""
+    if resource is None:
+        return None
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """The peak resident set size of this process in bytes (``ru_maxrss`` is in bytes on macOS, KiB elsewhere)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@attr.s(slots=True, frozen=True)
+class StageRule:
+    """
+    Attributes allocations made in a file whose path contains ``path``, or (if ``func`` is set) made by the
+    function ``func`` itself, to ``stage``.
+    """
+    stage = attr.ib(type=str)
+    path = attr.ib(type=str, default=None)
+    func = attr.ib(default=None)
+    _lines = attr.ib(type=tuple, default=None, init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        if self.func is not None:
+            code = self.func.__code__
+            src, first = inspect.getsourcelines(self.func)
+            object.__setattr__(self, '_lines', (code.co_filename, first, first + len(src) - 1))
+
+    def matches(self, frame: tracemalloc.Frame) -> bool:
+        if self._lines is not None:
+            filename, first, last = self._lines
+            return frame.filename == filename and first <= frame.lineno <= last
+        return self.path in frame.filename
+
+
+def _p(*parts: str) -> str:
+    return _SEP + _SEP.join(parts)
+
+
+def default_rules() -> List[StageRule]:
+    """
+    The rules used to attribute allocations to :attr:`.STAGES`. For each allocation, the rules are checked against
+    the innermost stack frame first - the first rule to match any frame decides the stage. Allocations attributed
+    to a stage which isn't in :attr:`.STAGES` (e.g. ``ignore``) aren't counted.
+    """
+    rules = [
+        # Allocations made while taking samples
+        StageRule('ignore', tracemalloc.__file__),
+        StageRule('ignore', __file__),
+        StageRule('decode', _p('json', '')),
+        StageRule('decode', func=Api._call),
+        StageRule('objects', _p('privex', 'eos', 'objects.py')),
+        StageRule('objects', '<attrs generated'),
+        StageRule('objects', _p('attr', '')),
+        StageRule('objects', _p('privex', 'helpers', '')),
+        StageRule('results', func=Api.get_block_range),
+        StageRule('results', func=Api.generate_block_range),
+    ]
+    for mod in ('httpx', 'httpcore', 'h11', 'h2', 'anyio'):
+        rules.append(StageRule('network', _p(mod, '')))
+    for mod in ('ssl.py', 'sslproto.py', 'selector_events.py', 'streams.py'):
+        rules.append(StageRule('network', _SEP + mod))
+    return rules
+
+
+@attr.s(slots=True)
+class MemorySample:
+    """The memory use at one point in time. Stage sizes are in bytes, relative to when profiling started."""
+    elapsed = attr.ib(type=float)
+    """Seconds since profiling started"""
+    blocks = attr.ib(type=int)
+    """Blocks loaded so far"""
+    rss = attr.ib(type=int, default=None)
+    traced = attr.ib(type=int, default=0)
+    """Total memory currently allocated, as reported by :func:`tracemalloc.get_traced_memory`"""
+    traced_peak = attr.ib(type=int, default=0)
+    """Peak memory allocated so far (between samples too), as reported by :func:`tracemalloc.get_traced_memory`"""
+    stages = attr.ib(type=dict, factory=dict)
+    sites = attr.ib(type=dict, factory=dict, repr=False)
+    """Maps each stage to a list of its largest allocation sites, as ``(filename, lineno, size)``"""
+
+
+class MemoryProfiler(RequestHook):
+    """
+    Samples :mod:`tracemalloc` snapshots and RSS every ``interval`` seconds while active, attributing the memory
+    allocated since it started to :attr:`.STAGES` (see the module docs). Use it as an async context manager, or
+    call :meth:`.start` / :meth:`.stop` (and :meth:`.sample` whenever you like) yourself.
+
+    :param Api api: If given, the profiler is added to (and later removed from) the api's hooks to count blocks
+    :param float interval: Minimum seconds between samples. ``None`` only samples on :meth:`.start` / :meth:`.stop`
+    :param int nframes: Stack frames stored per allocation - too few and allocations can't be attributed
+    :param int top: Number of allocation sites kept per stage in each sample
+    """
+    def __init__(self, api: Api = None, interval: Optional[float] = 1.0, nframes: int = 8, top: int = 3,
+                 rules: List[StageRule] = None):
+        self.api, self.interval, self.nframes, self.top = api, interval, int(nframes), int(top)
+        self.rules = default_rules() if rules is None else rules
+        self.samples = []  # type: List[MemorySample]
+        self.blocks = 0
+        self.response_bytes = 0
+        self._baseline = None  # type: Optional[Dict[tracemalloc.Traceback, int]]
+        self._stage_cache = {}  # type: Dict[tracemalloc.Traceback, str]
+        self._frame_cache = {}  # type: Dict[tracemalloc.Frame, Optional[StageRule]]
+        self._started = self._rss_start = None
+        self._stop_tracing = False
+        self._sample_time = 0.0
+        self._task = None  # type: Optional[asyncio.Task]
+
+    def on_response(self, event: RequestEvent):
+        if event.endpoint == Api.endpoints['get_block'] and event.status is not None and event.status < 400:
+            self.blocks += 1
+            self.response_bytes += event.response_size or 0
+
+    def stage_of(self, traceback: tracemalloc.Traceback) -> str:
+        """The stage an allocation made at ``traceback`` is attributed to"""
+        stage = self._stage_cache.get(traceback)
+        if stage is None:
+            rule = next((r for r in map(self._rule_for, reversed(traceback)) if r is not None), None)
+            stage = self._stage_cache[traceback] = 'other' if rule is None else rule.stage
+        return stage
+
+    def _rule_for(self, frame: tracemalloc.Frame) -> Optional[StageRule]:
+        """The first rule matching ``frame`` (cached, as the same frames appear in many tracebacks)"""
+        try:
+            return self._frame_cache[frame]
+        except KeyError:
+            rule = self._frame_cache[frame] = next((r for r in self.rules if r.matches(frame)), None)
+            return rule
+
+    @staticmethod
+    def _snapshot() -> Dict[tracemalloc.Traceback, int]:
+        """
+        The bytes currently allocated at each traceback. :meth:`tracemalloc.Snapshot.filter_traces` and
+        :meth:`~tracemalloc.Snapshot.compare_to` are avoided, as they're far too slow with large snapshots - the
+        profiler's own allocations are left out by :meth:`.stage_of` instead.
+        """
+        return {st.traceback: st.size for st in tracemalloc.take_snapshot().statistics('traceback')}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._stop_tracing = True
+        elif tracemalloc.get_traceback_limit() < self.nframes:
+            log.warning("tracemalloc is already tracing with only %d frames - some allocations may not be "
+                        "attributed to the right stage", tracemalloc.get_traceback_limit())
+        if self.api is not None and self not in self.api.hooks:
+            self.api.add_hook(self)
+        self._baseline = self._snapshot()
+        self._started, self._rss_start = time.monotonic(), current_rss()
+        self.sample()
+        if self.interval:
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._sampler())
+            except RuntimeError:
+                log.warning("MemoryProfiler started outside of an event loop - only sampling on start() / stop()")
+
+    async def _sampler(self):
+        while True:
+            # Snapshots of a busy process can take seconds, blocking the event loop - back off so sampling doesn't
+            # take more than about a fifth of the time (requests would start timing out).
+            await asyncio.sleep(max(self.interval, self._sample_time * 4))
+            self.sample()
+
+    def sample(self) -> MemorySample:
+        """Take a snapshot now, attributing the memory allocated since :meth:`.start` to each stage"""
+        started = time.perf_counter()
+        stages, sites = defaultdict(int), defaultdict(list)
+        current, baseline = self._snapshot(), self._baseline
+        for traceback in set(current).union(baseline):
+            size = current.get(traceback, 0) - baseline.get(traceback, 0)
+            stage = self.stage_of(traceback)
+            if size == 0 or stage not in STAGES:
+                continue
+            stages[stage] += size
+            sites[stage].append((traceback, size))
+        top = {}
+        for stage, diffs in sites.items():
+            top[stage] = [self._site(tb) + (size,) for tb, size in heapq.nlargest(self.top, diffs, key=lambda d: d[1])]
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        s = MemorySample(
+            elapsed=time.monotonic() - self._started, blocks=self.blocks, rss=current_rss(), traced=traced,
+            traced_peak=traced_peak, stages={k: stages.get(k, 0) for k in STAGES}, sites=top,
+        )
+        self.samples.append(s)
+        self._sample_time = time.perf_counter() - started
+        log.debug("Memory sample %d took %.3f seconds", len(self.samples), self._sample_time)
+        return s
+
+    def _site(self, traceback: tracemalloc.Traceback) -> Tuple[str, int]:
+        """``(filename, lineno)`` of the innermost frame which matched a rule (or the innermost frame), for reports"""
+        frame = next((f for f in reversed(traceback) if self._rule_for(f) is not None), traceback[-1])
+        return frame.filename, frame.lineno
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._started is not None:
+            self.sample()
+        if self.api is not None and self in self.api.hooks:
+            self.api.remove_hook(self)
+        if self._stop_tracing:
+            tracemalloc.stop()
+            self._stop_tracing = False
+        self._baseline = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def report(self) -> dict:
+        """
+        A JSON serializable summary - the peak and final size of each stage, and the peak size per block loaded,
+        along with the final sample's largest allocation sites in each stage.
+        """
+        blocks = max(self.blocks, 1)
+        last = self.samples[-1] if len(self.samples) > 0 else None
+        stages = {}
+        for k in STAGES:
+            peak = max((s.stages[k] for s in self.samples), default=0)
+            stages[k] = dict(
+                peak_bytes=peak, final_bytes=0 if last is None else last.stages[k], bytes_per_block=peak / blocks,
+                top_sites=[] if last is None else [list(t) for t in last.sites.get(k, [])],
+            )
+        rss = [s.rss for s in self.samples if s.rss is not None]
+        return dict(
+            blocks=self.blocks, samples=len(self.samples), response_bytes_per_block=self.response_bytes / blocks,
+            rss_start=self._rss_start, rss_peak=max(rss, default=None), peak_rss=peak_rss(),
+            traced_peak=max((s.traced_peak for s in self.samples), default=0), stages=stages,
+        )
+
+    def format_report(self) -> str:
+        """:meth:`.report` as a human readable table"""
+        r, mib = self.report(), 1024 * 1024
+        rss = '-' if r['rss_peak'] is None else f"{r['rss_peak'] / mib:.1f} MiB"
+        if r['rss_peak'] is not None and r['rss_start'] is not None:
+            rss += f" (+{(r['rss_peak'] - r['rss_start']) / mib:.1f} MiB)"
+        lines = [
+            f"{r['blocks']} blocks, {r['samples']} samples, peak RSS {rss}, "
+            f"{r['response_bytes_per_block']:.0f} response bytes/block",
+            f"{'stage':<10}{'peak MiB':>12}{'final MiB':>12}{'bytes/block':>14}  top allocation",
+        ]
+        for k, st in r['stages'].items():
+            site = '-'
+            if len(st['top_sites']) > 0:
+                filename, lineno, _ = st['top_sites'][0]
+                site = f"{_short_path(filename)}:{lineno}"
+            lines.append(f"{k:<10}{st['peak_bytes'] / mib:>12.2f}{st['final_bytes'] / mib:>12.2f}"
+                         f"{st['bytes_per_block']:>14.0f}  {site}")
+        return '\n'.join(lines)
+
+
+def _short_path(filename: str, parts: int = 3) -> str:
+    return _SEP.join(filename.split(_SEP)[-parts:])
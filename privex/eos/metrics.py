@@ -0,0 +1,264 @@
+"""
+A small, dependency free metrics registry (counters, gauges and histograms with labels), exportable in the
+Prometheus text exposition format or as a plain dictionary snapshot.
+
+Metrics are disabled by default. Enable them by passing ``metrics=True`` (or your own :class:`.ApiMetrics`)
+to :class:`.Api`::
+
+    >>> eos = Api(metrics=True)
+    >>> await eos.get_block_range(94000000, 94001000)
+    >>> print(eos.metrics.to_prometheus())
+    # HELP eos_rpc_requests_total RPC requests completed, by node, endpoint and outcome
+    # TYPE eos_rpc_requests_total counter
+    eos_rpc_requests_total{node="https://eos.greymass.com",endpoint="/v1/chain/get_block",status="ok"} 1001
+    ...
+    >>> eos.metrics.snapshot()['eos_rpc_request_seconds']
+
+When disabled, the only cost on the request path is an ``if self.metrics is not None`` check.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Default histogram bucket upper bounds, in seconds"""
+
+
+def _fmt_value(v) -> str:
+    if isinstance(v, float):
+        if math.isinf(v):
+            return '+Inf' if v > 0 else '-Inf'
+        if v.is_integer():
+            return str(int(v))
+    return str(v)
+
+
+def _escape(v) -> str:
+    return str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence, extra: str = None) -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if len(parts) > 0 else ''
+
+
+class Metric:
+    """Base class for metrics. Values are stored per label value tuple, in the order of :attr:`.labels`."""
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str = '', labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = {}  # type: Dict[tuple, float]
+
+    def clear(self):
+        self.values.clear()
+
+    def _lines(self) -> List[str]:
+        return [f'{self.name}{_fmt_labels(self.labels, k)} {_fmt_value(v)}' for k, v in self.values.items()]
+
+    def to_prometheus(self) -> str:
+        head = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        return '\n'.join(head + self._lines())
+
+    def snapshot(self) -> list:
+        """A list of ``{"labels": {...}, "value": value}`` dictionaries"""
+        return [dict(labels=dict(zip(self.labels, k)), value=v) for k, v in self.values.items()]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    """
+    A histogram with fixed bucket upper bounds. Each label tuple maps to ``[bucket_counts, sum, count]``, where
+    ``bucket_counts`` are **not** cumulative (they're accumulated when exporting).
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str = '', labels: Sequence[str] = (), buckets: Sequence[float] = None):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(DEFAULT_BUCKETS if buckets is None else buckets))
+
+    def observe(self, value: float, *labels):
+        v = self.values.get(labels)
+        if v is None:
+            v = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        v[0][bisect_left(self.buckets, value)] += 1
+        v[1] += value
+        v[2] += 1
+
+    def _cumulative(self, counts: List[int]) -> List[Tuple[float, int]]:
+        total, res = 0, []
+        for le, c in zip(self.buckets + (float('inf'),), counts):
+            total += c
+            res.append((le, total))
+        return res
+
+    def _lines(self) -> List[str]:
+        lines = []
+        for k, (counts, total, count) in self.values.items():
+            for le, c in self._cumulative(counts):
+                le_label = 'le="%s"' % _fmt_value(le)
+                lines.append(f'{self.name}_bucket{_fmt_labels(self.labels, k, le_label)} {c}')
+            lines.append(f'{self.name}_sum{_fmt_labels(self.labels, k)} {_fmt_value(total)}')
+            lines.append(f'{self.name}_count{_fmt_labels(self.labels, k)} {count}')
+        return lines
+
+    def snapshot(self) -> list:
+        return [
+            dict(labels=dict(zip(self.labels, k)), sum=total, count=count,
+                 buckets={_fmt_value(le): c for le, c in self._cumulative(counts)})
+            for k, (counts, total, count) in self.values.items()
+        ]
+
+
+class MetricsRegistry:
+    """
+    A collection of metrics. ``collectors`` are called before each export, to update metrics which are cheaper
+    to read on demand (e.g. cache hit counts, node weights) than to track on every request.
+    """
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self.metrics = {}     # type: Dict[str, Metric]
+        self.collectors = []  # type: List[Callable[["MetricsRegistry"], None]]
+
+    def _add(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            return self.metrics[metric.name]
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str = '', labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self.prefix + name, help, labels))
+
+    def gauge(self, name: str, help: str = '', labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(self.prefix + name, help, labels))
+
+    def histogram(self, name: str, help: str = '', labels: Sequence[str] = (),
+                  buckets: Sequence[float] = None) -> Histogram:
+        return self._add(Histogram(self.prefix + name, help, labels, buckets))
+
+    def add_collector(self, func: Callable[["MetricsRegistry"], None]):
+        self.collectors.append(func)
+
+    def collect(self):
+        for c in self.collectors:
+            c(self)
+
+    def to_prometheus(self) -> str:
+        """Export every metric in the Prometheus text exposition format"""
+        self.collect()
+        return '\n'.join(m.to_prometheus() for m in self.metrics.values()) + '\n'
+
+    def snapshot(self) -> dict:
+        """Export every metric as a JSON serializable dictionary of ``{name: [values...]}``"""
+        self.collect()
+        return {name: m.snapshot() for name, m in self.metrics.items()}
+
+    def reset(self):
+        for m in self.metrics.values():
+            m.clear()
+
+
+class ApiMetrics(MetricsRegistry):
+    """The metrics tracked by :class:`.Api` and :class:`.NodeManager`"""
+    def __init__(self, prefix: str = 'eos_', buckets: Sequence[float] = None):
+        super().__init__(prefix)
+        node_ep = ('node', 'endpoint')
+        self.requests = self.counter(
+            'rpc_requests_total', 'RPC requests completed, by node, endpoint and outcome', node_ep + ('status',)
+        )
+        self.latency = self.histogram(
+            'rpc_request_seconds', 'RPC request latency in seconds, by node and endpoint', node_ep, buckets
+        )
+        self.bytes_received = self.counter('rpc_received_bytes_total', 'Response body bytes received', node_ep)
+        self.retries = self.counter('rpc_retries_total', 'RPC calls retried after an error', node_ep)
+        self.reroutes = self.counter(
+            'rpc_reroutes_total', "Calls re-routed because the node didn't have the block yet", node_ep
+        )
+        self.in_flight = self.gauge('rpc_in_flight', 'RPC requests currently in flight')
+        self.node_failures = self.counter('node_failures_total', 'Times each node was marked as failed', ('node',))
+        self.node_weight = self.gauge('node_weight', 'Current routing weight of each node', ('node',))
+        self.cache_hits = self.gauge('cache_hits', 'Cache hits since the cache was created', ('cache',))
+        self.cache_misses = self.gauge('cache_misses', 'Cache misses since the cache was created', ('cache',))
+        self.sched_queued = self.gauge('scheduler_queued', 'Requests waiting in the scheduler queue', ('priority',))
+        self.sched_served = self.gauge('scheduler_served', 'Requests started by the scheduler', ('priority',))
+        self.sched_wait_max = self.gauge(
+            'scheduler_wait_max_seconds', 'Longest time a request has waited in the scheduler queue', ('priority',)
+        )
+
+    def observe_response(self, node: str, endpoint: str, status: int, nbytes: int, elapsed: float):
+        """Record a completed HTTP request to ``node`` which returned ``nbytes`` bytes after ``elapsed`` seconds"""
+        self.requests.inc(node, endpoint, 'ok' if status < 400 else str(status))
+        self.latency.observe(elapsed, node, endpoint)
+        self.bytes_received.inc(node, endpoint, amount=nbytes)
+
+    def observe_error(self, node: str, endpoint: str, error: str, elapsed: float):
+        """Record a request to ``node`` which failed without a response, e.g. with a timeout or connection error"""
+        self.requests.inc(node, endpoint, error)
+        self.latency.observe(elapsed, node, endpoint)
+
+    def watch_cache(self, name: str, cache):
+        """Export the ``hits`` / ``misses`` counters of ``cache`` (e.g. a :class:`.HeadCache`) under ``name``"""
+        def _collect(reg: "ApiMetrics"):
+            reg.cache_hits.set(cache.hits, name)
+            reg.cache_misses.set(cache.misses, name)
+        self.add_collector(_collect)
+
+    def watch_scheduler(self, scheduler):
+        """Export the queue length, requests served and longest wait of each :class:`.RequestScheduler` class"""
+        def _collect(reg: "ApiMetrics"):
+            for name, st in scheduler.stats.items():
+                reg.sched_queued.set(st.queued, name)
+                reg.sched_served.set(st.served, name)
+                reg.sched_wait_max.set(st.wait_max, name)
+        self.add_collector(_collect)
+
+    def watch_nodes(self, node_manager):
+        """
+        Export the current routing weight of each node in ``node_manager``. Nodes which are currently excluded
+        from routing (recently failed, or lagging behind) are exported with a weight of ``0``.
+        """
+        def _collect(reg: "ApiMetrics"):
+            weights = {wn.node.url: wn.weight
+                       for wn in node_manager.get_weighted_nodes(filter_fail=True, filter_lag=True)}
+            reg.node_weight.clear()
+            for n in node_manager.get_nodes():
+                reg.node_weight.set(weights.get(n.url, 0), n.url)
+        self.add_collector(_collect)
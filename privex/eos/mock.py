@@ -0,0 +1,481 @@
+"""
+A local stand-in for nodeos, for benchmarking and failure testing without a network connection.
+
+:class:`.MockNode` is a small asyncio HTTP/1.1 server which serves ``get_info``, ``get_block``, ``get_block_info``,
+``get_account``, ``get_table_rows`` and ``get_supported_apis`` from a shared :class:`.MockChain` - either synthetic
+(generated deterministically from the block number) or recorded (blocks exported by :class:`.NDJSONSink`).
+
+Each node has its own :class:`.MockNodeConfig`, which can inject latency, slow "tail" requests, HTTP errors,
+rate limiting and head lag. All randomness is seeded, so runs are reproducible::
+
+    >>> cluster = MockCluster([
+    ...     MockNodeConfig(latency=0.01),
+    ...     MockNodeConfig(latency=0.05, slow_rate=0.05, slow_latency=1.0),
+    ...     MockNodeConfig(error_rate=0.2, head_lag=20),
+    ... ], chain=MockChain(head_block=100000))
+    >>> async with cluster:
+    ...     api = Api(node_manager=cluster.node_manager(), request_jitter=0)
+    ...     blocks = await api.get_block_range(99000, 99999)
+    ...     cluster.stats()
+
+Or run a cluster from the command line, and point any client at the printed URLs::
+
+    python3 -m privex.eos.mock --nodes 3 --latency 0.02 --error-rate 0.05 --head 100000
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Union
+
+import attr
+
+from privex.eos.objects import block_header
+
+log = logging.getLogger(__name__)
+
+GENESIS_MS = 1528473600000
+"""Synthetic block 1 is timestamped 2018-06-08T16:00:00.000 - later blocks follow every 500ms"""
+
+PRODUCERS = [
+    'eoshuobipool', 'eosnewyorkio', 'eoslaomaocom', 'eosinfstones', 'bitfinexeos1', 'zbeosbp11111',
+    'starteosiobp', 'eosiosg11111', 'eosflytomars', 'atticlabeosb', 'eoscannonchn', 'hashfineosio',
+    'eosauthority', 'eosrapidprod', 'newdex.bp', 'okcapitalbp1', 'eosbeijingbp', 'cochainworld',
+    'whaleex.com', 'big.one', 'eoscafeblock',
+]
+"""Producer schedule used for synthetic blocks (each producer signs 12 blocks in a row)"""
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 429: 'Too Many Requests',
+               500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _block_id(num: int) -> str:
+    return f'{num:08x}' + hashlib.sha256(str(num).encode()).hexdigest()[8:]
+
+
+def _timestamp(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+
+
+def _account_name(i: int) -> str:
+    """A valid, deterministic 12 character account name for the integer ``i``"""
+    chars = 'abcdefghijklmnopqrstuvwxyz12345'
+    name = chars[i % 26]
+    i //= 26
+    for _ in range(11):
+        name += chars[i % len(chars)]
+        i //= len(chars)
+    return name
+
+
+def synthetic_block(num: int, txs_per_block: int = 3) -> dict:
+    """Generate the ``get_block`` response for block ``num``. The same block is always generated for ``num``."""
+    rng = random.Random(num)
+    txs = []
+    for i in range(rng.randint(0, txs_per_block * 2)):
+        sender, receiver = _account_name(rng.randint(0, 5000)), _account_name(rng.randint(0, 5000))
+        action = dict(
+            account='eosio.token', name='transfer', authorization=[dict(actor=sender, permission='active')],
+            data={'from': sender, 'to': receiver, 'quantity': f'{rng.randint(1, 1000000) / 10000:.4f} EOS',
+                  'memo': f'mock {num}:{i}'},
+            hex_data='00'
+        )
+        txs.append(dict(
+            status='executed', cpu_usage_us=rng.randint(100, 5000), net_usage_words=rng.randint(12, 40),
+            trx=dict(
+                id=hashlib.sha256(f'{num}:{i}'.encode()).hexdigest(), signatures=[], compression='none',
+                packed_context_free_data='', context_free_data=[], packed_trx='',
+                transaction=dict(expiration=_timestamp(GENESIS_MS + num * 500 + 30000), ref_block_num=num & 0xffff,
+                                 ref_block_prefix=1, actions=[action])
+            )
+        ))
+    return dict(
+        timestamp=_timestamp(GENESIS_MS + (num - 1) * 500), producer=PRODUCERS[(num // 12) % len(PRODUCERS)],
+        confirmed=0, previous=_block_id(num - 1), transaction_mroot='0' * 64, action_mroot='0' * 64,
+        schedule_version=1, new_producers=None, header_extensions=[], producer_signature='SIG_K1_mock',
+        transactions=txs, block_extensions=[], id=_block_id(num), block_num=num, ref_block_prefix=1,
+    )
+
+
+def synthetic_account(name: str, head_block_num: int) -> dict:
+    """Generate a ``get_account`` response for ``name``"""
+    rng = random.Random(name)
+    return dict(
+        account_name=name, head_block_num=head_block_num, privileged=False,
+        head_block_time=_timestamp(GENESIS_MS + (head_block_num - 1) * 500),
+        last_code_update='1970-01-01T00:00:00.000', created='2018-06-09T12:10:43.500',
+        core_liquid_balance=f'{rng.randint(0, 10 ** 8) / 10000:.4f} EOS', ram_quota=rng.randint(3000, 100000),
+        net_weight=rng.randint(0, 10 ** 6), cpu_weight=rng.randint(0, 10 ** 6), ram_usage=rng.randint(2000, 3000),
+        permissions=[], total_resources={}, self_delegated_bandwidth={}, refund_request=None, voter_info={},
+        net_limit=dict(used=1, available=2, max=3), cpu_limit=dict(used=1, available=2, max=3),
+    )
+
+
+def rpc_error(code: int, name: str, what: str, http_code: int = 500) -> Tuple[int, dict]:
+    """A nodeos style error response, as ``(http_status, body)``"""
+    return http_code, dict(code=http_code, message='Internal Service Error',
+                           error=dict(code=code, name=name, what=what, details=[]))
+
+
+class MockChain:
+    """
+    The chain state served by every :class:`.MockNode` - synthetic by default, optionally overlaid with
+    recorded ``blocks``, ``accounts`` and table rows.
+
+    ``tables`` maps ``(code, table, scope)`` to a list of rows. Without it, ``eosio.token`` ``accounts`` rows are
+    generated for any scope. Pages of table rows are addressed by row offset - ``next_key`` is the offset of the
+    next row, which clients pass back as ``lower_bound``.
+    """
+    def __init__(self, head_block: int = 100000, first_block: int = 1, advance: bool = False,
+                 block_interval: float = 0.5, blocks: Dict[int, dict] = None, accounts: Dict[str, dict] = None,
+                 tables: Dict[Tuple[str, str, str], List[dict]] = None, txs_per_block: int = 3):
+        """
+        :param int head_block: The head block when the chain is created
+        :param int first_block: The lowest block available - older blocks return ``unknown_block_exception``
+        :param bool advance: If ``True``, the head advances by one block every ``block_interval`` seconds
+        :param dict blocks: Recorded blocks to serve instead of synthetic ones, mapped by block number
+        :param dict accounts: Recorded ``get_account`` responses. If given, other accounts don't exist.
+        :param dict tables: Recorded table rows, mapped by ``(code, table, scope)``
+        :param int txs_per_block: The average number of transactions in each synthetic block
+        """
+        self.head_block, self.first_block = int(head_block), int(first_block)
+        self.advance, self.block_interval = advance, float(block_interval)
+        self.blocks, self.accounts, self.tables = blocks or {}, accounts, tables
+        self.txs_per_block = int(txs_per_block)
+        self.started = time.monotonic()
+
+    @classmethod
+    def from_ndjson(cls, folder: str, prefix: str = 'blocks', **kwargs) -> "MockChain":
+        """Serve the blocks recorded by :class:`.NDJSONSink` in ``folder`` (blocks outside them are synthetic)"""
+        from privex.eos.export import NDJSONReader
+        blocks = {b['block_num']: b for b in NDJSONReader(folder, prefix).read()}
+        if len(blocks) > 0:
+            kwargs = dict(dict(head_block=max(blocks), first_block=min(blocks)), **kwargs)
+        return cls(blocks=blocks, **kwargs)
+
+    @property
+    def head(self) -> int:
+        if not self.advance:
+            return self.head_block
+        return self.head_block + int((time.monotonic() - self.started) / self.block_interval)
+
+    def get_info(self, head_lag: int = 0) -> dict:
+        head = max(self.first_block, self.head - head_lag)
+        lib = max(self.first_block, head - 330)
+        return dict(
+            server_version='mock', chain_id='0' * 64, head_block_num=head, last_irreversible_block_num=lib,
+            last_irreversible_block_id=_block_id(lib), head_block_id=_block_id(head),
+            head_block_time=_timestamp(GENESIS_MS + (head - 1) * 500), head_block_producer=PRODUCERS[(head // 12) % 21],
+            virtual_block_cpu_limit=200000000, virtual_block_net_limit=1048576000, block_cpu_limit=199900,
+            block_net_limit=1048576, server_version_string='v2.0.0-mock',
+        )
+
+    def get_block(self, num: int) -> dict:
+        b = self.blocks.get(num)
+        return synthetic_block(num, self.txs_per_block) if b is None else b
+
+    def get_account(self, name: str) -> Optional[dict]:
+        if self.accounts is not None:
+            return self.accounts.get(name)
+        return synthetic_account(name, self.head)
+
+    def table_rows(self, code: str, table: str, scope: str) -> List[dict]:
+        if self.tables is not None:
+            return self.tables.get((code, table, scope), [])
+        if code == 'eosio.token' and table == 'accounts':
+            return [dict(balance=synthetic_account(scope, 0)['core_liquid_balance'])]
+        return []
+
+
+@attr.s
+class MockNodeConfig:
+    """Failure and performance characteristics of a single :class:`.MockNode`"""
+    latency = attr.ib(type=float, default=0.0)
+    """Seconds to wait before every response"""
+    jitter = attr.ib(type=float, default=0.0)
+    """Up to this many extra seconds (uniformly random) are added to each response"""
+    slow_rate = attr.ib(type=float, default=0.0)
+    """Fraction of requests (0 - 1) which take ``slow_latency`` seconds instead - to model tail latency"""
+    slow_latency = attr.ib(type=float, default=1.0)
+    error_rate = attr.ib(type=float, default=0.0)
+    """Fraction of requests (0 - 1) which fail with an HTTP 503"""
+    rate_limit = attr.ib(type=float, default=None)
+    """Maximum requests per second (with an equal burst allowance) - excess requests get an HTTP 429"""
+    head_lag = attr.ib(type=int, default=0)
+    """Number of blocks this node is behind the chain head"""
+    seed = attr.ib(type=int, default=None)
+    """Random seed for this node's latency / error injection. Defaults to the node's position in its cluster."""
+
+
+class MockNode:
+    """
+    A single mock nodeos HTTP server. Supports keep-alive, so pooled clients behave as they would against a real
+    node. Request counts are kept in :attr:`.stats`.
+    """
+    def __init__(self, chain: MockChain = None, config: MockNodeConfig = None, host: str = '127.0.0.1',
+                 port: int = 0):
+        self.chain = MockChain() if chain is None else chain
+        self.config = MockNodeConfig() if config is None else config
+        self.host, self.port = host, int(port)
+        self.rng = random.Random(self.config.seed)
+        self.server = None  # type: Optional[asyncio.AbstractServer]
+        self.stats = dict(requests=0, errors=0, rate_limited=0, not_found=0, connections=0)
+        self._tokens, self._tokens_at = self.config.rate_limit or 0.0, time.monotonic()
+        self.routes = {
+            '/v1/chain/get_info': self.get_info,
+            '/v1/chain/get_block': self.get_block,
+            '/v1/chain/get_block_info': self.get_block_info,
+            '/v1/chain/get_account': self.get_account,
+            '/v1/chain/get_table_rows': self.get_table_rows,
+            '/v1/node/get_supported_apis': self.get_supported_apis,
+        }
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    async def start(self) -> "MockNode":
+        self.server = await asyncio.start_server(self._handle_conn, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        log.debug("Mock node listening on %s", self.url)
+        return self
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    # --- Endpoints. Each returns ``(http_status, body)`` ---
+
+    def get_info(self, params: dict) -> Tuple[int, dict]:
+        return 200, self.chain.get_info(self.config.head_lag)
+
+    def get_block(self, params: dict) -> Tuple[int, dict]:
+        num = params.get('block_num_or_id')
+        if isinstance(num, str) and not num.isdigit():
+            num = int(num[:8], 16)
+        num = int(num)
+        if num < self.chain.first_block or num > self.chain.head - self.config.head_lag:
+            return rpc_error(3100002, 'unknown_block_exception', 'Unknown block')
+        return 200, self.chain.get_block(num)
+
+    def get_block_info(self, params: dict) -> Tuple[int, dict]:
+        status, res = self.get_block(dict(block_num_or_id=params.get('block_num')))
+        return status, block_header(res) if status == 200 else res
+
+    def get_account(self, params: dict) -> Tuple[int, dict]:
+        acc = self.chain.get_account(params.get('account_name'))
+        if acc is None:
+            return rpc_error(3060002, 'account_query_exception', 'Account Query Exception')
+        return 200, acc
+
+    def get_table_rows(self, params: dict) -> Tuple[int, dict]:
+        rows = self.chain.table_rows(params.get('code'), params.get('table'), params.get('scope'))
+        offset = int(params.get('lower_bound') or 0)
+        limit = int(params.get('limit', 10))
+        page = rows[offset:offset + limit]
+        more = offset + limit < len(rows)
+        return 200, dict(rows=page, more=more, next_key=str(offset + limit) if more else '')
+
+    def get_supported_apis(self, params: dict) -> Tuple[int, dict]:
+        return 200, dict(apis=list(self.routes.keys()))
+
+    # --- Failure injection ---
+
+    def _rate_limited(self) -> bool:
+        limit = self.config.rate_limit
+        if not limit:
+            return False
+        now = time.monotonic()
+        self._tokens = min(limit, self._tokens + (now - self._tokens_at) * limit)
+        self._tokens_at = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def _delay(self) -> float:
+        c = self.config
+        if c.slow_rate > 0 and self.rng.random() < c.slow_rate:
+            return c.slow_latency
+        return c.latency + (self.rng.random() * c.jitter if c.jitter > 0 else 0.0)
+
+    async def respond(self, path: str, body: bytes) -> Tuple[int, Union[dict, str]]:
+        """Work out the response to a request for ``path`` with the raw request ``body``"""
+        self.stats['requests'] += 1
+        if self._rate_limited():
+            self.stats['rate_limited'] += 1
+            return 429, 'Too Many Requests'
+        delay = self._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.config.error_rate > 0 and self.rng.random() < self.config.error_rate:
+            self.stats['errors'] += 1
+            return 503, 'Service Unavailable'
+        handler = self.routes.get(path)
+        if handler is None:
+            self.stats['not_found'] += 1
+            return rpc_error(0, 'not_found', 'Unknown Endpoint', http_code=404)
+        try:
+            params = json.loads(body) if len(body) > 0 else {}
+        except ValueError:
+            return rpc_error(3200006, 'parse_error_exception', 'Invalid JSON', http_code=400)
+        return handler(params if isinstance(params, dict) else {})
+
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['connections'] += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                method, path = lines[0].split(' ')[:2]
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        k, v = line.split(':', 1)
+                        headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, res = await self.respond(path.split('?')[0], body)
+                data = res.encode() if isinstance(res, str) else json.dumps(res, separators=(',', ':')).encode()
+                ctype = 'text/plain' if isinstance(res, str) else 'application/json'
+                close = headers.get('connection', '').lower() == 'close'
+                writer.write(
+                    f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "Unknown")}\r\nContent-Type: {ctype}\r\n'
+                    f'Content-Length: {len(data)}\r\nConnection: {"close" if close else "keep-alive"}\r\n\r\n'
+                    .encode() + data
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class MockCluster:
+    """A group of :class:`.MockNode`'s sharing one :class:`.MockChain`, each with its own :class:`.MockNodeConfig`"""
+    def __init__(self, configs: List[MockNodeConfig] = None, chain: MockChain = None, host: str = '127.0.0.1'):
+        configs = [MockNodeConfig()] if configs is None else configs
+        self.chain = MockChain() if chain is None else chain
+        self.nodes = []  # type: List[MockNode]
+        for i, c in enumerate(configs):
+            if c.seed is None:
+                c = attr.evolve(c, seed=i)
+            self.nodes.append(MockNode(self.chain, c, host=host))
+
+    @property
+    def urls(self) -> List[str]:
+        return [n.url for n in self.nodes]
+
+    async def start(self) -> "MockCluster":
+        for n in self.nodes:
+            await n.start()
+        return self
+
+    async def stop(self):
+        for n in self.nodes:
+            await n.stop()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def register(self, node_manager) -> int:
+        """Add this cluster's nodes to ``node_manager``. The cluster must be started first, so the ports are known."""
+        return node_manager.bulk_insert(*[dict(url=u, network=node_manager.network) for u in self.urls])
+
+    def node_manager(self, network: str = 'eos', **kwargs):
+        """Returns a new :class:`.NodeManager` with an in-memory database, holding only this cluster's nodes"""
+        from privex.eos.adapters import SqliteAdapter
+        from privex.eos.node import NodeManager
+        kwargs = dict(dict(adapter=SqliteAdapter(db=':memory:')), **kwargs)
+        nm = NodeManager(network=network, **kwargs)
+        self.register(nm)
+        return nm
+
+    def stats(self) -> Dict[str, dict]:
+        """The request :attr:`.MockNode.stats` of each node, by URL"""
+        return {n.url: dict(n.stats) for n in self.nodes}
+
+
+async def _serve(args):
+    cfg = MockNodeConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                         rate_limit=args.rate_limit, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    if args.recorded:
+        chain = MockChain.from_ndjson(args.recorded, prefix=args.prefix, advance=args.advance)
+    else:
+        chain = MockChain(head_block=args.head, advance=args.advance, txs_per_block=args.txs_per_block)
+    overrides = [{}] * args.nodes if args.configs is None else json.loads(args.configs)
+    configs = [attr.evolve(cfg, **dict(dict(head_lag=args.head_lag * i), **o)) for i, o in enumerate(overrides)]
+    cluster = MockCluster(configs, chain=chain, host=args.host)
+    for i, n in enumerate(cluster.nodes):
+        n.port = args.port + i if args.port else 0
+    async with cluster:
+        for u in cluster.urls:
+            print(u, flush=True)
+        while True:
+            await asyncio.sleep(3600)
+
+
+def main():
+    import argparse
+    p = argparse.ArgumentParser(description='Run a cluster of local mock nodeos servers')
+    p.add_argument('--nodes', type=int, default=3)
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=0, help='First port to listen on (default: random ports)')
+    p.add_argument('--head', type=int, default=100000, help='Head block number of the synthetic chain')
+    p.add_argument('--advance', action='store_true', help='Produce a new block every 0.5 seconds')
+    p.add_argument('--recorded', default=None, help='Folder of NDJSON block segments to serve')
+    p.add_argument('--prefix', default='blocks', help='Segment file name prefix within --recorded')
+    p.add_argument('--latency', type=float, default=0.0)
+    p.add_argument('--jitter', type=float, default=0.0)
+    p.add_argument('--slow-rate', type=float, default=0.0)
+    p.add_argument('--slow-latency', type=float, default=1.0)
+    p.add_argument('--error-rate', type=float, default=0.0)
+    p.add_argument('--rate-limit', type=float, default=None)
+    p.add_argument('--head-lag', type=int, default=0, help='Each node lags this many blocks more than the last')
+    p.add_argument('--txs-per-block', type=int, default=3, help='Average transactions in each synthetic block')
+    p.add_argument('--configs', default=None,
+                   help='JSON list of MockNodeConfig fields for each node, overriding the options above '
+                        '(and --nodes), e.g. \'[{"error_rate": 0.5}, {}]\'')
+    try:
+        asyncio.run(_serve(p.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@ import sqlite3
 import logging
 from datetime import datetime, timedelta
 from os.path import join, expanduser
-from typing import Optional, List, Tuple, Union
+from typing import Optional, List, Tuple, Union, Dict, TYPE_CHECKING
 
 from dateutil.tz import tzutc
 from privex.helpers import empty, DictObject, empty_if
@@ -12,7 +12,10 @@ from privex.helpers import empty, DictObject, empty_if
 from privex.db import SqliteWrapper
 
 from privex.eos.adapters import SqliteAdapter, BaseAdapter
-from privex.eos.objects import convert_datetime, convert_bool_int, Node, WeightedNode
+from privex.eos.objects import convert_datetime, convert_bool_int, Node, WeightedNode, NodeHealth
+
+if TYPE_CHECKING:
+    from privex.eos.metrics import ApiMetrics
 
 log = logging.getLogger(__name__)
 
@@ -70,6 +73,14 @@ NODE_MANAGER_SCHEMA = [
         "    node_id INTEGER NOT NULL, api TEXT NOT NULL, failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
         "    FOREIGN KEY(node_id) REFERENCES nodes(id)"
         ");",
+    ),
+    (
+        'node_health',
+        "CREATE TABLE node_health ("
+        "    node_id INTEGER PRIMARY KEY, head_block_num INTEGER NULL, last_irreversible_block_num INTEGER NULL,"
+        "    latency_ms REAL NULL, error TEXT NULL, checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+        "    FOREIGN KEY(node_id) REFERENCES nodes(id)"
+        ");",
     )
 ]
 
@@ -112,6 +123,12 @@ class NodeManager:
     DEFAULT_NETWORK = 'eos'
     """If a network isn't specified to a method, use this network by default."""
     
+    DEFAULT_MAX_HEAD_LAG = 30
+    """Stop routing to nodes whose last probed head is more than this many blocks behind the highest probed head"""
+    
+    DEFAULT_HEALTH_MAX_AGE = 60
+    """Ignore node health probe results older than this many seconds"""
+    
     # SCHEMAS: List[Tuple[str, str]] = NODE_MANAGER_SCHEMA
     
     network: str
@@ -126,6 +143,9 @@ class NodeManager:
         if self.adapter is None:
             self.adapter = DEFAULT_ADAPTER()
         self.adapter.query_mode = kwargs.pop('query_mode', 'dict')
+        self.max_head_lag = kwargs.pop('max_head_lag', self.DEFAULT_MAX_HEAD_LAG)
+        self.health_max_age = kwargs.pop('health_max_age', self.DEFAULT_HEALTH_MAX_AGE)
+        self.metrics = kwargs.pop('metrics', None)  # type: Optional[ApiMetrics]
         # super().__init__(db=db, query_mode=self.query_mode, **kwargs)
 
     def builder(self, table): return self.adapter.builder(table)
@@ -155,7 +175,78 @@ class NodeManager:
             node_id = node if type(node) is int else node.id
         self.adapter.action("UPDATE nodes SET fail_count = fail_count + 1, last_fail = ? "
                             "WHERE id = ?;", [datetime.utcnow(), node_id])
-        return self.node_by_id(node_id)
+        n = self.node_by_id(node_id)
+        if self.metrics is not None:
+            self.metrics.node_failures.inc(n.url)
+        return n
+    
+    def record_health(self, node: Union[Node, int], head_block_num: int = None, last_irreversible_block_num: int = None,
+                      latency_ms: float = None, error: str = None):
+        """
+        Store the result of a health probe of ``node`` (see :class:`.NodeProber`), replacing its previous result.
+        
+        :param Node|int node: The :class:`.Node` (or node ID) which was probed
+        :param int head_block_num: The head block reported by the node
+        :param int last_irreversible_block_num: The LIB reported by the node
+        :param float latency_ms: How long the probe took, in milliseconds
+        :param str error: If the probe failed, a description of the error
+        """
+        node_id = node if type(node) is int else node.id
+        self.adapter.action(
+            "INSERT OR REPLACE INTO node_health "
+            "(node_id, head_block_num, last_irreversible_block_num, latency_ms, error, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?);",
+            [node_id, head_block_num, last_irreversible_block_num, latency_ms, error, datetime.utcnow()]
+        )
+    
+    def node_health(self, max_age: float = None) -> Dict[int, NodeHealth]:
+        """
+        Get the latest health probe results, mapped by node ID.
+        
+        :param float max_age: Ignore results older than this many seconds (default: :attr:`.health_max_age`).
+                              Pass ``0`` to return every result regardless of age.
+        :return Dict[int, NodeHealth] health: A dict mapping node IDs to :class:`.NodeHealth` objects
+        """
+        max_age = self.health_max_age if max_age is None else max_age
+        sql, params = "SELECT * FROM node_health", []
+        if max_age:
+            sql += " WHERE checked_at >= ?"
+            params.append(datetime.utcnow() - timedelta(seconds=max_age))
+        return {r['node_id']: NodeHealth(**r) for r in self.adapter.fetchall(sql + ';', params, query_mode='dict')}
+    
+    def filter_lagging(self, nodes: List[Node], max_head_lag: int = None,
+                       health: Dict[int, NodeHealth] = None) -> List[Node]:
+        """
+        Remove nodes whose latest health probe failed, or found them more than ``max_head_lag`` blocks behind the
+        highest head seen across all probed nodes. Nodes without a recent probe result are kept.
+        
+        If every node would be removed, ``nodes`` is returned unchanged - a lagging node is better than no node.
+        
+        :param List[Node] nodes: The nodes to filter
+        :param int max_head_lag: Maximum blocks behind the chain head (default: :attr:`.max_head_lag`)
+        :param dict health: Health results already loaded with :meth:`.node_health` (loaded if not passed)
+        :return List[Node] nodes: The nodes which aren't lagging
+        """
+        max_head_lag = self.max_head_lag if max_head_lag is None else max_head_lag
+        if max_head_lag is None:
+            return nodes
+        health = self.node_health() if health is None else health
+        if len(health) == 0:
+            return nodes
+        heads = [h.head_block_num for h in health.values() if h.ok]
+        chain_head = max(heads) if len(heads) > 0 else None
+        
+        def _healthy(n: Node) -> bool:
+            h = health.get(n.id)
+            if h is None:
+                return True
+            return h.ok and chain_head - h.head_block_num <= max_head_lag
+        
+        healthy = [n for n in nodes if _healthy(n)]
+        if len(healthy) == 0 and len(nodes) > 0:
+            log.warning("All %d nodes are lagging or failed their last health probe - not filtering any.", len(nodes))
+            return nodes
+        return healthy
     
     @property
     def node_count(self) -> int:
@@ -231,13 +322,16 @@ class NodeManager:
             
         return rows_affected
     
-    def get_nodes(self, *networks, filter_fail=False) -> List[Node]:
+    def get_nodes(self, *networks, filter_fail=False, filter_lag=False, health=None) -> List[Node]:
         """
         Get a list of :class:`.Node` objects.
         
         :param str networks: Restrict the node list to nodes on these networks
         :param bool filter_fail: If set to ``True``, nodes which have their ``last_fail`` within the past
                                  5 seconds will be removed from the returned node list.
+        :param bool filter_lag: If set to ``True``, nodes which are lagging behind the chain head (according to their
+                                latest health probe) will be removed. See :meth:`.filter_lagging`
+        :param dict health: Health results for ``filter_lag``, if they've already been loaded with :meth:`.node_health`
         :return List[Node] nodes: A list of :class:`.Node` objects.
         """
         # c = self.conn.cursor()
@@ -257,6 +351,8 @@ class NodeManager:
                 if n.last_fail > secs_ago:
                     continue
             nodes += [n]
+        if filter_lag:
+            nodes = self.filter_lagging(nodes, health=health)
         return nodes
         
         # # for r in self.fetch("SELECT * FROM nodes WHERE network IN (?)", [list(networks)]):
@@ -270,12 +366,12 @@ class NodeManager:
         
         # return nodes
 
-    def get_weighted_nodes(self, *networks, filter_fail=False) -> List[WeightedNode]:
+    def get_weighted_nodes(self, *networks, filter_fail=False, filter_lag=False, health=None) -> List[WeightedNode]:
         nb = self.node_builder
         total_fails = nb.select('SUM(fail_count) as total_fails')[0]['total_fails']
         total_fails = int(total_fails)
         
-        nodes = self.get_nodes(*networks, filter_fail=filter_fail)
+        nodes = self.get_nodes(*networks, filter_fail=filter_fail, filter_lag=filter_lag, health=health)
         # weighted_nodes = []
         # for n in nodes:
         #     weight = math.ceil(total_fails / (n.fail_count + 1))
@@ -1,12 +1,40 @@
+import calendar
 from datetime import datetime
 from typing import Union, List, Optional
 
 import attr
 from dateutil.parser import parse
-from privex.coin_handlers.base.objects import AttribDictable
+from dateutil.tz import tzutc
 from privex.helpers import empty, is_true, convert_datetime, DictObject
 
 
+@attr.s
+class AttribDictable:
+    """
+    Mixin for attrs classes, allowing them to be accessed like a dict (``block['producer']``, ``block.get('id')``)
+    and cast with ``dict(obj)``. Defined here rather than imported from ``privex-coinhandlers``, which pulls in every
+    coin handler (and their dependencies) on import.
+    """
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        """Handle casting via ``dict(myclass)``"""
+        for k, v in attr.asdict(self).items():
+            yield k, v
+
+    def __getitem__(self, key):
+        if hasattr(self, key):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        return setattr(self, key, value)
+
+
 def attr_dict(cls: type, data: dict):
     """
     Removes keys from the passed dict ``data`` which don't exist on ``cls`` (thus would get rejected as kwargs),
@@ -114,6 +142,31 @@ class EOSTransaction(AttribDictable):
         return [attr_dict(EOSTransaction, d) for d in data]
 
 
+@attr.s
+class EOSAction(AttribDictable):
+    """
+    A single action flattened out of a block's ``transactions`` -> ``trx`` -> ``transaction`` -> ``actions`` tree,
+    carrying the block number, transaction ID and position it was found at.
+    """
+    block_num = attr.ib(type=int)
+    trx_id = attr.ib(type=str)
+    trx_index = attr.ib(type=int)
+    """The index of the action's transaction within the block's ``transactions`` list"""
+    action_index = attr.ib(type=int)
+    """The index of the action within the transaction's ``actions`` list"""
+    account = attr.ib(type=str)
+    name = attr.ib(type=str)
+    authorization = attr.ib(type=List[dict], factory=list)
+    data = attr.ib(type=Union[dict, str], default=None)
+    hex_data = attr.ib(type=str, default=None)
+    timestamp = attr.ib(type=str, default=None)
+    status = attr.ib(type=str, default=None)
+
+    @staticmethod
+    def from_dict(data: dict):
+        return attr_dict(EOSAction, data)
+
+
 @attr.s
 class EOSBlock(AttribDictable):
     timestamp = attr.ib(type=str)
@@ -142,11 +195,59 @@ class EOSBlock(AttribDictable):
         return [attr_dict(EOSBlock, d) for d in data]
 
 
+@attr.s
+class EOSBlockHeader(AttribDictable):
+    """
+    A compact block header, without any transactions - as returned by :meth:`.Api.get_block_header`. Much cheaper
+    to download and construct than a full :class:`.EOSBlock` when scanning ranges for producers / timestamps.
+    """
+    timestamp = attr.ib(type=str)
+    producer = attr.ib(type=str)
+    block_num = attr.ib(type=int)
+    id = attr.ib(type=str, default=None)
+    previous = attr.ib(type=str, default=None)
+    confirmed = attr.ib(type=int, default=0)
+    ref_block_prefix = attr.ib(type=int, default=None)
+    schedule_version = attr.ib(type=int, default=None)
+    transaction_mroot = attr.ib(type=str, default=None)
+    action_mroot = attr.ib(type=str, default=None)
+    producer_signature = attr.ib(type=str, default=None)
+    
+    @staticmethod
+    def from_dict(data: dict):
+        return attr_dict(EOSBlockHeader, data)
+
+
+HEADER_KEYS = tuple(f.name for f in attr.fields(EOSBlockHeader))
+"""The keys of a raw block which are kept by :func:`.block_header`"""
+
+
+def block_header(block: dict) -> dict:
+    """Strip a raw block dictionary down to just its header fields (see :class:`.EOSBlockHeader`)"""
+    return {k: block[k] for k in HEADER_KEYS if k in block}
+
+
+def fast_convert_datetime(d) -> Optional[datetime]:
+    """
+    Same as :func:`.convert_datetime`, but ISO8601 strings such as ``2019-12-08T23:19:55.000`` (used throughout
+    the EOS RPC API) are parsed with :meth:`datetime.fromisoformat`, which is far faster than dateutil's parser.
+    
+    Naive date/times are assumed to be UTC, just like :func:`.convert_datetime`.
+    """
+    if type(d) is str:
+        try:
+            t = datetime.fromisoformat(d)
+            return t if t.tzinfo is not None else t.replace(tzinfo=tzutc())
+        except (ValueError, AttributeError):
+            pass
+    return convert_datetime(d)
+
+
 @attr.s
 class EOSAccount(AttribDictable):
     account_name = attr.ib(type=str)
-    last_code_update = attr.ib(type=str, converter=convert_datetime)
-    created = attr.ib(type=str, converter=convert_datetime)
+    last_code_update = attr.ib(type=str, converter=fast_convert_datetime)
+    created = attr.ib(type=str, converter=fast_convert_datetime)
     core_liquid_balance = attr.ib(type=str)
     ram_quota = attr.ib(type=int)
     net_weight = attr.ib(type=int)
@@ -192,6 +293,44 @@ def convert_int_bool(d, if_empty=True) -> bool:
     return is_true(d)
 
 
+_DAY_MS_CACHE = {}
+
+
+def block_time_ms(ts: str) -> int:
+    """
+    Convert an EOS block timestamp string (UTC, e.g. ``2019-12-08T23:19:55.500``) into integer milliseconds since
+    the unix epoch.
+    
+    This is much faster than :func:`.convert_datetime` for the fixed format used by block timestamps, as the epoch
+    for each date is only calculated once, and the time portion is sliced out directly.
+    
+        >>> block_time_ms('2019-12-08T23:19:55.500')
+        1575847195500
+    
+    """
+    day = ts[:10]
+    day_ms = _DAY_MS_CACHE.get(day)
+    if day_ms is None:
+        day_ms = _DAY_MS_CACHE[day] = calendar.timegm((int(ts[0:4]), int(ts[5:7]), int(ts[8:10]), 0, 0, 0)) * 1000
+    ms = int(ts[20:23].ljust(3, '0')) if len(ts) > 20 else 0
+    return day_ms + int(ts[11:13]) * 3600000 + int(ts[14:16]) * 60000 + int(ts[17:19]) * 1000 + ms
+
+
+class BulkResult(dict):
+    """
+    The result of a bulk call such as :meth:`.Api.get_accounts` - a dictionary mapping each requested key to its
+    successful result, with any keys which failed mapped to their exception in :attr:`.errors`.
+    """
+    def __init__(self, *args, errors: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = {} if errors is None else errors
+    
+    @property
+    def ok(self) -> bool:
+        """``True`` if every requested key succeeded"""
+        return len(self.errors) == 0
+
+
 @attr.s
 class Node(AttribDictable):
     id = attr.ib(type=Optional[int])
@@ -205,6 +344,21 @@ class Node(AttribDictable):
     updated_at = attr.ib(type=datetime, default=None, converter=convert_datetime)
 
 
+@attr.s
+class NodeHealth(AttribDictable):
+    """The result of the latest ``get_info`` health probe of a node (see :class:`.NodeProber`)"""
+    node_id = attr.ib(type=int)
+    head_block_num = attr.ib(type=int, default=None)
+    last_irreversible_block_num = attr.ib(type=int, default=None)
+    latency_ms = attr.ib(type=float, default=None)
+    error = attr.ib(type=str, default=None)
+    checked_at = attr.ib(type=datetime, default=None, converter=convert_datetime)
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.head_block_num is not None
+
+
 @attr.s
 class WeightedNode(AttribDictable):
     node = attr.ib(type=Node)
@@ -0,0 +1,219 @@
+"""
+A request scheduler which sits in front of the HTTP transport of an :class:`.Api`, so that latency sensitive calls
+(e.g. ``get_account`` / ``get_info``) aren't stuck behind thousands of ``get_block`` requests from a bulk import.
+
+At most ``max_in_flight`` requests are sent at once. Further requests wait in a queue per priority class, and
+whenever a request finishes, the next one is picked using weighted fair queuing (self-clocked fair queuing, to be
+exact) - each class gets a share of the request slots in proportion to its weight while it has requests waiting.
+With the default weights, ``interactive`` calls get 16 slots for every ``bulk`` one, so even while a bulk import
+keeps every slot busy, an interactive call only waits for the next slot to free up.
+
+By default, block requests are ``bulk`` and everything else is ``interactive``::
+
+    >>> eos = Api(scheduler=RequestScheduler(max_in_flight=32))
+    >>> blocks = asyncio.ensure_future(eos.get_block_range(94000000, 94100000))
+    >>> acc = await eos.get_account('someguy12333')     # Isn't queued behind the 100,000 blocks
+
+Use :func:`.priority` (or :meth:`.Api.priority`) to put every call made within a block of code - including the
+calls made by tasks started inside it - into a given class::
+
+    >>> with eos.priority('bulk'):
+    ...     accounts = await eos.get_accounts(all_holders)
+
+A scheduler can be shared between several :class:`.Api` instances which use the same nodes.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterable, Optional
+
+import attr
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WEIGHTS = {'interactive': 16, 'bulk': 1}
+"""Default priority classes, mapped to their weight (share of request slots)"""
+
+BULK_ENDPOINTS = (
+    '/v1/chain/get_block', '/v1/chain/get_block_info', '/v1/chain/get_block_header_state',
+)
+"""Endpoints which are classed as ``bulk`` by default"""
+
+_priority = contextvars.ContextVar('privex_eos_priority', default=None)
+
+
+@contextmanager
+def priority(name: str):
+    """Put every RPC call made within this block (in this task, or tasks started within it) into the class ``name``"""
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Optional[str]:
+    """The priority class set by the innermost :func:`.priority` block, or ``None``"""
+    return _priority.get()
+
+
+@attr.s(slots=True)
+class ClassStats:
+    """Counters for a single priority class. Wait times are the time spent queued, in seconds."""
+    queued = attr.ib(type=int, default=0)
+    in_flight = attr.ib(type=int, default=0)
+    served = attr.ib(type=int, default=0)
+    wait_total = attr.ib(type=float, default=0.0)
+    wait_max = attr.ib(type=float, default=0.0)
+
+    @property
+    def wait_avg(self) -> float:
+        return self.wait_total / self.served if self.served > 0 else 0.0
+
+
+class _Waiter:
+    __slots__ = ('tag', 'future', 'queued_at')
+
+    def __init__(self, tag: float, future: asyncio.Future):
+        self.tag, self.future, self.queued_at = tag, future, time.monotonic()
+
+
+class _Slot:
+    """Async context manager returned by :meth:`.RequestScheduler.slot`"""
+    __slots__ = ('scheduler', 'name', 'wait')
+
+    def __init__(self, scheduler: "RequestScheduler", name: str):
+        self.scheduler, self.name, self.wait = scheduler, name, 0.0
+
+    async def __aenter__(self):
+        self.wait = await self.scheduler.acquire(self.name)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.scheduler.release(self.name)
+
+
+class RequestScheduler:
+    """
+    Limits the requests in flight to ``max_in_flight``, queueing the rest per priority class and serving them by
+    weighted fair queuing (see the module docs).
+
+    :param int max_in_flight: Maximum requests sent at once. Keep this below the HTTP client's connection limit
+                              (100 by default), otherwise requests queue inside the client in arrival order instead.
+    :param dict weights: Maps each priority class to its weight. Default: :attr:`.DEFAULT_WEIGHTS`
+    :param bulk_endpoints: Endpoints classed as ``bulk`` when no priority is given. Default: :attr:`.BULK_ENDPOINTS`
+    :param str default_class: The class of every other endpoint
+    """
+    def __init__(self, max_in_flight: int = 32, weights: Dict[str, float] = None,
+                 bulk_endpoints: Iterable[str] = BULK_ENDPOINTS, default_class: str = 'interactive'):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.bulk_endpoints = frozenset(bulk_endpoints)
+        self.default_class = default_class
+        for name in {default_class} | ({'bulk'} if len(self.bulk_endpoints) > 0 else set()):
+            if name not in self.weights:
+                raise ValueError(f"Priority class '{name}' has no weight")
+        self.in_flight = 0
+        self.stats = {name: ClassStats() for name in self.weights}  # type: Dict[str, ClassStats]
+        self._queues = {name: deque() for name in self.weights}  # type: Dict[str, Deque[_Waiter]]
+        self._finish = {name: 0.0 for name in self.weights}
+        self._vtime = 0.0
+
+    def classify(self, endpoint: str, name: str = None) -> str:
+        """
+        The priority class of a call to ``endpoint`` - ``name`` if given, otherwise the current :func:`.priority`,
+        otherwise ``bulk`` for :attr:`.bulk_endpoints` and :attr:`.default_class` for anything else.
+        """
+        name = _priority.get() if name is None else name
+        if name is None:
+            name = 'bulk' if endpoint in self.bulk_endpoints else self.default_class
+        if name not in self.weights:
+            raise ValueError(f"Unknown priority class '{name}' (known classes: {', '.join(self.weights)})")
+        return name
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def slot(self, name: str) -> _Slot:
+        """An async context manager which holds a request slot of class ``name`` while inside it"""
+        return _Slot(self, name)
+
+    async def acquire(self, name: str) -> float:
+        """Wait for a request slot for the class ``name``. Returns the number of seconds spent waiting."""
+        st = self.stats[name]
+        if self.in_flight < self.max_in_flight and self.queued == 0:
+            self._grant(name)
+            return 0.0
+        # Self-clocked fair queuing: each request is tagged with the virtual time it would finish at if every class
+        # was served at the rate of its weight, and the waiting request with the lowest tag is served first.
+        w = _Waiter(max(self._vtime, self._finish[name]) + 1.0 / self.weights[name],
+                    asyncio.get_event_loop().create_future())
+        self._finish[name] = w.tag
+        self._queues[name].append(w)
+        st.queued += 1
+        try:
+            await w.future
+        except asyncio.CancelledError:
+            if not w.future.cancelled():
+                # We were given a slot, but cancelled before we could use it - pass it on
+                self.release(name)
+            elif w in self._queues[name]:
+                self._queues[name].remove(w)
+                st.queued -= 1
+            raise
+        wait = time.monotonic() - w.queued_at
+        st.wait_total += wait
+        st.wait_max = max(st.wait_max, wait)
+        return wait
+
+    def _grant(self, name: str):
+        self.in_flight += 1
+        st = self.stats[name]
+        st.in_flight += 1
+        st.served += 1
+
+    def release(self, name: str):
+        """Give back a slot of the class ``name``, starting the next queued request (if any)"""
+        self.in_flight -= 1
+        self.stats[name].in_flight -= 1
+        while self.in_flight < self.max_in_flight:
+            heads = [(q[0].tag, n) for n, q in self._queues.items() if len(q) > 0]
+            if len(heads) == 0:
+                return
+            tag, n = min(heads)
+            w = self._queues[n].popleft()
+            self.stats[n].queued -= 1
+            if w.future.cancelled():
+                continue
+            self._vtime = tag
+            self._grant(n)
+            w.future.set_result(None)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """The :class:`.ClassStats` of each class as dictionaries, plus the average wait"""
+        return {n: dict(attr.asdict(st), wait_avg=st.wait_avg) for n, st in self.stats.items()}
+
+    def __repr__(self):
+        return f'<RequestScheduler in_flight={self.in_flight}/{self.max_in_flight} queued={self.queued}>'
+
@@ -0,0 +1,149 @@
+"""
+Resumable snapshots of every row, in every scope, of a contract table.
+
+Scopes are streamed from ``get_table_by_scope`` in batches, and the rows of each scope in a batch are fetched
+concurrently (up to ``concurrency`` scopes at once, spread across the node pool by :meth:`.Api._call`), then
+streamed into an :class:`.NDJSONSink`. After each batch, the sink's segment is closed and a checkpoint is saved -
+so an interrupted snapshot can resume from the last completed batch, without duplicating or losing rows.
+
+    >>> snap = TableSnapshot(Api(), 'eosio.token', 'accounts', '/data/snapshots/token')
+    >>> stats = await snap.run()
+    >>> stats['scopes'], stats['rows'], stats['complete']
+    (1203345, 1203340, True)
+    >>> for rec in NDJSONReader('/data/snapshots/token', prefix='eosio.token-accounts').read():
+    ...     print(rec['scope'], rec['row']['balance'])
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import json
+import logging
+import os
+from os.path import join, exists
+from typing import Optional, List
+
+from privex.eos.export import NDJSONSink, list_segments, segment_number, index_path
+from privex.eos.tables import iter_table_scopes, iter_table_rows
+
+log = logging.getLogger(__name__)
+
+
+class TableSnapshot:
+    """
+    Snapshot every scope of the table ``table`` from contract ``code`` into compressed NDJSON segments inside
+    ``folder``. Each record is a dictionary of ``{"scope": scope, "row": row}``.
+    """
+    def __init__(self, api, code: str, table: str, folder: str, concurrency: int = 10, batch_size: int = 1000,
+                 prefix: str = None, checkpoint_path: str = None, **sink_kwargs):
+        """
+        :param api: An :class:`.Api` instance
+        :param str code: The contract account, e.g. ``eosio.token``
+        :param str table: The table to snapshot, e.g. ``accounts``
+        :param str folder: The folder to write the snapshot segments and checkpoint into
+        :param int concurrency: Maximum number of scopes to load rows for at once
+        :param int batch_size: Number of scopes per batch - a checkpoint is saved after each batch
+        :param str prefix: The segment file name prefix. Defaults to ``{code}-{table}``
+        :param str checkpoint_path: Where to save the checkpoint. Defaults to ``{folder}/{prefix}.checkpoint.json``
+        :param sink_kwargs: Extra keyword args for :class:`.NDJSONSink`, e.g. ``compresslevel``
+        """
+        self.api, self.code, self.table, self.folder = api, code, table, folder
+        self.concurrency, self.batch_size = max(1, int(concurrency)), max(1, int(batch_size))
+        self.prefix = f'{code}-{table}' if prefix is None else prefix
+        self.checkpoint_path = join(folder, f'{self.prefix}.checkpoint.json') if checkpoint_path is None \
+            else checkpoint_path
+        self.sink_kwargs = sink_kwargs
+        self.checkpoint = dict(last_scope=None, segment=0, scopes=0, rows=0, complete=False)
+
+    def load_checkpoint(self) -> dict:
+        if exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r') as fh:
+                self.checkpoint = {**self.checkpoint, **json.load(fh)}
+        return self.checkpoint
+
+    def save_checkpoint(self):
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.checkpoint, fh)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _discard_partial(self):
+        """Remove any segments written after the last checkpoint (i.e. by an unfinished batch)"""
+        for seg in list_segments(self.folder, self.prefix):
+            if segment_number(seg) > self.checkpoint['segment']:
+                log.info("Removing partial snapshot segment written after the last checkpoint: %s", seg)
+                os.remove(seg)
+                if exists(index_path(seg)):
+                    os.remove(index_path(seg))
+
+    async def _snapshot_scope(self, sink: NDJSONSink, sem: asyncio.Semaphore, scope: str) -> int:
+        count = 0
+        async with sem:
+            async for row in iter_table_rows(self.api, self.code, self.table, scope):
+                sink.write(dict(scope=scope, row=row))
+                count += 1
+        return count
+
+    async def _run_batch(self, sink: NDJSONSink, scopes: List[str]):
+        sem = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._snapshot_scope(sink, sem, s)) for s in scopes]
+        try:
+            counts = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the rest of the batch from writing any more rows - they'll be re-fetched when resuming
+            for t in tasks:
+                t.cancel()
+            raise
+        sink.rotate()
+        cp = self.checkpoint
+        cp['last_scope'], cp['segment'] = scopes[-1], sink.segment
+        cp['scopes'] += len(scopes)
+        cp['rows'] += sum(counts)
+        self.save_checkpoint()
+        log.info("Snapshot %s: %d scopes / %d rows done (last scope: %s)", self.prefix, cp['scopes'], cp['rows'],
+                 cp['last_scope'])
+
+    async def run(self) -> dict:
+        """
+        Run (or resume) the snapshot, returning the final checkpoint dictionary, which contains the total
+        ``scopes`` and ``rows`` written, plus the number of the last ``segment`` written.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        cp = self.load_checkpoint()
+        if cp['complete']:
+            log.info("Snapshot %s is already complete. Delete %s to re-run it.", self.prefix, self.checkpoint_path)
+            return cp
+        self._discard_partial()
+        sink = NDJSONSink(self.folder, prefix=self.prefix, start_segment=cp['segment'] + 1, **self.sink_kwargs)
+        last_scope: Optional[str] = cp['last_scope']
+        batch = []
+        try:
+            async for s in iter_table_scopes(self.api, self.code, self.table, lower_bound=last_scope):
+                scope = s['scope']
+                if scope == last_scope or int(s.get('count', 1)) == 0:
+                    continue
+                batch.append(scope)
+                if len(batch) >= self.batch_size:
+                    await self._run_batch(sink, batch)
+                    batch = []
+            if len(batch) > 0:
+                await self._run_batch(sink, batch)
+        finally:
+            sink.close()
+        cp['complete'] = True
+        self.save_checkpoint()
+        return cp
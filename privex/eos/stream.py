@@ -0,0 +1,176 @@
+"""
+Streaming helpers for walking raw blocks and the actions inside of them, without building the full
+:class:`.EOSBlock` / :class:`.EOSTransaction` object tree for data that's going to be thrown away.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Iterable, Iterator, AsyncGenerator, FrozenSet, Union
+
+import attr
+
+from privex.eos.objects import EOSAction
+
+log = logging.getLogger(__name__)
+
+
+def _to_set(v: Optional[Union[str, Iterable[str]]]) -> FrozenSet[str]:
+    if v is None:
+        return frozenset()
+    if isinstance(v, str):
+        return frozenset([v])
+    return frozenset(v)
+
+
+@attr.s(frozen=True)
+class ActionFilter:
+    """
+    A filter which is matched against the raw action dictionaries from ``get_block``, so that non-matching
+    actions can be skipped before any objects are constructed.
+
+    Each field is a set of accepted values - an empty set means "match anything" for that field. When multiple
+    fields are set, an action must match **all** of them.
+
+        >>> f = ActionFilter(contracts='eosio.token', names='transfer', authorizers=['someguy12333', 'privexinceos'])
+        >>> f.matches({'account': 'eosio.token', 'name': 'transfer', 'authorization': [{'actor': 'privexinceos'}]})
+        True
+
+    """
+    contracts = attr.ib(type=FrozenSet[str], factory=frozenset, converter=_to_set)
+    """Only match actions created by these accounts / contracts (``action['account']``)"""
+    names = attr.ib(type=FrozenSet[str], factory=frozenset, converter=_to_set)
+    """Only match actions with these action names (``action['name']``), e.g. ``transfer``"""
+    authorizers = attr.ib(type=FrozenSet[str], factory=frozenset, converter=_to_set)
+    """Only match actions which were authorized by at least one of these accounts"""
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.contracts or self.names or self.authorizers)
+
+    def matches(self, action: dict) -> bool:
+        """Returns ``True`` if the raw action dictionary ``action`` passes this filter"""
+        if self.contracts and action.get('account') not in self.contracts:
+            return False
+        if self.names and action.get('name') not in self.names:
+            return False
+        if self.authorizers:
+            for auth in action.get('authorization', []):
+                if auth.get('actor') in self.authorizers:
+                    return True
+            return False
+        return True
+
+
+def extract_actions(block: dict, action_filter: ActionFilter = None) -> Iterator[EOSAction]:
+    """
+    Walk the ``transactions`` -> ``trx`` -> ``transaction`` -> ``actions`` tree of a **raw** block dictionary
+    (as returned by :meth:`.Api.get_block_raw`), yielding a flat :class:`.EOSAction` for each action which
+    passes ``action_filter``.
+
+    Transactions where ``trx`` is only an ID string (e.g. deferred transactions) carry no action data, so
+    they're skipped.
+
+        >>> for act in extract_actions(raw_block, ActionFilter(contracts='eosio.token', names='transfer')):
+        ...     print(act.block_num, act.trx_id, act.data['quantity'])
+
+    :param dict block: A raw block dictionary
+    :param ActionFilter action_filter: Optionally, only yield actions which match this filter
+    :return Iterator[EOSAction] actions: A generator of flattened :class:`.EOSAction` objects
+    """
+    if action_filter is not None and action_filter.is_empty:
+        action_filter = None
+    block_num, timestamp = block.get('block_num'), block.get('timestamp')
+
+    for trx_index, tx in enumerate(block.get('transactions', [])):
+        trx = tx.get('trx')
+        if not isinstance(trx, dict):
+            continue
+        transaction = trx.get('transaction')
+        if not isinstance(transaction, dict):
+            continue
+        for action_index, act in enumerate(transaction.get('actions', [])):
+            if action_filter is not None and not action_filter.matches(act):
+                continue
+            yield EOSAction(
+                block_num=block_num, timestamp=timestamp, trx_id=trx.get('id'), trx_index=trx_index,
+                action_index=action_index, status=tx.get('status'), account=act.get('account'),
+                name=act.get('name'), authorization=act.get('authorization', []), data=act.get('data'),
+                hex_data=act.get('hex_data'),
+            )
+
+
+async def _chain_height(api, irreversible: bool = False) -> int:
+    info = await api.get_info()
+    return int(info['last_irreversible_block_num'] if irreversible else info['head_block_num'])
+
+
+async def stream_raw_blocks(api, start: int, end: int = None, concurrency: int = 20, irreversible: bool = False,
+                            poll_interval: float = 0.5, headers: bool = False) -> AsyncGenerator[dict, None]:
+    """
+    Yield raw block dictionaries **in order** from ``start`` until ``end`` (inclusive), keeping up to
+    ``concurrency`` block requests in flight at once.
+
+    If ``end`` is ``None``, the stream never finishes - once it catches up to the chain head (or the last
+    irreversible block if ``irreversible`` is True), it polls ``get_info`` every ``poll_interval`` seconds and
+    continues streaming new blocks as they're produced.
+
+    :param api: An :class:`.Api` instance (or any object with ``get_block_raw`` and ``get_info`` coroutines)
+    :param int start: The first block number to stream
+    :param int end: The last block number to stream, or ``None`` to follow the live chain
+    :param int concurrency: Maximum number of blocks to request ahead of the block currently being yielded
+    :param bool irreversible: When following the live chain, only stream irreversible blocks
+    :param float poll_interval: Seconds to wait between ``get_info`` calls once the stream has caught up
+    :param bool headers: If ``True``, yield only block headers, loaded with ``api.get_block_header_raw``
+    """
+    concurrency = max(1, int(concurrency))
+    fetch = api.get_block_header_raw if headers else api.get_block_raw
+    pending = deque()
+    next_num = start
+    height = end if end is not None else await _chain_height(api, irreversible)
+    try:
+        while True:
+            while len(pending) < concurrency and next_num <= height and (end is None or next_num <= end):
+                pending.append(asyncio.ensure_future(fetch(next_num)))
+                next_num += 1
+
+            if len(pending) > 0:
+                yield await pending.popleft()
+                continue
+            if end is not None:
+                return
+            # We've caught up with the chain - wait for new blocks to be produced.
+            while next_num > height:
+                await asyncio.sleep(poll_interval)
+                height = await _chain_height(api, irreversible)
+    finally:
+        for p in pending:
+            p.cancel()
+
+
+async def stream_actions(api, start: int, end: int = None, action_filter: ActionFilter = None,
+                         **kwargs) -> AsyncGenerator[EOSAction, None]:
+    """
+    Yield the flattened :class:`.EOSAction`'s matching ``action_filter`` from each block between ``start`` and
+    ``end``, in block order. See :func:`.stream_raw_blocks` for the accepted ``kwargs``, including live
+    streaming when ``end`` is ``None``.
+    """
+    async for block in stream_raw_blocks(api, start, end, **kwargs):
+        for act in extract_actions(block, action_filter):
+            yield act
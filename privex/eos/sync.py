@@ -0,0 +1,270 @@
+"""
+A thread-safe synchronous facade over :class:`.Api`, for synchronous code (e.g. Celery tasks, Django views) which
+makes many calls.
+
+Unlike :meth:`.Api.sync_call` (which runs each call in a fresh event loop), :class:`.SyncApi` owns a single event
+loop running in a background thread, with one :class:`.Api` - and so one pooled HTTP client - living on it.
+Connections are kept alive between calls, and any number of threads can call it at once::
+
+    >>> eos = SyncApi()
+    >>> eos.get_block(94000000).producer
+    'eoshuobipool'
+    >>> for act in eos.stream_actions(94000000, 94001000, contracts='eosio.token'):
+    ...     print(act.data)
+
+Every coroutine method of :class:`.Api` is available as a blocking method with the same arguments, and methods
+which return async generators (e.g. :meth:`.Api.stream_blocks`) return ordinary iterators instead.
+
+To run many calls concurrently from synchronous code, use :meth:`.SyncApi.map`, :meth:`.SyncApi.batch` or
+:meth:`.SyncApi.run`::
+
+    >>> accounts = eos.map('get_account', ['someguy12333', 'privexinceos'])
+    >>> block, info = eos.batch([('get_block', 94000000), ('get_info',)])
+    >>> blocks = eos.run(lambda api: api.get_block_range(94000000, 94000100))
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Coroutine, Iterable, List, Optional
+
+from privex.eos.lib import Api
+from privex.eos.scheduler import current_priority, priority
+
+log = logging.getLogger(__name__)
+
+
+class LoopThread:
+    """An asyncio event loop, running forever in a daemon thread until :meth:`.stop` is called"""
+    def __init__(self, name: str = 'privex-eos-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+            tasks = [t for t in asyncio.all_tasks(self.loop) if not t.done()]
+            for t in tasks:
+                t.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        finally:
+            self.loop.close()
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive() and not self.loop.is_closed()
+
+    def run(self, coro: Coroutine, timeout: float = None) -> Any:
+        """Run the coroutine ``coro`` on the loop, blocking until it's done (or ``timeout`` seconds pass)"""
+        if threading.current_thread() is self.thread or not self.running:
+            coro.close()
+            if self.running:
+                raise RuntimeError("LoopThread.run() can't be called from the loop's own thread - await it instead")
+            raise RuntimeError("The event loop thread has been stopped")
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return fut.result(timeout)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            raise TimeoutError(f"Call didn't finish within {timeout} seconds")
+
+    def stop(self):
+        """Stop the loop (cancelling any pending tasks) and wait for the thread to exit"""
+        if self.running:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+
+class SyncIterator:
+    """Iterates over an async iterator which lives on a :class:`.LoopThread`, one item at a time"""
+    def __init__(self, sync_api: "SyncApi", aiter, prio: str = None):
+        self._sync, self._aiter, self._prio = sync_api, aiter, prio
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self._sync._call(self._prio, self._aiter.__anext__)
+        except StopAsyncIteration:
+            raise StopIteration
+
+    def close(self):
+        """Close the underlying async generator, e.g. to stop a live stream early"""
+        if hasattr(self._aiter, 'aclose') and self._sync._thread.running:
+            self._sync._call(None, self._aiter.aclose)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SyncApi:
+    """
+    Synchronous, thread-safe :class:`.Api`, with the Api and its connection pool living on a background event loop.
+
+    The keyword arguments are passed to :class:`.Api` - which is created on the loop thread. If you pass your own
+    ``node_manager``, its database connection will be used from that thread, so SQLite connections must be created
+    with ``check_same_thread=False``, e.g. ``SqliteAdapter(connection_kwargs=dict(check_same_thread=False))``.
+
+    :param float timeout: Default timeout in seconds for each call (``None`` = wait forever). Calls which time out
+                          raise :class:`TimeoutError`, and are cancelled.
+    """
+    _UNSUPPORTED = frozenset({'generate_block_range', 'sync_call'})
+    """Api methods which don't make sense synchronously - use ``get_block_range`` / ``stream_blocks`` instead"""
+
+    def __init__(self, node_manager=None, timeout: Optional[float] = None, **kwargs):
+        self.timeout = timeout
+        self._thread = LoopThread()
+        self._lock = threading.Lock()
+        try:
+            self.api = self._thread.run(Api.create(node_manager, **kwargs))  # type: Api
+        except BaseException:
+            self._thread.stop()
+            raise
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._thread.loop
+
+    @property
+    def closed(self) -> bool:
+        return not self._thread.running
+
+    def _call(self, prio: Optional[str], func: Callable, *args, **kwargs) -> Any:
+        """Call ``func`` on the loop thread (inside :func:`.priority` ``prio``), awaiting its result if needed"""
+        async def _invoke():
+            with (priority(prio) if prio is not None else nullcontext()):
+                res = func(*args, **kwargs)
+                if inspect.isawaitable(res):
+                    res = await res
+                return res
+        return self._thread.run(_invoke(), self.timeout)
+
+    def _wrap(self, name: str) -> Callable:
+        method = getattr(self.api, name)
+
+        @functools.wraps(method)
+        def _sync(*args, **kwargs):
+            prio = current_priority()
+            res = self._call(prio, method, *args, **kwargs)
+            if hasattr(res, '__anext__'):
+                return SyncIterator(self, res, prio)
+            return res
+        return _sync
+
+    def __getattr__(self, name: str):
+        if name.startswith('_') or name in ('api', 'timeout'):
+            raise AttributeError(name)
+        if name in self._UNSUPPORTED:
+            raise AttributeError(f"Api.{name} isn't available synchronously - see SyncApi's documentation")
+        attr = getattr(self.api, name)
+        if not callable(attr):
+            return attr
+        wrapped = self._wrap(name)
+        with self._lock:
+            # Cache the wrapper, so later lookups don't go through __getattr__
+            self.__dict__.setdefault(name, wrapped)
+        return wrapped
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | {n for n in dir(self.api) if not n.startswith('_')})
+
+    @staticmethod
+    def priority(name: str):
+        """
+        Context manager which puts every call made within it (from this thread) into the
+        :class:`.RequestScheduler` priority class ``name`` - see :meth:`.Api.priority`.
+        """
+        return priority(name)
+
+    def run(self, func: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """
+        Run ``func(api, *args, **kwargs)`` on the loop thread and return its result, where ``api`` is the
+        underlying :class:`.Api` and ``func`` returns an awaitable (e.g. a lambda, or an ``async def``)::
+
+            >>> eos.run(lambda api: api.get_block_range(94000000, 94000100))
+
+        """
+        return self._call(current_priority(), func, self.api, *args, **kwargs)
+
+    def batch(self, calls: Iterable[tuple], concurrency: int = 20, return_exceptions: bool = False) -> List[Any]:
+        """
+        Run many calls concurrently (up to ``concurrency`` at once), returning their results in the same order.
+        Each call is a tuple of the method name, followed by its positional arguments::
+
+            >>> block, acc, info = eos.batch([('get_block', 94000000), ('get_account', 'someguy12333'), ('get_info',)])
+
+        :param bool return_exceptions: Return the exception raised by a failed call in its place, instead of
+                                       raising the first exception
+        """
+        calls = [(c[0], c[1:]) for c in calls]
+        for name, _ in calls:
+            if name.startswith('_') or name in self._UNSUPPORTED or not callable(getattr(self.api, name, None)):
+                raise AttributeError(f"Can't batch '{name}' - it's private, unsupported or not an Api method")
+
+        async def _batch(api: Api):
+            sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+            async def _one(name, args):
+                async with sem:
+                    return await getattr(api, name)(*args)
+            return await asyncio.gather(*[_one(n, a) for n, a in calls], return_exceptions=return_exceptions)
+        return self.run(_batch)
+
+    def map(self, method: str, items: Iterable, concurrency: int = 20, return_exceptions: bool = False) -> List[Any]:
+        """
+        Call the Api method ``method`` once for each of ``items`` (as its only argument), concurrently, returning
+        the results in the same order::
+
+            >>> blocks = eos.map('get_block', range(94000000, 94000100), concurrency=50)
+
+        """
+        return self.batch([(method, i) for i in items], concurrency=concurrency, return_exceptions=return_exceptions)
+
+    def close(self):
+        """Close the Api's HTTP client, and stop the background event loop"""
+        if self.closed:
+            return
+        try:
+            self._thread.run(self.api.close(), self.timeout)
+        finally:
+            self._thread.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"<SyncApi closed={self.closed} api={self.api!r}>"
+
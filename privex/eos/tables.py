@@ -0,0 +1,182 @@
+"""
+Async iterators for contract table data - transparently following ``get_table_rows`` / ``get_table_by_scope``
+pagination, prefetching the next page while the current one is consumed, and adapting the page size to the
+node's response time.
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Optional, Tuple, Union
+
+from privex.eos.exceptions import PaginationError
+
+log = logging.getLogger(__name__)
+
+
+class AdaptiveLimit:
+    """
+    Adjusts a page size (``limit``) based on how long each page took to load: doubling it while pages come
+    back in under half of ``target_time``, and halving it when a page takes longer than ``target_time``.
+    """
+    def __init__(self, limit: int = 100, min_limit: int = 10, max_limit: int = 5000, target_time: float = 1.0):
+        self.min_limit, self.max_limit = int(min_limit), int(max_limit)
+        self.limit = max(self.min_limit, min(self.max_limit, int(limit)))
+        self.target_time = float(target_time)
+
+    def update(self, elapsed: float, rows: int, more: bool) -> int:
+        """
+        Update :attr:`.limit` after a page of ``rows`` rows took ``elapsed`` seconds to load. Returns the new limit.
+
+        If the node returned fewer rows than requested while there are ``more`` rows, it hit its own query time
+        limit, so the page size isn't increased.
+        """
+        if elapsed > self.target_time:
+            self.limit = max(self.min_limit, self.limit // 2)
+        elif elapsed < self.target_time / 2 and not (more and rows < self.limit):
+            self.limit = min(self.max_limit, self.limit * 2)
+        return self.limit
+
+
+def _next_bound(res: dict, rows: list, key_field: Optional[str]) -> Tuple[bool, Optional[str], bool]:
+    """
+    Work out where the next page starts from a ``get_table_rows`` / ``get_table_by_scope`` response.
+
+    :return tuple next: ``(more, lower_bound, inclusive)`` - if ``inclusive`` is True, the first row of the next
+                        page is the last row of this page, and should be skipped.
+    """
+    more = res.get('more', False)
+    # get_table_by_scope (and some older nodes) return the next lower bound as ``more`` itself
+    if isinstance(more, str):
+        return (more != '', more or None, False)
+    if not more:
+        return False, None, False
+    next_key = res.get('next_key')
+    if next_key not in [None, '']:
+        return True, str(next_key), False
+    if key_field is not None and len(rows) > 0:
+        return True, str(rows[-1][key_field]), True
+    raise PaginationError(
+        "The node returned more=true without a next_key. Please pass key_field= (the table's primary key "
+        "field) so the next page can be located."
+    )
+
+
+async def paginate(api, endpoint: str, params: dict, lower_bound: Union[str, int] = None, limit: int = 100,
+                   min_limit: int = 10, max_limit: int = 5000, target_time: float = 1.0, prefetch: bool = True,
+                   key_field: str = None) -> AsyncGenerator[dict, None]:
+    """
+    Yield every row from a paginated table endpoint (``get_table_rows`` or ``get_table_by_scope``), requesting the
+    following page while the rows of the current page are being consumed (unless ``prefetch`` is ``False``).
+
+    Only the current and the prefetched page are held in memory at any time.
+
+    :param api: An :class:`.Api` instance (or any object with a ``_call`` coroutine)
+    :param str endpoint: The endpoint to call, e.g. ``/v1/chain/get_table_rows``
+    :param dict params: Parameters to send with every page request, excluding ``lower_bound`` / ``limit``
+    :param lower_bound: The ``lower_bound`` of the first page
+    :param int limit: The initial page size. Adjusted automatically by :class:`.AdaptiveLimit`.
+    :param int min_limit: The smallest page size to use
+    :param int max_limit: The largest page size to use
+    :param float target_time: The number of seconds each page request should take
+    :param bool prefetch: Request the next page before yielding the rows of the current page
+    :param str key_field: The primary key field of the rows, used to find the next page on nodes which don't
+                          return ``next_key``
+    :raises PaginationError: When the node returns ``more=true``, but the next page can't be located
+    """
+    limiter = AdaptiveLimit(limit, min_limit, max_limit, target_time)
+
+    async def _fetch(lower, lim):
+        started = time.monotonic()
+        body = dict(params, limit=lim)
+        if lower is not None:
+            body['lower_bound'] = lower
+        res = await api._call(endpoint, **body)
+        return res, time.monotonic() - started
+
+    task = asyncio.ensure_future(_fetch(lower_bound, limiter.limit))
+    page_lower = None if lower_bound is None else str(lower_bound)
+    skip_key = None
+    try:
+        while task is not None:
+            res, elapsed = await task
+            task = None
+            rows = res.get('rows', [])
+            more, lower, inclusive = _next_bound(res, rows, key_field)
+            # An inclusive page which ends on the row it started from (e.g. limit=1) would be requested forever
+            stalled = more and inclusive and lower == page_lower
+            if stalled:
+                more = False
+            limiter.update(elapsed, len(rows), more)
+            log.debug("Loaded %d rows from %s in %.3fs - next limit: %d", len(rows), endpoint, elapsed, limiter.limit)
+            if more and prefetch:
+                task = asyncio.ensure_future(_fetch(lower, limiter.limit))
+
+            for i, row in enumerate(rows):
+                if i == 0 and skip_key is not None and key_field is not None and str(row[key_field]) == skip_key:
+                    continue
+                yield row
+            skip_key = lower if inclusive else None
+            page_lower = lower
+
+            if stalled:
+                raise PaginationError(
+                    f"The node returned more=true, but the page starting at {key_field} {lower!r} contained no "
+                    f"new rows, so the next page can't be located without next_key."
+                )
+            if more and task is None:
+                task = asyncio.ensure_future(_fetch(lower, limiter.limit))
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+def iter_table_rows(api, code: str, table: str, scope: str = None, lower_bound: Union[str, int] = None,
+                    upper_bound: Union[str, int] = None, index_position: Union[str, int] = None,
+                    key_type: str = None, endpoint: str = '/v1/chain/get_table_rows',
+                    **kwargs) -> AsyncGenerator[dict, None]:
+    """
+    Returns an async generator of every row in the table ``table`` of contract ``code`` within ``scope``
+    (defaults to ``code``), following pagination transparently. See :func:`.paginate` for the accepted
+    ``kwargs``, e.g. ``limit``, ``prefetch`` and ``key_field``.
+    """
+    params = dict(code=code, table=table, scope=code if scope is None else scope, json=True)
+    if upper_bound is not None:
+        params['upper_bound'] = upper_bound
+    if index_position is not None:
+        params['index_position'] = index_position
+    if key_type is not None:
+        params['key_type'] = key_type
+    return paginate(api, endpoint, params, lower_bound=lower_bound, **kwargs)
+
+
+
+def iter_table_scopes(api, code: str, table: str = None, lower_bound: str = None, upper_bound: str = None,
+                      endpoint: str = '/v1/chain/get_table_by_scope', **kwargs) -> AsyncGenerator[dict, None]:
+    """
+    Returns an async generator of every scope of contract ``code`` (optionally only scopes holding ``table``)
+    from ``get_table_by_scope``, following pagination transparently. Each item is a dictionary with the keys
+    ``code``, ``scope``, ``table``, ``payer`` and ``count``.
+    """
+    params = dict(code=code)
+    if table is not None:
+        params['table'] = table
+    if upper_bound is not None:
+        params['upper_bound'] = upper_bound
+    return paginate(api, endpoint, params, lower_bound=lower_bound, **kwargs)
@@ -0,0 +1,176 @@
+"""
+Batch token balance loading - reading each holder's rows from a token contract's ``accounts`` table via
+``get_table_rows`` (many holders at once), decoding balances into integer amounts, and sweeping a set of holders
+repeatedly to report only the balances which changed.
+
+    >>> bals = await get_balances(eos, ['someguy12333', 'privexinceos'], contracts=['eosio.token'])
+    >>> bals['someguy12333'][('eosio.token', 'EOS')]
+    TokenAmount(amount=123456, precision=4, symbol='EOS')
+    >>> str(bals['someguy12333'][('eosio.token', 'EOS')])
+    '12.3456 EOS'
+
+**Copyright**::
+
+    +===================================================+
+    |                 © 2019 Privex Inc.                |
+    |               https://www.privex.io               |
+    +===================================================+
+    |                                                   |
+    |        Privex EOS Python API                      |
+    |        License: X11 / MIT                         |
+    |                                                   |
+    |        Core Developer(s):                         |
+    |                                                   |
+    |          (+)  Chris (@someguy123) [Privex]        |
+    |                                                   |
+    +===================================================+
+
+"""
+import asyncio
+import logging
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from privex.eos.objects import BulkResult
+from privex.eos.tables import iter_table_rows
+
+log = logging.getLogger(__name__)
+
+TokenKey = Tuple[str, str]
+"""A ``(contract, symbol)`` tuple, e.g. ``('eosio.token', 'EOS')``"""
+
+
+class TokenAmount(NamedTuple):
+    """
+    A token amount stored as an integer number of the token's smallest unit, e.g. ``12.3456 EOS`` is
+    ``TokenAmount(amount=123456, precision=4, symbol='EOS')``
+    """
+    amount: int
+    precision: int
+    symbol: str
+
+    @classmethod
+    def parse(cls, asset: str) -> "TokenAmount":
+        """Parse an asset string such as ``12.3456 EOS`` (as returned by the RPC API) into a :class:`.TokenAmount`"""
+        qty, symbol = asset.split(' ', 1)
+        whole, _, frac = qty.partition('.')
+        neg = whole.startswith('-')
+        amount = int(whole.lstrip('-') + frac)
+        return cls(-amount if neg else amount, len(frac), symbol.strip())
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.amount).scaleb(-self.precision)
+
+    def __str__(self):
+        sign, amt = ('-' if self.amount < 0 else ''), str(abs(self.amount))
+        if self.precision == 0:
+            return f'{sign}{amt} {self.symbol}'
+        amt = amt.rjust(self.precision + 1, '0')
+        return f'{sign}{amt[:-self.precision]}.{amt[-self.precision:]} {self.symbol}'
+
+
+class BalanceChange(NamedTuple):
+    """A balance which changed between two sweeps. ``old`` / ``new`` are ``None`` if the row didn't exist."""
+    holder: str
+    contract: str
+    symbol: str
+    old: Optional[TokenAmount]
+    new: Optional[TokenAmount]
+
+    @property
+    def delta(self) -> int:
+        """The change in the integer amount (in the token's smallest unit)"""
+        return (0 if self.new is None else self.new.amount) - (0 if self.old is None else self.old.amount)
+
+
+async def get_balances(api, holders: Iterable[str], contracts: Iterable[str] = ('eosio.token',),
+                       symbols: Iterable[str] = None, concurrency: int = 20) -> BulkResult:
+    """
+    Load the token balances of every holder in ``holders`` (ignoring duplicates) from each token contract in
+    ``contracts``, with up to ``concurrency`` table reads at once.
+
+    :param api: An :class:`.Api` instance (or any object with a ``_call`` coroutine)
+    :param holders: An iterable of account names
+    :param contracts: Token contracts to read the ``accounts`` table of, e.g. ``['eosio.token', 'everipediaiq']``
+    :param symbols: Only return balances of these symbols, e.g. ``['EOS']``. By default, all symbols are returned.
+    :param int concurrency: Maximum number of table reads to run at once
+    :return BulkResult balances: Maps each holder to a dict of ``{(contract, symbol): TokenAmount}``, in the order
+                                 of ``holders``. If any read for a holder fails, the holder is left out, with the
+                                 exception in ``.errors``. Holders without any balances map to an empty dict.
+    """
+    holders, contracts = list(dict.fromkeys(holders)), list(contracts)
+    symbols = None if symbols is None else set(symbols)
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def _load(holder: str, contract: str) -> List[TokenAmount]:
+        async with sem:
+            return [
+                TokenAmount.parse(row['balance'])
+                async for row in iter_table_rows(api, contract, 'accounts', holder, prefetch=False)
+            ]
+
+    tasks = {
+        (h, c): asyncio.ensure_future(_load(h, c)) for h in holders for c in contracts
+    }
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    res = BulkResult()
+    for h in holders:
+        bals = {}
+        for c in contracts:
+            t = tasks[(h, c)]
+            if t.exception() is not None:
+                log.debug("Failed to load %s balances for %s: %s", c, h, t.exception())
+                res.errors[h] = t.exception()
+                break
+            for amt in t.result():
+                if symbols is None or amt.symbol in symbols:
+                    bals[(c, amt.symbol)] = amt
+        else:
+            res[h] = bals
+    return res
+
+
+class BalanceSweeper:
+    """
+    Repeatedly sweeps the balances of a set of holders, remembering the previous sweep so that only the
+    balances which changed are reported.
+
+        >>> sweeper = BalanceSweeper(eos, holders, contracts=['eosio.token'], symbols=['EOS'])
+        >>> await sweeper.changes()     # The first sweep reports every balance as new
+        >>> while True:
+        ...     for c in await sweeper.changes():
+        ...         print(f"{c.holder}'s {c.symbol} balance changed from {c.old} to {c.new}")
+        ...     await asyncio.sleep(10)
+
+    """
+    def __init__(self, api, holders: Iterable[str], contracts: Iterable[str] = ('eosio.token',),
+                 symbols: Iterable[str] = None, concurrency: int = 20):
+        self.api, self.holders, self.contracts = api, list(dict.fromkeys(holders)), list(contracts)
+        self.symbols = None if symbols is None else list(symbols)
+        self.concurrency = concurrency
+        self.last = {}    # type: Dict[str, Dict[TokenKey, TokenAmount]]
+        self.errors = {}  # type: Dict[str, Exception]
+
+    async def sweep(self) -> BulkResult:
+        """Load the current balances of every holder, storing them as the baseline for :meth:`.changes`"""
+        res = await get_balances(self.api, self.holders, self.contracts, self.symbols, self.concurrency)
+        self.errors = res.errors
+        self.last.update(res)
+        return res
+
+    async def changes(self) -> List[BalanceChange]:
+        """
+        Sweep the balances, and return a :class:`.BalanceChange` for every balance which differs from the previous
+        sweep. Holders which failed to load in this sweep (see :attr:`.errors`) keep their previous balances and
+        aren't reported.
+        """
+        prev = dict(self.last)
+        res = await self.sweep()
+        changed = []
+        for h, bals in res.items():
+            old_bals = prev.get(h, {})
+            for k in dict.fromkeys([*old_bals.keys(), *bals.keys()]):
+                old, new = old_bals.get(k), bals.get(k)
+                if old != new:
+                    changed.append(BalanceChange(h, k[0], k[1], old, new))
+        return changed
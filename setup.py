@@ -61,17 +61,20 @@ setup(
     author_email='chris@privex.io',
 
     license='MIT',
+    python_requires='>=3.7',
     install_requires=[
         'httpx>=0.8.0',
         'attrs',
         'privex-helpers>=2.6.0',
-        'privex-coinhandlers',
         'privex-db>=0.9.1',
     ],
-    packages=find_packages(exclude=['tests', 'test.*']),
+    extras_require={
+        'columnar': ['numpy'],
+        'arrow': ['numpy', 'pyarrow'],
+    },
+    packages=find_packages(exclude=['tests', 'test.*', 'benchmarks', 'benchmarks.*']),
     classifiers=[
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "License :: OSI Approved :: MIT License",
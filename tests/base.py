@@ -1,3 +1,5 @@
+import asyncio
+import json
 from typing import NamedTuple, Type
 from unittest import TestCase
 
@@ -7,6 +9,7 @@ from privex.eos import NodeManager, Node
 # Node: Type[NamedTuple] = dictable_namedtuple('Node', 'url network enabled')
 from privex.eos.adapters import SqliteAdapter
 from privex.eos.node import _node_to_row
+from privex.eos.objects import block_header
 
 
 class BaseEOSTest(TestCase):
@@ -28,3 +31,83 @@ class BaseEOSTest(TestCase):
     def tearDown(self) -> None:
         self.nm.adapter.drop_schemas()
 
+
+
+def make_action(account='eosio.token', name='transfer', actor='someguy12333', **data) -> dict:
+    """Build a raw action dictionary in the same shape as those returned within ``get_block``"""
+    return dict(
+        account=account, name=name, authorization=[dict(actor=actor, permission='active')],
+        data=data, hex_data='00'
+    )
+
+
+def make_raw_block(block_num: int, *transactions: list, producer='eosio', timestamp='2019-12-08T23:19:55.000') -> dict:
+    """
+    Build a raw ``get_block`` style dictionary for ``block_num``. Each positional argument is a list of
+    raw action dicts making up one transaction, or a string to represent a deferred transaction (ID only).
+    """
+    txs = []
+    for i, actions in enumerate(transactions):
+        trx_id = f'{block_num:08x}{i:056x}'
+        if isinstance(actions, str):
+            txs.append(dict(status='executed', cpu_usage_us=100, net_usage_words=0, trx=actions))
+            continue
+        txs.append(dict(
+            status='executed', cpu_usage_us=100 + i, net_usage_words=12 + i,
+            trx=dict(
+                id=trx_id, signatures=[], compression='none', packed_context_free_data='',
+                context_free_data=[], packed_trx='', transaction=dict(actions=actions)
+            )
+        ))
+    return dict(
+        timestamp=timestamp, producer=producer, block_num=block_num, ref_block_prefix=1,
+        id=f'{block_num:08x}' + ('0' * 56), previous=f'{block_num - 1:08x}' + ('0' * 56), transactions=txs
+    )
+
+
+class FakeApi:
+    """
+    A minimal stand-in for :class:`.Api` which serves synthetic blocks from memory, for testing functions which
+    only need ``get_block_raw`` and ``get_info``.
+    """
+    def __init__(self, blocks: dict, head: int = None):
+        self.blocks = blocks
+        self.head = max(blocks.keys()) if head is None else head
+        self.calls = []
+
+    async def get_block_raw(self, number: int) -> dict:
+        self.calls.append(number)
+        return self.blocks[number]
+
+    async def get_block_header_raw(self, number: int) -> dict:
+        return block_header(await self.get_block_raw(number))
+
+    async def get_info(self) -> dict:
+        return dict(head_block_num=self.head, last_irreversible_block_num=self.head)
+
+
+class FakeResponse:
+    """A minimal stand-in for :class:`httpx.Response`"""
+    def __init__(self, status_code: int = 200, data: dict = None):
+        self.status_code, self.data = status_code, data
+        self.content = json.dumps(data).encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ConnectionError(f'HTTP {self.status_code}')
+
+    def json(self):
+        return self.data
+
+
+class FlakyClient:
+    """An HTTP client which fails the first ``failures`` calls with a connection error, then returns ``get_info``"""
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+
+    async def post(self, url, json=None, headers=None):
+        await asyncio.sleep(0)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError('connection refused')
+        return FakeResponse(200, dict(head_block_num=100, last_irreversible_block_num=90))
@@ -0,0 +1,100 @@
+import asyncio
+from unittest import TestCase
+
+from privex.eos.accounts import get_accounts, stream_accounts
+from privex.eos.cache import HeadCache
+from privex.eos.exceptions import EOSRPCError
+from privex.eos.objects import EOSAccount
+
+
+def make_account(name: str, head_block_num: int = 1000) -> dict:
+    return dict(
+        account_name=name, head_block_num=head_block_num, head_block_time='2019-12-08T23:19:55.000', privileged=False,
+        last_code_update='1970-01-01T00:00:00.000', created='2018-06-09T12:10:43.500', core_liquid_balance='1.0000 EOS',
+        ram_quota=5000, net_weight=100, cpu_weight=100, ram_usage=3000, permissions=[], total_resources={},
+        self_delegated_bandwidth={}, refund_request=None, voter_info={},
+        net_limit=dict(used=1, available=2, max=3), cpu_limit=dict(used=1, available=2, max=3),
+    )
+
+
+class FakeAccountApi:
+    """Serves synthetic accounts, raising :class:`.EOSRPCError` for names not in ``accounts``"""
+    def __init__(self, *accounts: str, head: int = 1000):
+        self.accounts = {a: make_account(a, head) for a in accounts}
+        self.calls = []
+        self.active = self.max_active = 0
+
+    async def get_account_raw(self, name: str) -> dict:
+        self.calls.append(name)
+        self.active += 1
+        self.max_active = max(self.active, self.max_active)
+        try:
+            await asyncio.sleep(0.01)
+            if name not in self.accounts:
+                raise EOSRPCError('unknown key', status=500, code=0, name='exception')
+            return self.accounts[name]
+        finally:
+            self.active -= 1
+
+
+class TestBulkAccounts(TestCase):
+    def test_get_accounts_dedupe_and_order(self):
+        api = FakeAccountApi('carol', 'alice', 'bob')
+        res = asyncio.run(get_accounts(api, ['carol', 'alice', 'carol', 'bob', 'alice']))
+        self.assertEqual(list(res.keys()), ['carol', 'alice', 'bob'])
+        self.assertEqual(sorted(api.calls), ['alice', 'bob', 'carol'])
+        self.assertIsInstance(res['alice'], EOSAccount)
+        self.assertEqual(res['alice'].created.year, 2018)
+        self.assertTrue(res.ok)
+    
+    def test_get_accounts_partial_failure(self):
+        api = FakeAccountApi('alice', 'bob')
+        res = asyncio.run(get_accounts(api, ['alice', 'notreal', 'bob']))
+        self.assertEqual(list(res.keys()), ['alice', 'bob'])
+        self.assertFalse(res.ok)
+        self.assertIsInstance(res.errors['notreal'], EOSRPCError)
+    
+    def test_concurrency_limit(self):
+        names = [f'acc{i}' for i in range(30)]
+        api = FakeAccountApi(*names)
+        res = asyncio.run(get_accounts(api, names, concurrency=5, raw=True))
+        self.assertEqual(len(res), 30)
+        self.assertIsInstance(res['acc0'], dict)
+        self.assertLessEqual(api.max_active, 5)
+    
+    def test_stream_accounts(self):
+        api = FakeAccountApi('alice', 'bob')
+        
+        async def _collect():
+            return {n: a async for n, a in stream_accounts(api, ['bob', 'nobody', 'alice', 'bob'])}
+        
+        res = asyncio.run(_collect())
+        self.assertEqual(set(res.keys()), {'alice', 'bob', 'nobody'})
+        self.assertIsInstance(res['nobody'], EOSRPCError)
+        self.assertEqual(res['bob'].account_name, 'bob')
+    
+    def test_cached_accounts(self):
+        api, cache = FakeAccountApi('alice', 'bob'), HeadCache(max_age_blocks=6)
+        asyncio.run(get_accounts(api, ['alice', 'bob'], cache=cache))
+        res = asyncio.run(get_accounts(api, ['alice', 'bob'], cache=cache))
+        self.assertEqual(len(api.calls), 2)
+        self.assertEqual(list(res.keys()), ['alice', 'bob'])
+        # Once the chain head moves on past max_age_blocks, cached accounts are re-loaded
+        cache.observe_head(1010)
+        asyncio.run(get_accounts(api, ['alice'], cache=cache))
+        self.assertEqual(len(api.calls), 3)
+
+
+class TestRPCError(TestCase):
+    def test_from_response(self):
+        err = EOSRPCError.from_response(500, dict(code=500, message='Internal Service Error', error=dict(
+            code=3010001, name='name_type_exception', what='Invalid name',
+            details=[dict(message='Name should be less than 13 characters')]
+        )))
+        self.assertEqual(err.name, 'name_type_exception')
+        self.assertEqual(err.code, 3010001)
+        self.assertIn('Name should be less than 13 characters', str(err))
+    
+    def test_from_non_nodeos_response(self):
+        self.assertIsNone(EOSRPCError.from_response(502, dict(message='Bad Gateway')))
+        self.assertIsNone(EOSRPCError.from_response(502, ['not', 'a', 'dict']))
@@ -0,0 +1,71 @@
+import asyncio
+from unittest import TestCase, skipIf
+
+from privex.eos.columnar import np
+from tests.base import make_action, make_raw_block, FakeApi
+
+if np is not None:
+    from privex.eos.analytics import BlockAnalytics
+
+
+def _ts(half_secs: int) -> str:
+    """Block timestamp ``half_secs`` block slots after 2019-12-08T23:00:00"""
+    m, s = divmod(half_secs * 500, 60000)
+    return f'2019-12-08T23:{m:02d}:{s // 1000:02d}.{s % 1000:03d}'
+
+
+@skipIf(np is None, 'numpy is not installed')
+class TestBlockAnalytics(TestCase):
+    def setUp(self) -> None:
+        # Blocks 1..6 in consecutive slots, except 2 slots are missed between block 4 and 5
+        slots = {1: 0, 2: 1, 3: 2, 4: 3, 5: 6, 6: 7}
+        prods = {1: 'alpha', 2: 'alpha', 3: 'beta', 4: 'beta', 5: 'gamma', 6: 'gamma'}
+        self.blocks = {}
+        for n, slot in slots.items():
+            txs = [[make_action()] for _ in range(n)]
+            self.blocks[n] = make_raw_block(n, *txs, producer=prods[n], timestamp=_ts(slot))
+        self.ba = asyncio.run(BlockAnalytics.from_range(FakeApi(self.blocks), 1, 6, capacity=2))
+    
+    def test_producer_counts(self):
+        self.assertEqual(self.ba.producer_block_counts(), dict(alpha=2, beta=2, gamma=2))
+        # make_raw_block gives transaction i a cpu_usage_us of 100 + i
+        self.assertEqual(self.ba.producer_totals('cpu_usage_us')['alpha'], 100 + (100 + 101))
+        self.assertEqual(self.ba.producer_totals('net_usage_words')['beta'], (12 + 13 + 14) + (12 + 13 + 14 + 15))
+        with self.assertRaises(ValueError):
+            self.ba.producer_totals('ram')
+        # The running totals are updated as blocks are added - including after aggregating over column views
+        self.ba.percentiles('cpu_usage_us')
+        self.ba.add_block(make_raw_block(7, [make_action()], [make_action()], producer='delta', timestamp=_ts(8)))
+        self.assertEqual(self.ba.producer_block_counts(), dict(alpha=2, beta=2, gamma=2, delta=1))
+        self.assertEqual(self.ba.producer_totals(), dict(alpha=301, beta=709, gamma=1125, delta=201))
+
+    def test_missed_slots(self):
+        self.assertEqual(self.ba.missed_slots(), 2)
+        # Gaps in the dataset itself (block 7 missing) are not counted as missed slots
+        self.ba.add_block(make_raw_block(8, producer='gamma', timestamp=_ts(20)))
+        self.assertEqual(self.ba.missed_slots(), 2)
+    
+    def test_percentiles(self):
+        p = self.ba.percentiles('cpu_usage_us', (0, 100))
+        self.assertEqual(p, {0: 100.0, 100: 105.0})
+        pp = self.ba.producer_percentiles('cpu_usage_us', (100,))
+        self.assertEqual(pp['alpha'][100], 101.0)
+        self.assertEqual(pp['gamma'][100], 105.0)
+        with self.assertRaises(ValueError):
+            self.ba.percentiles('ram')
+    
+    def test_histograms(self):
+        hists, edges = self.ba.producer_histograms('cpu_usage_us', bins=[0, 102, 200])
+        self.assertEqual(edges, [0, 102, 200])
+        self.assertEqual(hists['alpha'], [3, 0])
+        self.assertEqual(sum(hists['gamma']), 11)
+
+    def test_time_buckets_incremental(self):
+        tb = self.ba.time_buckets(bucket_ms=2000)
+        self.assertEqual(tb['blocks'], [4, 2])
+        self.assertEqual(tb['missed_slots'], [0, 2])
+        self.ba.add_block(make_raw_block(7, [make_action()], producer='gamma', timestamp=_ts(8)))
+        tb = self.ba.time_buckets(bucket_ms=2000)
+        self.assertEqual(tb['blocks'], [4, 2, 1])
+        self.assertEqual(tb['transactions'], [10, 11, 1])
+        self.assertEqual(self.ba.summary()['last_block'], 7)
@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from benchmarks import micro
+from benchmarks.suite import compare, histogram_percentile, parse_args, percentile, run_scenario
+from privex.eos.metrics import Histogram
+
+
+class TestBenchmarkSuite(TestCase):
+    def test_percentile(self):
+        vals = list(range(1, 101))
+        self.assertEqual(percentile(vals, 50), 50)
+        self.assertEqual(percentile(vals, 99), 99)
+        self.assertEqual(percentile(vals, 100), 100)
+        self.assertEqual(percentile([5], 99), 5)
+        self.assertIsNone(percentile([], 50))
+
+    def test_histogram_percentile(self):
+        hist = Histogram('latency', labels=('node',), buckets=(0.01, 0.1, 1.0))
+        self.assertIsNone(histogram_percentile(hist, 50))
+        for _ in range(90):
+            hist.observe(0.005, 'a')
+        for _ in range(9):
+            hist.observe(0.05, 'b')
+        hist.observe(5.0, 'b')
+        self.assertEqual(histogram_percentile(hist, 50), 0.01)
+        self.assertEqual(histogram_percentile(hist, 95), 0.1)
+        self.assertEqual(histogram_percentile(hist, 100), 1.0)   # Past the last bucket, its bound is the best we have
+
+    def test_compare(self):
+        old = dict(scenarios=dict(cold_range=dict(items_per_sec=100.0, p50_ms=None)))
+        new = dict(scenarios=dict(cold_range=dict(items_per_sec=150.0, p50_ms=2.0), other=dict(items_per_sec=1.0)))
+        out = compare(old, new)
+        self.assertIn('+50.0%', out)
+        self.assertNotIn('p50_ms', out)
+        self.assertNotIn('other', out)
+
+    def test_run_scenario(self):
+        res = run_scenario('call_latency', parse_args(['--blocks', '20', '--latency', '0', '--nodes', '1']))
+        self.assertEqual(res['items'], 2)
+        self.assertEqual(res['requests'], 2)    # The get_info call made before timing starts isn't counted
+        self.assertGreater(res['items_per_sec'], 0)
+        self.assertGreater(res['peak_rss_kib'], 0)
+        self.assertIsNotNone(res['p99_ms'])
+
+    def test_run_scenario_hooks(self):
+        res = run_scenario('call_latency', parse_args(['--blocks', '20', '--latency', '0', '--nodes', '1', '--hooks']))
+        self.assertEqual(res['requests'], 2)
+        self.assertEqual(res['failed_requests'], 0)
+
+    def test_headers_scenario(self):
+        res = run_scenario('headers', parse_args(['--blocks', '20', '--latency', '0', '--nodes', '1']))
+        self.assertEqual(res['items'], 20)
+        self.assertTrue(res['block_info'])
+        self.assertLess(res['bytes_per_block'], res['full_bytes_per_block'])
+
+
+class TestMicroBenchmarks(TestCase):
+    def test_run(self):
+        args = micro.parse_args(['--nodes', '3', '--large-txs', '5', '--repeat', '2', '--min-time', '0', '-q'])
+        res = micro.run(args)
+        self.assertEqual(list(res.keys()), list(micro.BENCHMARKS.keys()))
+        for r in res.values():
+            self.assertGreater(r['min_us'], 0)
+            self.assertLessEqual(r['min_us'], r['median_us'])
+
+    def test_regressions(self):
+        old = dict(benchmarks=dict(a=dict(min_us=10.0), b=dict(min_us=10.0)))
+        new = dict(benchmarks=dict(a=dict(min_us=10.5), b=dict(min_us=12.0), c=dict(min_us=1.0)))
+        self.assertEqual([n for n, _ in micro.regressions(old, new, threshold=10)], ['b'])
@@ -0,0 +1,106 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from privex.eos.adapters import IndexAdapter
+from privex.eos.blocktime import find_block_at_time, find_block_range_for_time, to_ms
+from privex.eos.index import BlockTimeIndex
+
+GENESIS = datetime(2019, 1, 1)
+
+
+def _fmt(ms: int) -> str:
+    return (GENESIS + timedelta(milliseconds=ms)).isoformat(timespec='milliseconds')
+
+
+class FakeChainApi:
+    """A chain of ``length`` blocks, 500ms apart, with a random number of missed slots before some blocks"""
+    def __init__(self, length: int = 100000, missed_every: int = 0, seed: int = 1):
+        rng = random.Random(seed)
+        self.offsets, t = [None, 0], 0
+        for n in range(2, length + 1):
+            t += 500
+            if missed_every and rng.randrange(missed_every) == 0:
+                t += 500 * rng.randint(1, 12)
+            self.offsets.append(t)
+        self.head = length
+        self.probes = 0
+    
+    def time_of(self, block_num: int) -> str:
+        return _fmt(self.offsets[block_num])
+    
+    async def get_block_header_raw(self, number: int) -> dict:
+        self.probes += 1
+        return dict(block_num=number, timestamp=self.time_of(number), producer='eosio')
+    
+    async def get_info(self) -> dict:
+        return dict(head_block_num=self.head, head_block_time=self.time_of(self.head))
+    
+    def expected(self, target: str) -> int:
+        t = to_ms(target) - to_ms(GENESIS)
+        return next(n for n in range(1, self.head + 1) if self.offsets[n] >= t)
+
+
+class TestBlockTime(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.adapter = IndexAdapter(db=':memory:')
+    
+    def setUp(self) -> None:
+        self.adapter.recreate_schemas()
+        self.index = BlockTimeIndex(self.adapter)
+    
+    def tearDown(self) -> None:
+        self.adapter.drop_schemas()
+    
+    def _find(self, api, when):
+        return asyncio.run(find_block_at_time(api, when, self.index))
+    
+    def test_no_missed_slots(self):
+        api = FakeChainApi(length=50000)
+        self.assertEqual(self._find(api, api.time_of(31337)), 31337)
+        # Between two blocks, the later block is returned
+        self.assertEqual(self._find(api, GENESIS + timedelta(milliseconds=api.offsets[2000] + 200)), 2001)
+        # Initial probe of block 1, then no further lookups are needed without missed slots
+        self.assertLessEqual(api.probes, 2)
+    
+    def test_missed_slots(self):
+        api = FakeChainApi(length=50000, missed_every=50)
+        rng = random.Random(5)
+        for _ in range(20):
+            t = _fmt(rng.randrange(api.offsets[-1]))
+            self.assertEqual(self._find(api, t), api.expected(t))
+        self.assertLess(api.probes / 20, 12)
+    
+    def test_gets_cheaper_with_use(self):
+        api = FakeChainApi(length=50000, missed_every=20)
+        t = _fmt(api.offsets[25000] - 100)
+        self._find(api, t)
+        probes = api.probes
+        self.assertEqual(self._find(api, t), 25000)
+        self.assertEqual(api.probes, probes)
+        # Points are persisted to the database
+        self.index.flush()
+        self.assertEqual(len(BlockTimeIndex(self.index.adapter)), len(self.index))
+    
+    def test_out_of_range(self):
+        api = FakeChainApi(length=1000)
+        self.assertEqual(self._find(api, GENESIS - timedelta(days=1)), 1)
+        self.assertIsNone(self._find(api, GENESIS + timedelta(days=1)))
+    
+    def test_time_window(self):
+        api = FakeChainApi(length=50000, missed_every=30)
+        start, end = _fmt(api.offsets[1000]), _fmt(api.offsets[2000] + 100)
+        res = asyncio.run(find_block_range_for_time(api, start, end, self.index))
+        self.assertEqual(res, (1000, 2000))
+        res = asyncio.run(find_block_range_for_time(api, start, GENESIS + timedelta(days=30), self.index))
+        self.assertEqual(res, (1000, 50000))
+    
+    def test_ingest_samples(self):
+        idx = BlockTimeIndex(self.adapter, sample_every=100)
+        for n in range(1, 1001):
+            idx.ingest_block(dict(block_num=n, timestamp=_fmt(n * 500)))
+        self.assertEqual(len(idx), 10)
+        self.assertEqual(idx.bracket(to_ms(_fmt(250 * 500))), ((200, to_ms(_fmt(200 * 500))),
+                                                               (300, to_ms(_fmt(300 * 500)))))
@@ -0,0 +1,108 @@
+import asyncio
+from unittest import TestCase
+
+from privex.eos.cache import HeadCache, InfoCache
+
+
+class TestHeadCache(TestCase):
+    def test_expiry_by_head(self):
+        cache = HeadCache(max_age_blocks=3, block_interval=3600)
+        cache.set('a', 1, head_block_num=100)
+        cache.set('b', 2, head_block_num=102)
+        self.assertEqual(cache.get('a'), 1)
+        cache.observe_head(104)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        # Older heads don't move the estimated head backwards
+        cache.observe_head(50)
+        self.assertEqual(cache.head_estimate, 104)
+    
+    def test_lru_eviction(self):
+        cache = HeadCache(max_size=2, block_interval=3600)
+        cache.set('a', 1, 100)
+        cache.set('b', 2, 100)
+        cache.get('a')
+        cache.set('c', 3, 100)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+
+class FakeInfo:
+    def __init__(self, head: int = 1000, delay: float = 0.0):
+        self.head, self.delay, self.calls = head, delay, 0
+    
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        self.head += 1
+        return dict(head_block_num=self.head, last_irreversible_block_num=self.head - 330)
+
+
+class TestInfoCache(TestCase):
+    def test_max_age(self):
+        fetch = FakeInfo()
+        cache = InfoCache(fetch, max_age=60)
+        
+        async def _run():
+            a = await cache.get()
+            b = await cache.get()
+            c = await cache.get(max_age=0)
+            return a, b, c
+        
+        a, b, c = asyncio.run(_run())
+        self.assertIs(a, b)
+        self.assertEqual(c['head_block_num'], 1002)
+        self.assertEqual(fetch.calls, 2)
+        self.assertEqual(cache.last_irreversible_block_num, 672)
+    
+    def test_concurrent_refresh_shared(self):
+        fetch = FakeInfo(delay=0.05)
+        cache = InfoCache(fetch, max_age=60)
+        
+        async def _run():
+            return await asyncio.gather(*[cache.get() for _ in range(10)])
+        
+        res = asyncio.run(_run())
+        self.assertEqual(fetch.calls, 1)
+        self.assertTrue(all(r is res[0] for r in res))
+    
+    def test_head_estimate(self):
+        cache = InfoCache(FakeInfo(), max_age=60)
+        self.assertIsNone(cache.head_block_num)
+        asyncio.run(cache.get())
+        self.assertEqual(cache.head_block_num, 1001)
+        # Pretend the snapshot was loaded 10 seconds ago - 20 blocks should have been produced since
+        cache.fetched_at -= 10
+        self.assertEqual(cache.head_block_num, 1021)
+    
+    def test_head_estimate_max_age(self):
+        fetch = FakeInfo()
+        cache = InfoCache(fetch, max_age=60, max_estimate_age=30)
+        asyncio.run(cache.get())
+        cache.fetched_at -= 29
+        self.assertEqual(cache.head_block_num, 1001 + 58)
+        # Too old to extrapolate from - unknown until the snapshot is refreshed
+        cache.fetched_at -= 2
+        self.assertIsNone(cache.head_block_num)
+        self.assertEqual(cache.last_irreversible_block_num, 671)
+        asyncio.run(cache.get(max_age=0))
+        self.assertEqual(cache.head_block_num, 1002)
+        self.assertEqual(fetch.calls, 2)
+    
+    def test_background_refresh(self):
+        fetch = FakeInfo()
+        cache = InfoCache(fetch, max_age=60)
+        
+        async def _run():
+            cache.start(interval=0.01)
+            await asyncio.sleep(0.1)
+            await cache.stop()
+            calls = fetch.calls
+            await asyncio.sleep(0.05)
+            return calls
+        
+        calls = asyncio.run(_run())
+        self.assertGreater(calls, 3)
+        self.assertEqual(fetch.calls, calls)
+        self.assertLess(cache.age, 1)
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from privex.eos.cassette import CassetteWriter, RecordingClient, ReplayClient, read_cassette, replay_workload
+from privex.eos.exceptions import EOSRPCError
+from privex.eos.lib import Api
+from privex.eos.mock import MockChain, MockCluster, MockNodeConfig
+from tests.base import BaseEOSTest
+
+
+class TestCassette(BaseEOSTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'test.cassette.gz')
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def _record(self, latency: float = 0.0) -> dict:
+        async def _main():
+            async with MockCluster([MockNodeConfig(latency=latency)], chain=MockChain(head_block=1000)) as cluster:
+                cluster.register(self.nm)
+                async with Api(node_manager=self.nm, request_jitter=0, record=self.path) as api:
+                    blocks = await api.get_block_range(990, 999)
+                    await api.get_account('someguy12333')
+                    return blocks
+        return asyncio.run(_main())
+
+    def _replay(self, test, **kwargs):
+        async def _main():
+            async with Api(node_manager=self.nm, request_jitter=0, retry_wait=0, replay=self.path, **kwargs) as api:
+                return await test(api)
+        return asyncio.run(_main())
+
+    def test_record(self):
+        self._record()
+        header, items = read_cassette(self.path)
+        self.assertEqual(header['cassette'], 1)
+        endpoints = [i['e'] for i in items]
+        self.assertEqual(endpoints.count('/v1/chain/get_block'), 10)
+        self.assertEqual(endpoints.count('/v1/chain/get_account'), 1)
+        self.assertTrue(all(i['s'] == 200 and i['d'] >= 0 for i in items))
+
+    def test_replay_offline(self):
+        recorded = self._record()
+        # Point the node manager at a node which doesn't exist - every response must come from the cassette
+        self.nm.adapter.recreate_schemas()
+        self.nm.bulk_insert(dict(url='http://127.0.0.1:1', network='eos'))
+
+        async def _test(api: Api):
+            blocks = await api.get_block_range(990, 999)
+            self.assertEqual([b.id for b in blocks.values()], [b.id for b in recorded.values()])
+            self.assertEqual((await api.get_account('someguy12333')).account_name, 'someguy12333')
+            with self.assertRaises(EOSRPCError) as e:
+                await api.get_block_raw(5)
+            self.assertEqual(e.exception.name, 'cassette_miss_exception')
+            self.assertEqual(api.client.misses, 1)
+        self._replay(_test, replay_speed=None)
+
+    def test_replay_speed(self):
+        self._record(latency=0.1)
+
+        async def _test(api: Api):
+            started = time.monotonic()
+            await api.get_account_raw('someguy12333')
+            return time.monotonic() - started
+        self.assertGreaterEqual(self._replay(_test, replay_speed=1.0), 0.09)
+        self.assertLess(self._replay(_test, replay_speed=None), 0.09)
+
+    def test_replay_workload(self):
+        self._record()
+
+        async def _test(api: Api):
+            res = await replay_workload(api, self.path, speed=None)
+            self.assertEqual(len(res), 11)
+            self.assertEqual(sorted(r['block_num'] for r in res if 'block_num' in r), list(range(990, 1000)))
+            self.assertEqual(api.client.misses, 0)
+        self._replay(_test, replay_speed=None)
+
+    def test_repeated_requests(self):
+        items = [
+            dict(t=0, d=0, n='x', e='/v1/chain/get_info', b={}, s=503, r='Service Unavailable'),
+            dict(t=1, d=0, n='x', e='/v1/chain/get_info', b={}, s=200, r='{"head_block_num": 5}'),
+        ]
+        client = ReplayClient(items, speed=None)
+
+        async def _post():
+            return (await client.post('http://x/v1/chain/get_info', json={})).status_code
+        self.assertEqual([asyncio.run(_post()) for _ in range(3)], [503, 200, 200])
+
+    def test_record_errors(self):
+        class TimeoutClient:
+            async def post(self, url, json=None, **kwargs):
+                await asyncio.sleep(0.05)
+                raise httpx.ReadTimeout('timed out', request=httpx.Request('POST', url))
+
+            async def aclose(self):
+                pass
+
+        client = RecordingClient(TimeoutClient(), CassetteWriter(self.path))
+        with self.assertRaises(httpx.ReadTimeout):
+            asyncio.run(client.post('http://x/v1/chain/get_info', json={}))
+        asyncio.run(client.aclose())
+        rec = read_cassette(self.path)[1][0]
+        self.assertEqual((rec['e'], rec['x'], rec['m']), ('/v1/chain/get_info', 'ReadTimeout', 'timed out'))
+        self.assertGreaterEqual(rec['d'], 0.04)
+        self.assertNotIn('s', rec)
+        # Replayed after the recorded delay, as the same type of exception
+        replay = ReplayClient(self.path, speed=1.0)
+        started = time.monotonic()
+        with self.assertRaises(httpx.ReadTimeout) as e:
+            asyncio.run(replay.post('http://x/v1/chain/get_info', json={}))
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+        self.assertEqual(str(e.exception), 'timed out')
+        self.assertIsInstance(ReplayClient.make_error('NotAnException', 'x', None), ConnectionError)
+
+    def test_replay_no_http_client(self):
+        self._record()
+
+        async def _test(api: Api):
+            return api.client
+        self.assertIsInstance(self._replay(_test), ReplayClient)
@@ -0,0 +1,74 @@
+import asyncio
+import tempfile
+from unittest import TestCase, skipIf
+
+from privex.eos.columnar import ColumnarBuilder, NumberColumn, HashColumn, np, pa
+from privex.eos.stream import ActionFilter
+from tests.base import make_action, make_raw_block, FakeApi
+
+
+class TestColumnarBuilder(TestCase):
+    def setUp(self) -> None:
+        self.blocks = {
+            100: make_raw_block(
+                100, [make_action(to='alice', quantity='1.0000 EOS'), make_action(name='issue')], 'deferred',
+                producer='eoshuobipool'
+            ),
+            101: make_raw_block(101, [make_action(account='eosio', name='buyrambytes')], producer='eosnewyorkio'),
+        }
+        self.cb = asyncio.run(ColumnarBuilder.from_range(FakeApi(self.blocks), 100, 101, capacity=1))
+    
+    def test_number_column_grows(self):
+        col = NumberColumn('q', capacity=2)
+        for i in range(100):
+            col.append(i)
+        self.assertEqual(len(col), 100)
+        self.assertEqual(col.to_list(), list(range(100)))
+    
+    def test_hash_column(self):
+        col = HashColumn(capacity=1)
+        h = self.blocks[100]['id']
+        col.append(h)
+        col.append('not-a-hash')
+        self.assertEqual(col.to_list(), [h, '00' * 32])
+        self.assertEqual(col.nbytes, 64)
+    
+    def test_build_tables(self):
+        cb = self.cb
+        self.assertEqual(len(cb.blocks), 2)
+        self.assertEqual(len(cb.transactions), 3)
+        self.assertEqual(len(cb.actions), 3)
+        d = cb.blocks.to_dict()
+        self.assertEqual(d['block_num'], [100, 101])
+        self.assertEqual(d['producer'], ['eoshuobipool', 'eosnewyorkio'])
+        self.assertEqual(d['tx_count'], [2, 1])
+        txs = cb.transactions.to_dict()
+        self.assertEqual(txs['action_count'], [2, 0, 1])
+        self.assertEqual(txs['cpu_usage_us'], [100, 100, 100])
+        self.assertEqual(cb.actions.to_dict()['name'], ['transfer', 'issue', 'buyrambytes'])
+    
+    def test_action_filter(self):
+        cb = ColumnarBuilder(action_filter=ActionFilter(names='transfer'), action_data=True)
+        for b in self.blocks.values():
+            cb.add_block(b)
+        acts = cb.actions.to_dict()
+        self.assertEqual(acts['name'], ['transfer'])
+        self.assertIn('"to": "alice"', acts['data'][0])
+        # Transactions are still recorded in full, only actions are filtered
+        self.assertEqual(len(cb.transactions), 3)
+    
+    @skipIf(np is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        arrs = self.cb.to_numpy()
+        self.assertEqual(list(arrs['blocks']['block_num']), [100, 101])
+        self.assertEqual(arrs['blocks']['producer'][1], 'eosnewyorkio')
+        self.assertEqual(arrs['transactions']['id'][0].tobytes().hex(), self.blocks[100]['transactions'][0]['trx']['id'])
+    
+    @skipIf(pa is None, 'pyarrow is not installed')
+    def test_to_arrow_parquet(self):
+        tables = self.cb.to_arrow()
+        self.assertEqual(tables['actions'].num_rows, 3)
+        self.assertEqual(tables['actions'].column('account').to_pylist(), ['eosio.token', 'eosio.token', 'eosio'])
+        with tempfile.TemporaryDirectory() as d:
+            files = self.cb.write_parquet(d)
+            self.assertEqual(len(files), 3)
@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import json
+import tempfile
+from unittest import TestCase
+
+from privex.eos.export import NDJSONSink, NDJSONReader, list_segments, read_index, index_path
+from privex.eos.stream import stream_raw_blocks
+from tests.base import make_action, make_raw_block, FakeApi
+
+
+class TestNDJSONExport(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.blocks = {n: make_raw_block(n, [make_action(to='alice')]) for n in range(1000, 1050)}
+    
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+    
+    def test_write_rotate_and_index(self):
+        with NDJSONSink(self.folder, rotate_records=20, chunk_records=5) as sink:
+            for b in self.blocks.values():
+                sink.write_block(b)
+        segs = list_segments(self.folder)
+        self.assertEqual(len(segs), 3)
+        idx = read_index(index_path(segs[0]))
+        self.assertEqual(len(idx), 4)
+        self.assertEqual((idx[0].first_key, idx[0].last_key, idx[0].offset), (1000, 1004, 0))
+        self.assertEqual(idx[1].offset, idx[0].length)
+        # Each segment is still a plain (multi-member) gzip file
+        with gzip.open(segs[0], 'rt') as fh:
+            nums = [json.loads(line)['block_num'] for line in fh]
+        self.assertEqual(nums, list(range(1000, 1020)))
+
+    def test_reader_seek(self):
+        with NDJSONSink(self.folder, rotate_records=20, chunk_records=5) as sink:
+            for b in self.blocks.values():
+                sink.write_block(b)
+        reader = NDJSONReader(self.folder)
+        self.assertEqual([b['block_num'] for b in reader.read(1018, 1022)], [1018, 1019, 1020, 1021, 1022])
+        self.assertEqual(reader.get(1033)['id'], self.blocks[1033]['id'])
+        self.assertIsNone(reader.get(5000))
+        self.assertEqual(len(list(reader.read())), 50)
+    
+    def test_reader_explicit_keys(self):
+        # Records without a block_num, written under their own (unordered) keys, with a keyless record mixed in
+        keys = [5, 3, 8, 0, 9, 1, 7, 2, 6, 4]
+        with NDJSONSink(self.folder, prefix='things', chunk_records=4) as sink:
+            for i, k in enumerate(keys):
+                sink.write(dict(id=i), key=k)
+            sink.write(dict(id='nokey'))
+        reader = NDJSONReader(self.folder, prefix='things')
+        self.assertEqual(reader.get(7), dict(id=6))
+        self.assertEqual(sorted(r['id'] for r in reader.read(3, 4)), [1, 9])
+        self.assertIsNone(reader.get(10))
+        self.assertEqual(len(list(reader.read())), 11)
+        idx = read_index(index_path(list_segments(self.folder, 'things')[0]))
+        self.assertEqual(idx[0].keys, [5, 3, 8, 0])
+
+    def test_read_index_requires_keys(self):
+        with NDJSONSink(self.folder, chunk_records=5) as sink:
+            for b in self.blocks.values():
+                sink.write_block(b)
+        # Every line must have the keys column
+        path = index_path(list_segments(self.folder)[0])
+        with open(path) as fh:
+            lines = fh.read().splitlines()
+        with open(path, 'w') as fh:
+            fh.write('\n'.join(lines + [lines[-1].rsplit('\t', 1)[0]]) + '\n')
+        with self.assertRaises(ValueError):
+            read_index(path)
+
+    def test_write_stream_resume(self):
+        api = FakeApi(self.blocks)
+        sink = NDJSONSink(self.folder, rotate_records=30, chunk_records=7)
+        count = asyncio.run(sink.write_stream(stream_raw_blocks(api, 1000, 1039)))
+        sink.close()
+        self.assertEqual(count, 40)
+        # A new sink continues after the existing segments instead of overwriting them
+        with NDJSONSink(self.folder, normalise=True) as sink:
+            for n in range(1040, 1050):
+                sink.write_block(self.blocks[n])
+        self.assertEqual(len(list_segments(self.folder)), 3)
+        blocks = list(NDJSONReader(self.folder).read())
+        self.assertEqual([b['block_num'] for b in blocks], list(range(1000, 1050)))
+        self.assertIn('transaction_mroot', blocks[-1])
@@ -0,0 +1,72 @@
+import asyncio
+from privex.eos.exceptions import EOSRPCError
+from privex.eos.lib import Api
+from privex.eos.objects import EOSBlockHeader, block_header
+from privex.eos.stream import stream_raw_blocks
+from tests.base import make_raw_block, make_action, FakeApi, BaseEOSTest
+
+
+def make_header_api(nm, blocks: dict, supported_apis: list = None, missing_endpoint: bool = False) -> Api:
+    """
+    Create an :class:`.Api` using the NodeManager ``nm``, with ``client`` removed and ``_call`` replaced by a fake
+    which serves ``get_block``, ``get_block_info`` and ``get_supported_apis`` from ``blocks``
+    """
+    api = Api(node_manager=nm, request_jitter=0)
+    api.client, api.calls = None, []
+
+    async def _call(endpoint, **kwargs):
+        api.calls.append(endpoint)
+        if endpoint.endswith('get_supported_apis'):
+            if supported_apis is None:
+                raise EOSRPCError('Unknown Endpoint', status=404)
+            return dict(apis=supported_apis)
+        if endpoint.endswith('get_block_info'):
+            if missing_endpoint:
+                raise EOSRPCError('Unknown Endpoint', status=404)
+            return block_header(blocks[kwargs['block_num']])
+        return blocks[kwargs['block_num_or_id']]
+
+    api._call = _call
+    return api
+
+
+class TestBlockHeaders(BaseEOSTest):
+    blocks = {
+        n: make_raw_block(n, [make_action(to='bob', quantity='1.0000 EOS')] * 3, producer=f'prod{n % 3}')
+        for n in range(100, 110)
+    }
+    
+    def test_block_header(self):
+        h = block_header(self.blocks[100])
+        self.assertNotIn('transactions', h)
+        hdr = EOSBlockHeader.from_dict(h)
+        self.assertEqual(hdr.block_num, 100)
+        self.assertEqual(hdr.producer, 'prod1')
+        self.assertEqual(hdr.previous, self.blocks[100]['previous'])
+    
+    def test_uses_block_info(self):
+        api = make_header_api(self.nm, self.blocks, supported_apis=['/v1/chain/get_block', '/v1/chain/get_block_info'])
+        hdr = asyncio.run(api.get_block_header(105))
+        self.assertEqual(hdr.block_num, 105)
+        asyncio.run(api.get_block_header(106))
+        # get_supported_apis is only called once
+        self.assertEqual(api.calls, ['/v1/node/get_supported_apis', '/v1/chain/get_block_info',
+                                     '/v1/chain/get_block_info'])
+    
+    def test_falls_back_to_get_block(self):
+        api = make_header_api(self.nm, self.blocks, supported_apis=None)
+        hdr = asyncio.run(api.get_block_header(105))
+        self.assertEqual(hdr.id, self.blocks[105]['id'])
+        self.assertFalse(api.block_info_supported)
+        self.assertEqual(api.calls[-1], '/v1/chain/get_block')
+        # Advertised as supported, but the node serving the call doesn't actually have it
+        api = make_header_api(self.nm, self.blocks, supported_apis=['/v1/chain/get_block_info'], missing_endpoint=True)
+        self.assertEqual(asyncio.run(api.get_block_header_raw(101))['block_num'], 101)
+        self.assertEqual(api.calls[-2:], ['/v1/chain/get_block_info', '/v1/chain/get_block'])
+    
+    def test_stream_headers(self):
+        async def _collect():
+            return [h async for h in stream_raw_blocks(FakeApi(self.blocks), 100, 109, headers=True)]
+        headers = asyncio.run(_collect())
+        self.assertEqual([h['block_num'] for h in headers], list(range(100, 110)))
+        self.assertTrue(all('transactions' not in h for h in headers))
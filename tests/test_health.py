@@ -0,0 +1,84 @@
+import asyncio
+
+from privex.eos.health import NodeProber
+from privex.eos.lib import Api
+from tests.base import BaseEOSTest, FakeResponse
+
+
+class FakeHttpClient:
+    """Responds to ``get_info`` with ``heads[base_url]``, or raises it if it's an exception"""
+    def __init__(self, heads: dict):
+        self.heads = heads
+    
+    async def post(self, url, json=None, headers=None):
+        await asyncio.sleep(0)
+        head = self.heads[url.rsplit('/v1/', 1)[0]]
+        if isinstance(head, Exception):
+            raise head
+        return FakeResponse(data=dict(head_block_num=head, last_irreversible_block_num=head - 330))
+
+
+class TestNodeHealth(BaseEOSTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.nm.bulk_insert(*self.node_dicts)
+        self.nm.max_head_lag = 30
+        self.urls = [n.url for n in self.example_nodes]
+    
+    def _probe(self, heads: dict):
+        prober = NodeProber(self.nm, client=FakeHttpClient(dict(zip(self.urls, heads))))
+        return asyncio.run(prober.probe_all())
+    
+    def _routable(self):
+        return sorted(n.url for n in self.nm.get_nodes(filter_lag=True))
+    
+    def test_probe_records_health(self):
+        res = self._probe([1000, 990, ConnectionError('refused')])
+        self.assertEqual(len(res), 3)
+        health = self.nm.node_health()
+        by_url = {self.nm.node_by_id(k).url: v for k, v in health.items()}
+        self.assertEqual(by_url[self.urls[0]].head_block_num, 1000)
+        self.assertEqual(by_url[self.urls[1]].last_irreversible_block_num, 660)
+        self.assertIsNotNone(by_url[self.urls[0]].latency_ms)
+        self.assertFalse(by_url[self.urls[2]].ok)
+        self.assertIn('ConnectionError', by_url[self.urls[2]].error)
+    
+    def test_lagging_nodes_excluded(self):
+        self._probe([1000, 960, 995])
+        self.assertEqual(self._routable(), sorted([self.urls[0], self.urls[2]]))
+        # Nodes which failed their last probe are excluded too
+        self._probe([1000, 1000, ConnectionError('refused')])
+        self.assertEqual(self._routable(), sorted(self.urls[:2]))
+        # Api calls are only routed to routable nodes
+        api = Api(node_manager=self.nm, request_jitter=0)
+        api.client = None
+        for _ in range(20):
+            self.assertIn(api._node_for_block()[0], self.urls[:2])
+    
+    def test_weighted_node_skips_health(self):
+        # Without filter_lag, picking a node doesn't query the health table (e.g. when no prober has ever run)
+        self._probe([1000, 960, 995])
+        calls = []
+        node_health = self.nm.node_health
+        self.nm.node_health = lambda *a, **kw: calls.append(a) or node_health(*a, **kw)
+        try:
+            self.assertIn(self.nm.weighted_node.url, self.urls)
+            self.assertEqual(calls, [])
+            self.nm.get_nodes(filter_lag=True, health=node_health())
+            self.assertEqual(calls, [])
+        finally:
+            del self.nm.node_health
+    
+    def test_no_health_data(self):
+        self.assertEqual(self._routable(), sorted(self.urls))
+    
+    def test_all_lagging_falls_back(self):
+        self._probe([ConnectionError('refused')] * 3)
+        self.assertEqual(self._routable(), sorted(self.urls))
+    
+    def test_stale_results_ignored(self):
+        self._probe([1000, 900, 1000])
+        self.nm.adapter.action("UPDATE node_health SET checked_at = '2000-01-01 00:00:00';")
+        self.assertEqual(self.nm.node_health(), {})
+        self.assertEqual(self._routable(), sorted(self.urls))
+        self.assertEqual(len(self.nm.node_health(max_age=0)), 3)
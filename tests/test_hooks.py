@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+from privex.eos.hooks import EventRecorder, RequestHook, SlowCallLogger
+from privex.eos.lib import Api
+from tests.base import BaseEOSTest, FlakyClient
+
+
+class BrokenHook(RequestHook):
+    def on_response(self, event):
+        raise ValueError('broken hook')
+
+
+class TestRequestHooks(BaseEOSTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.nm.bulk_insert(*self.node_dicts)
+        self.rec = EventRecorder()
+        self.api = Api(node_manager=self.nm, request_jitter=0, retry_wait=0, hooks=[self.rec])
+
+    def tearDown(self) -> None:
+        self.api.client = None
+        super().tearDown()
+
+    def test_events(self):
+        self.api.client = FlakyClient()
+        asyncio.run(self.api.get_info())
+        self.assertEqual(self.rec.names(), ['on_request_start', 'on_response', 'on_decode'])
+        ev = self.rec.last('on_decode')
+        self.assertEqual(ev.endpoint, '/v1/chain/get_info')
+        self.assertIn(ev.node, [n['url'] for n in self.node_dicts])
+        self.assertEqual(ev.status, 200)
+        self.assertEqual(ev.request_size, 2)
+        self.assertGreater(ev.response_size, 0)
+        self.assertGreaterEqual(ev.network_time, 0)
+        self.assertGreaterEqual(ev.decode_time, 0)
+        self.assertAlmostEqual(ev.total_time, ev.queue_time + ev.network_time + ev.decode_time)
+
+    def test_failover_and_retry(self):
+        self.api.client = FlakyClient(failures=1)
+        asyncio.run(self.api.get_info())
+        self.assertEqual(self.rec.names(), [
+            'on_request_start', 'on_failover', 'on_retry', 'on_request_start', 'on_response', 'on_decode'
+        ])
+        failed = self.rec.last('on_failover')
+        self.assertIsInstance(failed.error, ConnectionError)
+        self.assertEqual(failed.attempt, 0)
+        self.assertEqual(self.rec.last('on_decode').attempt, 1)
+
+    def test_hook_errors_are_contained(self):
+        self.api.add_hook(BrokenHook())
+        self.api.client = FlakyClient()
+        with self.assertLogs('privex.eos.lib', level=logging.ERROR):
+            res = asyncio.run(self.api.get_info())
+        self.assertEqual(res['head_block_num'], 100)
+        self.assertIn('on_decode', self.rec.names())
+
+    def test_slow_call_logger(self):
+        self.api.hooks = [SlowCallLogger(threshold=0)]
+        self.api.client = FlakyClient()
+        with self.assertLogs('privex.eos.hooks', level=logging.WARNING) as logs:
+            asyncio.run(self.api.get_info())
+        self.assertIn('Slow call to', logs.output[0])
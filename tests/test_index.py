@@ -0,0 +1,144 @@
+import asyncio
+from unittest import TestCase
+
+from privex.eos.adapters import IndexAdapter, SqliteAdapter
+from privex.eos.index import ActionIndex, ActionRef, TransactionIndex
+from privex.eos.lib import Api
+from privex.eos.node import NodeManager
+from privex.eos.stream import ActionFilter
+from tests.base import FakeResponse, make_action, make_raw_block
+
+
+class BaseIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.adapter = IndexAdapter(db=':memory:')
+    
+    def setUp(self) -> None:
+        self.adapter.recreate_schemas()
+        self.blocks = [
+            make_raw_block(
+                100, [make_action(actor='alice', **{'from': 'alice', 'to': 'bob', 'quantity': '1.0000 EOS'})],
+                'deferred-trx-id', [make_action(account='eosio', name='voteproducer', actor='carol', voter='carol')]
+            ),
+            make_raw_block(101, [make_action(name='issue', actor='eosio', to='alice')]),
+            make_raw_block(102, [make_action(actor='dave', **{'from': 'dave', 'to': 'erin'})]),
+        ]
+    
+    def tearDown(self) -> None:
+        self.adapter.drop_schemas()
+
+
+class TestActionIndex(BaseIndexTest):
+    def test_batched_ingest(self):
+        idx = ActionIndex(adapter=self.adapter, batch_size=3)
+        idx.ingest_block(self.blocks[0])
+        self.assertEqual(idx.pending, 2)
+        idx.ingest_block(self.blocks[1])
+        # The batch size was reached, so the buffered actions were written out
+        self.assertEqual(idx.pending, 0)
+        idx.ingest_block(self.blocks[2])
+        self.assertEqual(idx.pending, 1)
+        self.assertEqual(idx.block_bounds, (100, 102))
+        self.assertEqual(idx.pending, 0)
+
+    def test_find_by_account(self):
+        idx = ActionIndex(adapter=self.adapter)
+        for b in self.blocks:
+            idx.ingest_block(b)
+        self.assertEqual(idx.find_blocks(account='alice'), [100, 101])
+        refs = idx.find_actions(account='alice', name='transfer')
+        self.assertEqual(refs, [ActionRef(100, 0, 0, 'eosio.token', 'transfer')])
+        self.assertEqual(idx.find_blocks(account='bob'), [100])
+        self.assertEqual(idx.find_blocks(account='alice', start_block=101), [101])
+        self.assertEqual(idx.find_blocks(account='nobody'), [])
+    
+    def test_find_by_contract(self):
+        idx = ActionIndex(adapter=self.adapter)
+        for b in self.blocks:
+            idx.ingest_block(b)
+        # Re-ingesting the same block doesn't create duplicates
+        idx.ingest_block(self.blocks[0])
+        self.assertEqual(idx.find_blocks(contract='eosio.token'), [100, 101, 102])
+        refs = idx.find_actions(contract='eosio', name='voteproducer')
+        self.assertEqual([(r.block_num, r.trx_index, r.action_index) for r in refs], [(100, 2, 0)])
+        self.assertEqual(len(idx.find_actions(contract='eosio.token', limit=2)), 2)
+
+    def test_filtered_index(self):
+        idx = ActionIndex(adapter=self.adapter, action_filter=ActionFilter(names='transfer'))
+        for b in self.blocks:
+            idx.ingest_block(b)
+        self.assertEqual(idx.find_blocks(), [100, 102])
+
+
+class TestTransactionIndex(BaseIndexTest):
+    def test_lookup(self):
+        idx = TransactionIndex(adapter=self.adapter, batch_size=2)
+        for b in self.blocks:
+            idx.ingest_block(b)
+        trx_id = self.blocks[2]['transactions'][0]['trx']['id']
+        self.assertEqual(idx.lookup(trx_id), [102])
+        self.assertEqual(idx.pending, 0)
+        # IDs which aren't valid hex can't be indexed
+        self.assertEqual(idx.lookup('deferred-trx-id'), [])
+        self.assertEqual(idx.lookup('ff' * 32), [])
+
+    def test_prefix_collision(self):
+        # Deferred transactions (where trx is only the ID string) are indexed too
+        idx = TransactionIndex(adapter=self.adapter)
+        idx.ingest_block(make_raw_block(200, 'aa' * 8 + '01' * 24))
+        idx.ingest_block(make_raw_block(201, 'aa' * 8 + '02' * 24))
+        self.assertEqual(idx.lookup('aa' * 8 + '02' * 24), [200, 201])
+        self.assertEqual(len(TransactionIndex.id_prefix('aa' * 32)), TransactionIndex.PREFIX_BYTES)
+
+
+class BlockClient:
+    """Serves ``get_block`` from ``blocks`` (and ``get_info``), recording the block numbers requested"""
+    def __init__(self, blocks: dict):
+        self.blocks, self.calls = blocks, []
+
+    async def post(self, url, json=None, headers=None):
+        await asyncio.sleep(0)
+        if url.endswith('/get_info'):
+            return FakeResponse(200, dict(head_block_num=1000, last_irreversible_block_num=1000))
+        self.calls.append(json['block_num_or_id'])
+        return FakeResponse(200, self.blocks[json['block_num_or_id']])
+
+
+class TestTransactionLookup(BaseIndexTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.blocks += [make_raw_block(200, 'aa' * 8 + '01' * 24), make_raw_block(201, 'aa' * 8 + '02' * 24)]
+        nm = NodeManager(adapter=SqliteAdapter(db=':memory:'))
+        nm.bulk_insert(dict(url='https://node.example.com', network='eos'))
+        self.api = Api(node_manager=nm, request_jitter=0)
+        self.api.client = self.client = BlockClient({b['block_num']: b for b in self.blocks})
+        self.idx = TransactionIndex(adapter=self.adapter)
+        for b in self.blocks:
+            self.idx.ingest_block(b)
+
+    def test_hit(self):
+        trx_id = self.blocks[2]['transactions'][0]['trx']['id']
+        block = asyncio.run(self.api.get_transaction_block(trx_id.upper(), index=self.idx))
+        self.assertEqual(block.block_num, 102)
+        self.api.add_index(self.idx)
+        tx = asyncio.run(self.api.find_transaction(trx_id))
+        self.assertEqual(tx.id, trx_id)
+        self.assertEqual(self.client.calls, [102, 102])
+
+    def test_miss(self):
+        self.assertIsNone(asyncio.run(self.api.get_transaction_block('ff' * 32, index=self.idx)))
+        self.assertIsNone(asyncio.run(self.api.find_transaction('ff' * 32, index=self.idx)))
+        self.assertEqual(self.client.calls, [])
+        with self.assertRaises(ValueError):
+            asyncio.run(self.api.get_transaction_block('ff' * 32))
+
+    def test_prefix_collision(self):
+        # Both blocks share the ID prefix, so each is loaded until the full ID matches
+        tx = asyncio.run(self.api.find_transaction('aa' * 8 + '02' * 24, index=self.idx))
+        self.assertEqual(tx.id, 'aa' * 8 + '02' * 24)
+        self.assertEqual(self.client.calls, [200, 201])
+        # A full ID that only matches the prefix isn't found
+        self.client.calls = []
+        self.assertIsNone(asyncio.run(self.api.get_transaction_block('aa' * 8 + '03' * 24, index=self.idx)))
+        self.assertEqual(self.client.calls, [200, 201])
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from privex.eos.lib import Api
+from privex.eos.memory import STAGES, MemoryProfiler, StageRule
+from privex.eos.mock import MockChain, MockCluster, MockNodeConfig, synthetic_block
+from privex.eos.objects import EOSBlock
+from tests.base import BaseEOSTest
+
+
+class TestMemoryProfiler(BaseEOSTest):
+    def test_stages(self):
+        prof = MemoryProfiler(interval=None)
+        prof.start()
+        try:
+            raw = json.loads(json.dumps([synthetic_block(i, txs_per_block=20) for i in range(20)]))
+            blocks = [EOSBlock.from_dict(b) for b in raw]
+            s = prof.sample()
+        finally:
+            prof.stop()
+        self.assertEqual(len(blocks), 20)
+        self.assertEqual(set(s.stages.keys()), set(STAGES))
+        self.assertGreater(s.stages['decode'], 100 * 1024)
+        self.assertGreater(s.stages['objects'], 0)
+        self.assertIn('decoder.py', s.sites['decode'][0][0])
+        # start() then stop() sample as well
+        self.assertEqual(len(prof.samples), 3)
+
+    def test_custom_rules(self):
+        prof = MemoryProfiler(interval=None, rules=[StageRule('results', __file__)])
+        prof.start()
+        try:
+            data = [str(i) * 10 for i in range(10000)]
+            s = prof.sample()
+        finally:
+            prof.stop()
+        self.assertEqual(len(data), 10000)
+        self.assertGreater(s.stages['results'], 100 * 1024)
+        self.assertEqual(s.stages['decode'], 0)
+
+    def test_block_range(self):
+        async def _main():
+            async with MockCluster([MockNodeConfig()], chain=MockChain(head_block=1000)) as cluster:
+                cluster.register(self.nm)
+                async with Api(node_manager=self.nm, request_jitter=0) as api:
+                    async with MemoryProfiler(api, interval=0.05) as prof:
+                        await api.get_block_range(991, 1000)
+                    self.assertNotIn(prof, api.hooks)
+                    return prof
+        prof = asyncio.run(_main())
+        self.assertEqual(prof.blocks, 10)
+        self.assertGreater(len(prof.samples), 2)
+        r = prof.report()
+        self.assertEqual(r['blocks'], 10)
+        self.assertGreater(r['response_bytes_per_block'], 0)
+        self.assertGreater(r['stages']['decode']['bytes_per_block'], 0)
+        self.assertIn('bytes/block', prof.format_report())
@@ -0,0 +1,85 @@
+import asyncio
+from unittest import TestCase
+
+from privex.eos.lib import Api
+from privex.eos.metrics import MetricsRegistry, ApiMetrics
+from tests.base import BaseEOSTest, FlakyClient
+
+
+class TestMetricsRegistry(TestCase):
+    def test_counter_and_gauge(self):
+        reg = MetricsRegistry()
+        c = reg.counter('calls_total', 'Calls', ('node',))
+        g = reg.gauge('in_flight', 'In flight')
+        c.inc('a')
+        c.inc('a', amount=2)
+        c.inc('b')
+        g.inc()
+        g.inc()
+        g.dec()
+        snap = reg.snapshot()
+        self.assertEqual(snap['calls_total'], [dict(labels=dict(node='a'), value=3), dict(labels=dict(node='b'), value=1)])
+        self.assertEqual(snap['in_flight'], [dict(labels={}, value=1)])
+        # Registering the same name again returns the existing metric
+        self.assertIs(reg.counter('calls_total'), c)
+
+    def test_histogram(self):
+        reg = MetricsRegistry()
+        h = reg.histogram('latency_seconds', 'Latency', ('node',), buckets=(0.1, 1.0))
+        for v in (0.05, 0.1, 0.5, 3.0):
+            h.observe(v, 'a')
+        s = reg.snapshot()['latency_seconds'][0]
+        self.assertEqual(s['count'], 4)
+        self.assertAlmostEqual(s['sum'], 3.65)
+        self.assertEqual(s['buckets'], {'0.1': 2, '1': 3, '+Inf': 4})
+
+    def test_prometheus_text(self):
+        reg = MetricsRegistry(prefix='eos_')
+        reg.counter('calls_total', 'Calls', ('node',)).inc('https://a"b')
+        reg.histogram('latency_seconds', 'Latency', buckets=(1.0,)).observe(0.5)
+        text = reg.to_prometheus()
+        self.assertIn('# TYPE eos_calls_total counter', text)
+        self.assertIn('eos_calls_total{node="https://a\\"b"} 1', text)
+        self.assertIn('eos_latency_seconds_bucket{le="1"} 1', text)
+        self.assertIn('eos_latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('eos_latency_seconds_count 1', text)
+        self.assertTrue(text.endswith('\n'))
+
+
+class TestApiMetrics(BaseEOSTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.nm.bulk_insert(*self.node_dicts)
+
+    def tearDown(self) -> None:
+        self.api.client = None
+        self.nm.metrics = None
+        super().tearDown()
+
+    def test_disabled_by_default(self):
+        self.api = Api(node_manager=self.nm, request_jitter=0, retry_wait=0)
+        self.api.client = FlakyClient()
+        self.assertIsNone(self.api.metrics)
+        asyncio.run(self.api.get_info())
+
+    def test_request_metrics(self):
+        self.api = Api(node_manager=self.nm, request_jitter=0, retry_wait=0, metrics=True)
+        self.api.client = FlakyClient(failures=1)
+        asyncio.run(self.api.get_info())
+        asyncio.run(self.api.get_info())   # Served from the get_info cache
+        m = self.api.metrics
+        self.assertIsInstance(m, ApiMetrics)
+        snap = m.snapshot()
+        statuses = {s['labels']['status']: s['value'] for s in snap['eos_rpc_requests_total']}
+        self.assertEqual(statuses, {'ConnectionError': 1, 'ok': 1})
+        self.assertEqual(sum(s['value'] for s in snap['eos_rpc_retries_total']), 1)
+        self.assertEqual(sum(s['value'] for s in snap['eos_node_failures_total']), 1)
+        self.assertEqual(sum(s['count'] for s in snap['eos_rpc_request_seconds']), 2)
+        self.assertGreater(sum(s['value'] for s in snap['eos_rpc_received_bytes_total']), 0)
+        self.assertEqual(snap['eos_rpc_in_flight'], [dict(labels={}, value=0)])
+        caches = {s['labels']['cache']: s['value'] for s in snap['eos_cache_hits']}
+        self.assertEqual(caches['get_info'], 1)
+        weights = [s['value'] for s in snap['eos_node_weight']]
+        self.assertEqual(len(weights), len(self.node_dicts))
+        self.assertEqual(weights.count(0), 1)     # The node which just failed is excluded from routing
+        self.assertIn('eos_rpc_request_seconds_bucket{node=', m.to_prometheus())
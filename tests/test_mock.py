@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import httpx
+
+from privex.eos.lib import Api
+from privex.eos.mock import MockChain, MockCluster, MockNodeConfig, synthetic_block
+from privex.eos.objects import EOSBlock, block_header
+from tests.base import BaseEOSTest
+
+
+class TestMockNode(BaseEOSTest):
+    """Runs a real :class:`.Api` (and HTTP client) against local mock nodes"""
+    def _run(self, configs, test, chain=None, **api_kwargs):
+        async def _main():
+            async with MockCluster(configs, chain=MockChain(head_block=1000) if chain is None else chain) as cluster:
+                cluster.register(self.nm)
+                api = Api(node_manager=self.nm, request_jitter=0, retry_wait=0, **api_kwargs)
+                try:
+                    return await test(api, cluster)
+                finally:
+                    await api.close()
+        return asyncio.run(_main())
+
+    def test_synthetic_blocks_are_deterministic(self):
+        self.assertEqual(synthetic_block(500), synthetic_block(500))
+        b = EOSBlock.from_dict(synthetic_block(500))
+        self.assertEqual(b.block_num, 500)
+        self.assertEqual(b.previous, synthetic_block(499)['id'])
+
+    def test_endpoints(self):
+        async def _test(api: Api, cluster: MockCluster):
+            info = await api.get_info()
+            self.assertEqual(info['head_block_num'], 1000)
+            blocks = await api.get_block_range(900, 920)
+            self.assertEqual(sorted(blocks.keys()), list(range(900, 921)))
+            acc = await api.get_account('someguy12333')
+            self.assertEqual(acc.account_name, 'someguy12333')
+            rows = [r async for r in api.iter_table_rows('eosio.token', 'accounts', 'someguy12333')]
+            self.assertEqual(rows[0]['balance'], acc.core_liquid_balance)
+            self.assertIn('/v1/chain/get_block', await api.get_supported_apis())
+        self._run([MockNodeConfig()], _test)
+
+    def test_block_info(self):
+        async def _test(api: Api, cluster: MockCluster):
+            self.assertEqual(await api.get_block_header_raw(500), block_header(synthetic_block(500)))
+            self.assertTrue(api.block_info_supported)
+            self.assertEqual([st['not_found'] for st in cluster.stats().values()], [0])
+        self._run([MockNodeConfig()], _test)
+
+    def test_table_pagination(self):
+        rows = [dict(id=i) for i in range(25)]
+        chain = MockChain(head_block=1000, tables={('mycontract', 'things', 'mycontract'): rows})
+
+        async def _test(api: Api, cluster: MockCluster):
+            res = [r async for r in api.iter_table_rows('mycontract', 'things', limit=10, min_limit=10, max_limit=10)]
+            self.assertEqual(res, rows)
+        self._run([MockNodeConfig()], _test, chain=chain)
+
+    def test_failover(self):
+        async def _test(api: Api, cluster: MockCluster):
+            for _ in range(10):
+                await api.get_block_raw(500)
+            return cluster.stats()
+        stats = self._run([MockNodeConfig(error_rate=1.0), MockNodeConfig()], _test, info_max_age=0)
+        broken, working = list(stats.values())
+        self.assertEqual(broken['errors'], broken['requests'])
+        self.assertEqual(working['errors'], 0)
+        fails = {n.url: n.fail_count for n in self.nm.get_nodes()}
+        self.assertEqual(sorted(fails.values()), [0, broken['requests']])
+
+    def test_head_lag(self):
+        async def _test(api: Api, cluster: MockCluster):
+            lagging, current = cluster.urls
+            await api.get_info(max_age=0)
+            block = await api.get_block_raw(995)
+            self.assertEqual(block['block_num'], 995)
+            self.assertGreater(cluster.stats()[current]['requests'], 0)
+            fails = {n.url: n.fail_count for n in self.nm.get_nodes()}
+            self.assertEqual(fails[lagging], 0)
+        self._run([MockNodeConfig(head_lag=50), MockNodeConfig()], _test)
+
+    def test_rate_limit(self):
+        async def _test(api: Api, cluster: MockCluster):
+            node = cluster.nodes[0]
+            async with httpx.AsyncClient() as client:
+                codes = [(await client.post(node.url + '/v1/chain/get_info', json={})).status_code for _ in range(4)]
+            self.assertEqual(codes, [200, 200, 429, 429])
+            self.assertEqual(node.stats['rate_limited'], 2)
+        self._run([MockNodeConfig(rate_limit=2)], _test)
+
+    def test_latency(self):
+        async def _test(api: Api, cluster: MockCluster):
+            started = time.monotonic()
+            await api.get_info()
+            return time.monotonic() - started
+        self.assertGreaterEqual(self._run([MockNodeConfig(slow_rate=1.0, slow_latency=0.2)], _test), 0.2)
@@ -1,5 +1,7 @@
 import math
 
+from privex.eos import NodeManager
+from privex.eos.adapters import SqliteAdapter
 from privex.eos.node import _node_to_row, convert_nodes_weighted
 from tests.base import BaseEOSTest
 import logging
@@ -90,3 +92,9 @@ class TestNodeManager(BaseEOSTest):
         self.assertEqual(counts[nodes[1].url], math.ceil(total_fails / nodes[1].fail_count))
         self.assertEqual(counts[nodes[2].url], math.ceil(total_fails / 1))
         log.warning("Node counts: %s", counts)
+
+    def test_separate_memory_databases(self):
+        # Every ':memory:' connection is its own empty database, so each one needs its tables created
+        nm = NodeManager(adapter=SqliteAdapter(db=':memory:'))
+        nm.bulk_insert(*self.node_dicts)
+        self.assertEqual(len(nm.get_nodes()), len(self.node_dicts))
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from privex.eos.exceptions import EOSRPCError
+from privex.eos.lib import Api
+from tests.base import BaseEOSTest, FakeResponse, make_raw_block
+
+
+class FakeChainClient:
+    """
+    Serves ``get_block`` / ``get_info`` for nodes with different head blocks (``heads[base_url]``), which only have
+    the blocks from ``first_block`` onwards
+    """
+    def __init__(self, heads: dict, grow_every: float = None, first_block: int = 1):
+        self.heads, self.grow_every, self.started = heads, grow_every, time.monotonic()
+        self.first_block = first_block
+        self.calls = []
+    
+    def head(self, node: str) -> int:
+        grown = 0 if self.grow_every is None else int((time.monotonic() - self.started) / self.grow_every)
+        return self.heads[node] + grown
+    
+    async def post(self, url, json=None, headers=None):
+        await asyncio.sleep(0)
+        node, endpoint = url.rsplit('/v1/', 1)
+        self.calls.append((node, endpoint))
+        if endpoint == 'chain/get_info':
+            return FakeResponse(200, dict(head_block_num=self.head(node), last_irreversible_block_num=1))
+        num = json['block_num_or_id']
+        if num > self.head(node) or num < self.first_block:
+            return FakeResponse(500, dict(code=500, message='Internal Service Error', error=dict(
+                code=3100002, name='unknown_block_exception', what='Unknown block', details=[]
+            )))
+        return FakeResponse(200, make_raw_block(num))
+
+
+class TestHeightRouting(BaseEOSTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.nm.bulk_insert(*self.node_dicts)
+        self.urls = [n.url for n in self.example_nodes]
+        self.api = Api(node_manager=self.nm, request_jitter=0, retry_wait=0)
+    
+    def tearDown(self) -> None:
+        self.api.client = None
+        super().tearDown()
+    
+    def _fails(self):
+        return {n.url: n.fail_count for n in self.nm.get_nodes()}
+    
+    def _get_block(self, num):
+        return asyncio.run(self.api.get_block_raw(num))['block_num']
+    
+    def test_not_yet_available_is_not_a_failure(self):
+        client = self.api.client = FakeChainClient({self.urls[0]: 100, self.urls[1]: 100, self.urls[2]: 110})
+        for _ in range(5):
+            self.assertEqual(self._get_block(105), 105)
+            self.assertEqual(client.calls[-1][0], self.urls[2])
+        self.assertEqual(set(self._fails().values()), {0})
+        # Nodes which didn't have the block are remembered, so later calls go straight to the node which does
+        self.assertLessEqual(len([c for c in client.calls if c[1] == 'chain/get_block']), 7)
+    
+    def test_routes_using_probed_heads(self):
+        client = self.api.client = FakeChainClient({self.urls[0]: 100, self.urls[1]: 100, self.urls[2]: 110})
+        for url, head in zip(self.urls, [100, 100, 110]):
+            self.nm.record_health(self.nm.node_by_url(url).id, head_block_num=head, last_irreversible_block_num=1)
+        for _ in range(5):
+            self.assertEqual(self._get_block(105), 105)
+        self.assertEqual({c[0] for c in client.calls}, {self.urls[2]})
+        # Older blocks can still go to any node
+        for _ in range(20):
+            self._get_block(50)
+        self.assertEqual({c[0] for c in client.calls}, set(self.urls))
+    
+    def test_waits_for_block(self):
+        self.api.client = FakeChainClient({u: 100 for u in self.urls}, grow_every=0.05)
+        started = time.monotonic()
+        self.assertEqual(self._get_block(103), 103)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(set(self._fails().values()), {0})
+    
+    def test_missing_history_fails_node(self):
+        # Far below the head, unknown_block_exception means the node lacks history - a node fault, as before
+        self.api.client = FakeChainClient({self.urls[0]: 100, self.urls[1]: 5000, self.urls[2]: 5000})
+        self.api.info_cache.info, self.api.info_cache.fetched_at = dict(head_block_num=5000), time.monotonic()
+        self.assertFalse(asyncio.run(self.api._near_tip(200)))
+        self.assertTrue(asyncio.run(self.api._near_tip(4990)))
+        for _ in range(10):
+            self.assertEqual(self._get_block(200), 200)
+        fails = self._fails()
+        self.assertEqual(fails[self.urls[1]] + fails[self.urls[2]], 0)
+    
+    def test_missing_history_cold(self):
+        # No get_info snapshot yet - it's loaded to find out the block is historical, rather than re-routing the
+        # call between nodes which will never have it until tip_timeout
+        self.api = Api(node_manager=self.nm, request_jitter=0, retry_wait=0, max_retries=1)
+        self.api.client = FakeChainClient({u: 5000 for u in self.urls}, first_block=1000)
+        self.assertIsNone(self.api.head_block_estimate)
+        started = time.monotonic()
+        with self.assertRaises(EOSRPCError):
+            self._get_block(200)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(sum(self._fails().values()), 2)
+        self.assertEqual(self.api.head_block_estimate, 5000)
+        self.assertEqual(len([c for c in self.api.client.calls if c[1] == 'chain/get_info']), 1)
+    
+    def test_one_health_query_per_selection(self):
+        calls = []
+        node_health = self.nm.node_health
+        self.nm.node_health = lambda *a, **kw: calls.append(a) or node_health(*a, **kw)
+        try:
+            self.assertIn(self.api._node_for_block()[0], self.urls)
+            self.assertEqual(len(calls), 1)
+            self.assertIn(self.api._node_for_block(100)[0], self.urls)
+            self.assertEqual(len(calls), 2)
+        finally:
+            del self.nm.node_health
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+from privex.eos.hooks import EventRecorder
+from privex.eos.lib import Api
+from privex.eos.mock import MockChain, MockCluster, MockNodeConfig
+from privex.eos.scheduler import RequestScheduler, current_priority, priority
+from tests.base import BaseEOSTest
+
+
+class TestRequestScheduler(BaseEOSTest):
+    def _serve(self, sched: RequestScheduler, queued: list) -> list:
+        """Hold the only slot while ``queued`` requests (class names) queue up, then return the order they ran in"""
+        order = []
+
+        async def _one(i, name):
+            async with sched.slot(name):
+                order.append((i, name))
+                await asyncio.sleep(0)
+
+        async def _main():
+            await sched.acquire('bulk')
+            tasks = [asyncio.ensure_future(_one(i, n)) for i, n in enumerate(queued)]
+            await asyncio.sleep(0)
+            self.assertEqual(sched.queued, len(queued))
+            sched.release('bulk')
+            await asyncio.gather(*tasks)
+        asyncio.run(_main())
+        return order
+
+    def test_interactive_jumps_queue(self):
+        sched = RequestScheduler(max_in_flight=1)
+        order = self._serve(sched, ['bulk'] * 20 + ['interactive'])
+        self.assertEqual(order[0], (20, 'interactive'))
+        self.assertEqual([i for i, _ in order[1:]], list(range(20)))
+        self.assertEqual(sched.in_flight, 0)
+
+    def test_weighted_share(self):
+        sched = RequestScheduler(max_in_flight=1, weights=dict(interactive=4, bulk=1))
+        order = self._serve(sched, ['bulk'] * 20 + ['interactive'] * 20)
+        first = [n for _, n in order[:10]]
+        self.assertEqual(first.count('interactive'), 8)
+        self.assertEqual(first.count('bulk'), 2)
+        # Requests within a class are served in order
+        self.assertEqual([i for i, n in order if n == 'bulk'], list(range(20)))
+        self.assertEqual(sched.stats['bulk'].served, 21)
+        self.assertEqual(sched.stats['interactive'].served, 20)
+
+    def test_cancelled_waiter(self):
+        sched = RequestScheduler(max_in_flight=1)
+
+        async def _main():
+            await sched.acquire('bulk')
+            t = asyncio.ensure_future(sched.acquire('interactive'))
+            await asyncio.sleep(0)
+            self.assertEqual(sched.stats['interactive'].queued, 1)
+            t.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(sched.queued, 0)
+            sched.release('bulk')
+            self.assertEqual(sched.in_flight, 0)
+            self.assertEqual(await sched.acquire('bulk'), 0.0)
+        asyncio.run(_main())
+
+    def test_classify(self):
+        sched = RequestScheduler()
+        self.assertEqual(sched.classify('/v1/chain/get_block'), 'bulk')
+        self.assertEqual(sched.classify('/v1/chain/get_account'), 'interactive')
+        self.assertEqual(sched.classify('/v1/chain/get_block', 'interactive'), 'interactive')
+        with priority('bulk'):
+            self.assertEqual(current_priority(), 'bulk')
+            self.assertEqual(sched.classify('/v1/chain/get_info'), 'bulk')
+        self.assertIsNone(current_priority())
+        with self.assertRaises(ValueError):
+            sched.classify('/v1/chain/get_info', 'urgent')
+        with self.assertRaises(ValueError):
+            RequestScheduler(weights=dict(fast=1))
+
+    def test_interactive_during_bulk_import(self):
+        rec = EventRecorder()
+
+        async def _main():
+            async with MockCluster([MockNodeConfig(latency=0.01)], chain=MockChain(head_block=1000)) as cluster:
+                cluster.register(self.nm)
+                sched = RequestScheduler(max_in_flight=4)
+                async with Api(node_manager=self.nm, request_jitter=0, scheduler=sched, hooks=[rec]) as api:
+                    bulk = asyncio.ensure_future(api.get_block_range(701, 1000))
+                    await asyncio.sleep(0.05)
+                    self.assertGreater(sched.stats['bulk'].queued, 100)
+                    started = time.monotonic()
+                    await api.get_account('someguy12333')
+                    elapsed = time.monotonic() - started
+                    self.assertFalse(bulk.done())
+                    with api.priority('bulk'):
+                        await api.get_info()
+                    self.assertEqual(len(await bulk), 300)
+                    return sched, elapsed
+        sched, elapsed = asyncio.run(_main())
+        # 300 blocks at 4 at a time take ~0.75s - the account lookup only waits for the next free slot
+        self.assertLess(elapsed, 0.2)
+        self.assertEqual(sched.stats['interactive'].served, 1)
+        self.assertEqual(sched.stats['bulk'].served, 301)
+        self.assertLess(sched.stats['interactive'].wait_max, sched.stats['bulk'].wait_max)
+        self.assertEqual(rec.last('on_decode').priority, 'bulk')
+        self.assertIn('interactive', [e.priority for _, e in rec.events])
+
+    def test_node_picked_at_send_time(self):
+        # The node is picked again once the slot is free, so queued requests use the node state at send time
+        rec = EventRecorder()
+
+        async def _main():
+            async with MockCluster([MockNodeConfig()] * 2, chain=MockChain(head_block=1000)) as cluster:
+                first, second = cluster.urls
+                self.nm.bulk_insert(dict(url=first, network='eos'))
+                sched = RequestScheduler(max_in_flight=1)
+                async with Api(node_manager=self.nm, request_jitter=0, scheduler=sched, hooks=[rec]) as api:
+                    await sched.acquire('interactive')
+                    task = asyncio.ensure_future(api.get_account_raw('someguy12333'))
+                    await asyncio.sleep(0.05)
+                    self.assertEqual(sched.queued, 1)
+                    # While it's queued, the only node it could have picked fails and another is added
+                    self.nm.bulk_insert(dict(url=second, network='eos'))
+                    self.nm.fail_node(first)
+                    sched.release('interactive')
+                    await task
+                    return second
+        second = asyncio.run(_main())
+        self.assertEqual(rec.last('on_decode').node, second)
+
+    def test_tip_wait_holds_no_slot(self):
+        # Bulk calls waiting for blocks past the head mustn't hold the slots interactive calls need
+        async def _main():
+            async with MockCluster([MockNodeConfig()], chain=MockChain(head_block=1000)) as cluster:
+                cluster.register(self.nm)
+                sched = RequestScheduler(max_in_flight=2)
+                async with Api(node_manager=self.nm, request_jitter=0, scheduler=sched, tip_timeout=10) as api:
+                    await api.get_info()
+                    waiting = [asyncio.ensure_future(api.get_block_raw(1100 + i)) for i in range(4)]
+                    await asyncio.sleep(0.1)
+                    self.assertEqual(sched.in_flight, 0)
+                    started = time.monotonic()
+                    await asyncio.wait_for(api.get_account_raw('someguy12333'), 2)
+                    elapsed = time.monotonic() - started
+                    self.assertFalse(any(t.done() for t in waiting))
+                    for t in waiting:
+                        t.cancel()
+                    await asyncio.gather(*waiting, return_exceptions=True)
+                    self.assertEqual(sched.in_flight, 0)
+                    return elapsed
+        self.assertLess(asyncio.run(_main()), 0.5)
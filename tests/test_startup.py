@@ -0,0 +1,63 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from privex.eos.health import async_client, close_client, default_ssl_context
+from privex.eos.lib import Api
+from tests.base import BaseEOSTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup(BaseEOSTest):
+    def test_create(self):
+        async def _main():
+            ticks = 0
+
+            async def _tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+            t = asyncio.ensure_future(_tick())
+            async with await Api.create(self.nm, request_jitter=0) as api:
+                self.assertIs(api.node_manager, self.nm)
+                self.assertEqual(api.request_jitter, 0)
+            t.cancel()
+            return ticks
+        # The loop kept running while the SSL context was loaded in the executor
+        self.assertGreater(asyncio.run(_main()), 0)
+        self.assertEqual(sorted(n.url for n in self.nm.get_nodes()), sorted(n['url'] for n in Api.DEFAULT_NODES))
+
+    def test_shared_ssl_context(self):
+        async def _main():
+            clients = [async_client(timeout=30), async_client(timeout=30)]
+            for c in clients:
+                await close_client(c)
+        asyncio.run(_main())
+        self.assertIs(default_ssl_context(), default_ssl_context())
+
+    def test_lazy_import(self):
+        code = (
+            "import sys\n"
+            "import privex.eos\n"
+            "assert 'privex.eos.lib' not in sys.modules and 'httpx' not in sys.modules, 'imported eagerly'\n"
+            "assert 'privex.coin_handlers' not in sys.modules\n"
+            "from privex.eos import Api, EOSBlock\n"
+            "assert privex.eos.Api is Api and 'privex.eos.lib' in sys.modules\n"
+            "from privex.eos.adapters import SqliteAdapter\n"
+            "from privex.eos.node import NodeManager\n"
+            "api = Api(node_manager=NodeManager(adapter=SqliteAdapter(db=':memory:')), request_jitter=0)\n"
+            "loaded = sorted(m for m in sys.modules if m.startswith('privex.eos.'))\n"
+            "assert loaded == [\n"
+            "    'privex.eos.adapters', 'privex.eos.cache', 'privex.eos.exceptions', 'privex.eos.health',\n"
+            "    'privex.eos.lib', 'privex.eos.node', 'privex.eos.objects',\n"
+            "], loaded\n"
+            "from privex.eos.mock import synthetic_block\n"
+            "b = EOSBlock.from_dict(synthetic_block(5))\n"
+            "assert b['block_num'] == b.get('block_num') == dict(b)['block_num'] == 5\n"
+        )
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        res = subprocess.run([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.assertEqual(res.returncode, 0, res.stdout.decode())
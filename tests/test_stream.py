@@ -0,0 +1,57 @@
+import asyncio
+from unittest import TestCase
+
+from privex.eos.objects import EOSAction
+from privex.eos.stream import ActionFilter, extract_actions, stream_raw_blocks, stream_actions
+from tests.base import make_action, make_raw_block, FakeApi
+
+
+class TestActionStream(TestCase):
+    def setUp(self) -> None:
+        self.blocks = {
+            100: make_raw_block(
+                100,
+                [make_action(to='privexinceos', quantity='1.0000 EOS'), make_action(name='issue', to='bob')],
+                'deferred-trx-id',
+                [make_action(account='eosio', name='buyrambytes', actor='privexinceos')],
+            ),
+            101: make_raw_block(101, [make_action(actor='bob', to='alice', quantity='2.0000 EOS')]),
+            102: make_raw_block(102),
+        }
+    
+    def test_extract_all_actions(self):
+        acts = list(extract_actions(self.blocks[100]))
+        self.assertEqual(len(acts), 3)
+        self.assertIsInstance(acts[0], EOSAction)
+        self.assertEqual((acts[1].trx_index, acts[1].action_index), (0, 1))
+        # The deferred transaction (trx is only an ID) is skipped, but still counts towards the trx index
+        self.assertEqual((acts[2].trx_index, acts[2].action_index), (2, 0))
+        self.assertEqual(acts[0].block_num, 100)
+        self.assertEqual(acts[0].trx_id, self.blocks[100]['transactions'][0]['trx']['id'])
+
+    def test_extract_filtered(self):
+        f = ActionFilter(contracts='eosio.token', names=['transfer'])
+        acts = list(extract_actions(self.blocks[100], f))
+        self.assertEqual(len(acts), 1)
+        self.assertEqual(acts[0].data['to'], 'privexinceos')
+        
+        acts = list(extract_actions(self.blocks[100], ActionFilter(authorizers='privexinceos')))
+        self.assertEqual([a.name for a in acts], ['buyrambytes'])
+
+    def test_stream_raw_blocks_ordered(self):
+        api = FakeApi(self.blocks)
+        
+        async def _collect():
+            return [b['block_num'] async for b in stream_raw_blocks(api, 100, 102, concurrency=2)]
+        
+        self.assertEqual(asyncio.run(_collect()), [100, 101, 102])
+
+    def test_stream_actions(self):
+        api = FakeApi(self.blocks)
+        
+        async def _collect():
+            f = ActionFilter(names='transfer')
+            return [a async for a in stream_actions(api, 100, 102, action_filter=f)]
+        
+        acts = asyncio.run(_collect())
+        self.assertEqual([(a.block_num, a.data['to']) for a in acts], [(100, 'privexinceos'), (101, 'alice')])
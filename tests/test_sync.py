@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from privex.eos.adapters import SqliteAdapter
+from privex.eos.exceptions import EOSRPCError
+from privex.eos.mock import MockChain, MockCluster, MockNodeConfig, synthetic_account
+from privex.eos.node import NodeManager
+from privex.eos.objects import EOSBlock
+from privex.eos.scheduler import RequestScheduler
+from privex.eos.sync import LoopThread, SyncApi
+
+
+class TestSyncApi(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # The mock nodes run on their own loop thread, as the tests themselves are synchronous
+        cls.server = LoopThread(name='mock-nodes')
+        chain = MockChain(head_block=1000, accounts=dict(someguy12333=synthetic_account('someguy12333', 1000)))
+        cls.cluster = cls.server.run(MockCluster([MockNodeConfig(latency=0.005)], chain=chain).start())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.run(cls.cluster.stop())
+        cls.server.stop()
+
+    def setUp(self) -> None:
+        nm = NodeManager(adapter=SqliteAdapter(db=':memory:', connection_kwargs=dict(check_same_thread=False)))
+        self.cluster.register(nm)
+        self.eos = SyncApi(node_manager=nm, request_jitter=0, retry_wait=0, timeout=10)
+        # Learn the chain head first, so block calls aren't held back waiting for nodes to "catch up" to them
+        self.eos.get_info()
+        self.stats = self.cluster.nodes[0].stats
+        self.connections = self.stats['connections']
+
+    def tearDown(self) -> None:
+        self.eos.close()
+
+    def test_methods(self):
+        block = self.eos.get_block(990)
+        self.assertIsInstance(block, EOSBlock)
+        self.assertEqual(block.block_num, 990)
+        self.assertEqual(self.eos.get_info()['head_block_num'], 1000)
+        self.assertEqual(self.eos.get_account('someguy12333').account_name, 'someguy12333')
+        self.assertEqual(self.eos.get_block.__doc__, self.eos.api.get_block.__doc__)
+        with self.assertRaises(EOSRPCError):
+            self.eos.get_account('nobody')
+        with self.assertRaises(AttributeError):
+            self.eos.generate_block_range(1, 2)
+
+    def test_connection_reuse(self):
+        for i in range(20):
+            self.eos.get_block_raw(900 + i)
+        # setUp's get_info opened the only connection needed
+        self.assertEqual(self.stats['connections'], self.connections)
+
+    def test_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            blocks = list(pool.map(lambda n: self.eos.get_block_raw(n)['block_num'], range(900, 964)))
+        self.assertEqual(blocks, list(range(900, 964)))
+        self.assertLessEqual(self.stats['connections'] - self.connections, 8)
+
+    def test_iterators(self):
+        blocks = [b.block_num for b in self.eos.stream_blocks(990, 999)]
+        self.assertEqual(blocks, list(range(990, 1000)))
+        it = self.eos.stream_blocks(990, None, raw=True)
+        self.assertEqual(next(it)['block_num'], 990)
+        it.close()
+
+    def test_batch(self):
+        self.assertEqual([b.block_num for b in self.eos.map('get_block', range(900, 950))], list(range(900, 950)))
+        block, acc, info = self.eos.batch([('get_block', 950), ('get_account', 'someguy12333'), ('get_info',)])
+        self.assertEqual((block.block_num, acc.account_name, info['head_block_num']), (950, 'someguy12333', 1000))
+        res = self.eos.batch([('get_block_raw', 950), ('get_account', 'nobody')], return_exceptions=True)
+        self.assertIsInstance(res[1], EOSRPCError)
+        blocks = self.eos.run(lambda api: api.get_block_range(990, 999))
+        self.assertEqual(list(blocks.keys()), list(range(990, 1000)))
+        with self.assertRaises(AttributeError):
+            self.eos.batch([('get_block', 1), ('_call', '/v1/chain/get_info')])
+
+    def test_priority(self):
+        self.eos.close()
+        nm = NodeManager(adapter=SqliteAdapter(db=':memory:', connection_kwargs=dict(check_same_thread=False)))
+        self.cluster.register(nm)
+        sched = RequestScheduler()
+        self.eos = SyncApi(node_manager=nm, request_jitter=0, scheduler=sched)
+        with self.eos.priority('bulk'):
+            self.eos.get_info()
+            self.eos.map('get_block_raw', [950])
+        self.eos.get_account('someguy12333')
+        self.assertEqual(sched.stats['bulk'].served, 2)
+        self.assertEqual(sched.stats['interactive'].served, 1)
+
+    def test_close(self):
+        thread = self.eos._thread.thread
+        self.eos.close()
+        self.assertTrue(self.eos.closed)
+        self.assertFalse(thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            self.eos.get_info()
+        self.eos.close()
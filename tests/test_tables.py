@@ -0,0 +1,76 @@
+import asyncio
+from unittest import TestCase
+
+from privex.eos.exceptions import PaginationError
+from privex.eos.tables import AdaptiveLimit, iter_table_rows
+
+
+class FakeTableApi:
+    """Serves a fake ``accounts`` table, paginated in the same way as ``/v1/chain/get_table_rows``"""
+    def __init__(self, rows: list, next_key: bool = True, delay: float = 0.0):
+        self.rows, self.next_key, self.delay = rows, next_key, delay
+        self.calls = []
+    
+    async def _call(self, endpoint, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(self.delay)
+        lower = int(kwargs.get('lower_bound', 0))
+        page = [r for r in self.rows if r['id'] >= lower][:kwargs['limit']]
+        remaining = [r for r in self.rows if r['id'] > page[-1]['id']] if page else []
+        res = dict(rows=page, more=len(remaining) > 0)
+        if self.next_key:
+            res['next_key'] = str(remaining[0]['id']) if remaining else ''
+        return res
+
+
+class TestTableRows(TestCase):
+    rows = [dict(id=i, balance=f'{i}.0000 EOS') for i in range(0, 250)]
+    
+    def _collect(self, api, **kwargs):
+        async def _run():
+            return [r async for r in iter_table_rows(api, 'eosio.token', 'accounts', 'someguy12333', **kwargs)]
+        return asyncio.run(_run())
+    
+    def test_pagination(self):
+        api = FakeTableApi(self.rows)
+        rows = self._collect(api, limit=10, max_limit=10)
+        self.assertEqual([r['id'] for r in rows], list(range(250)))
+        self.assertEqual(len(api.calls), 25)
+        self.assertEqual(api.calls[0]['scope'], 'someguy12333')
+        self.assertEqual(api.calls[1]['lower_bound'], '10')
+    
+    def test_adaptive_limit_grows(self):
+        api = FakeTableApi(self.rows)
+        rows = self._collect(api, limit=10, max_limit=80, target_time=5)
+        self.assertEqual(len(rows), 250)
+        self.assertEqual([c['limit'] for c in api.calls], [10, 20, 40, 80, 80, 80])
+    
+    def test_key_field_fallback(self):
+        api = FakeTableApi(self.rows, next_key=False)
+        rows = self._collect(api, limit=100, max_limit=100, key_field='id')
+        # The last row of each page is the first row of the next, but is only yielded once
+        self.assertEqual([r['id'] for r in rows], list(range(250)))
+        with self.assertRaises(PaginationError):
+            self._collect(FakeTableApi(self.rows, next_key=False), limit=100)
+    
+    def test_key_field_fallback_stalled(self):
+        # With limit=1, each page would only contain the lower bound row - raise instead of requesting it forever
+        api = FakeTableApi(self.rows, next_key=False)
+        seen = []
+        
+        async def _run():
+            async for r in iter_table_rows(api, 'eosio.token', 'accounts', 'someguy12333', limit=1, min_limit=1,
+                                           max_limit=1, key_field='id'):
+                seen.append(r['id'])
+        
+        with self.assertRaises(PaginationError):
+            asyncio.run(_run())
+        self.assertEqual(seen, [0])
+        self.assertEqual(len(api.calls), 2)
+    
+    def test_adaptive_limit(self):
+        lim = AdaptiveLimit(100, min_limit=10, max_limit=400, target_time=1.0)
+        self.assertEqual(lim.update(0.1, 100, True), 200)
+        # Node returned less rows than requested (hit its own time limit) - don't grow
+        self.assertEqual(lim.update(0.1, 50, True), 200)
+        self.assertEqual(lim.update(2.0, 200, True), 100)
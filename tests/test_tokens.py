@@ -0,0 +1,82 @@
+import asyncio
+from decimal import Decimal
+from unittest import TestCase
+
+from privex.eos.tokens import TokenAmount, BalanceSweeper, get_balances
+
+
+class FakeTokenApi:
+    """Serves the ``accounts`` table of fake token contracts from ``balances[contract][holder] = [asset, ...]``"""
+    def __init__(self, balances: dict, fail_holder: str = None):
+        self.balances, self.fail_holder = balances, fail_holder
+        self.calls = []
+    
+    async def _call(self, endpoint, **kwargs):
+        self.calls.append((kwargs['code'], kwargs['scope']))
+        await asyncio.sleep(0)
+        if kwargs['scope'] == self.fail_holder:
+            raise ConnectionError('node went away')
+        rows = [dict(balance=b) for b in self.balances.get(kwargs['code'], {}).get(kwargs['scope'], [])]
+        return dict(rows=rows, more=False, next_key='')
+
+
+class TestTokenAmount(TestCase):
+    def test_parse(self):
+        self.assertEqual(TokenAmount.parse('12.3456 EOS'), TokenAmount(123456, 4, 'EOS'))
+        self.assertEqual(TokenAmount.parse('0.0001 EOS'), TokenAmount(1, 4, 'EOS'))
+        self.assertEqual(TokenAmount.parse('-1.500 IQ'), TokenAmount(-1500, 3, 'IQ'))
+        self.assertEqual(TokenAmount.parse('42 TKN'), TokenAmount(42, 0, 'TKN'))
+    
+    def test_str_round_trip(self):
+        for s in ['12.3456 EOS', '0.0001 EOS', '-1.500 IQ', '42 TKN', '0.0000 EOS']:
+            self.assertEqual(str(TokenAmount.parse(s)), s)
+        self.assertEqual(TokenAmount.parse('12.3456 EOS').to_decimal(), Decimal('12.3456'))
+
+
+class TestBalances(TestCase):
+    balances = {
+        'eosio.token': {'alice': ['1.0000 EOS'], 'bob': ['2.5000 EOS', '3.0000 JUNK']},
+        'everipediaiq': {'alice': ['100.000 IQ']},
+    }
+    
+    def test_get_balances(self):
+        api = FakeTokenApi(self.balances)
+        res = asyncio.run(get_balances(api, ['alice', 'bob', 'carol', 'alice'], ['eosio.token', 'everipediaiq']))
+        self.assertEqual(list(res.keys()), ['alice', 'bob', 'carol'])
+        self.assertEqual(res['alice'], {
+            ('eosio.token', 'EOS'): TokenAmount(10000, 4, 'EOS'),
+            ('everipediaiq', 'IQ'): TokenAmount(100000, 3, 'IQ'),
+        })
+        self.assertEqual(len(res['bob']), 2)
+        self.assertEqual(res['carol'], {})
+        self.assertEqual(len(api.calls), 6)
+    
+    def test_symbol_filter_and_errors(self):
+        api = FakeTokenApi(self.balances, fail_holder='alice')
+        res = asyncio.run(get_balances(api, ['alice', 'bob'], symbols=['EOS']))
+        self.assertEqual(list(res.keys()), ['bob'])
+        self.assertEqual(list(res['bob'].keys()), [('eosio.token', 'EOS')])
+        self.assertIsInstance(res.errors['alice'], ConnectionError)
+    
+    def test_sweeper_changes(self):
+        api = FakeTokenApi({'eosio.token': {'alice': ['1.0000 EOS'], 'bob': ['2.0000 EOS']}})
+        sweeper = BalanceSweeper(api, ['alice', 'bob'])
+        first = asyncio.run(sweeper.changes())
+        self.assertEqual(len(first), 2)
+        self.assertIsNone(first[0].old)
+        self.assertEqual(asyncio.run(sweeper.changes()), [])
+        
+        api.balances['eosio.token']['alice'] = ['0.5000 EOS']
+        api.balances['eosio.token']['bob'] = []
+        changes = asyncio.run(sweeper.changes())
+        self.assertEqual([(c.holder, c.delta) for c in changes], [('alice', -5000), ('bob', -20000)])
+        self.assertIsNone(changes[1].new)
+    
+    def test_sweeper_ignores_failed_holders(self):
+        api = FakeTokenApi({'eosio.token': {'alice': ['1.0000 EOS'], 'bob': ['2.0000 EOS']}})
+        sweeper = BalanceSweeper(api, ['alice', 'bob'])
+        asyncio.run(sweeper.changes())
+        api.fail_holder = 'bob'
+        self.assertEqual(asyncio.run(sweeper.changes()), [])
+        self.assertIn('bob', sweeper.errors)
+        self.assertEqual(sweeper.last['bob'][('eosio.token', 'EOS')].amount, 20000)